@@ -19,6 +19,8 @@ Provides "core" directory with:
 - shtr: library to easily shift python strings like integers
 - shar: library to handle efficiently bit-strings, possibly using numpy's arrays to fasten processing
 - CSN1: library to help handling CSN1 messages building and parsing (mainly used in GPRS)
+- stream: streaming parsing of records (MPEG4 atoms, TLS records, BGP4 messages, pcap records) from file-like objects or sockets, with Block.parse_stream()
+- serial: serialization of the values exported with export() (Element, Layer, Block, ASN1Obj) to JSON lines and MessagePack
 
 Provides "utils" directory with:
 - CRC16: function to compute CRC-16 checksum, taken from the Internet
@@ -27,7 +29,7 @@ Provides "utils" directory with:
 - PRF1862: class to compute NIST 186-2 pseudo random generation, derived from SHA1.py
 - inet: IP / TCP checksum routines, taken from scapy
 - conv: routines for converting network addresses
-- perf: tests for checking execution at parsing / building messages, with time measurement
+- perf: benchmark suite for parsing / building messages, with latency statistics and JSON baselines
 - CrcMoose: large sets of CRC checksums, taken from the Ray Burr on the Internet (but not use in any part of the project, yet)
 - IntEncoder: returns encoding format required for integral values (used in asn1)
 - repr: contains functions (originally in core/element) to print elements in various ways (show, hex, bin, ...)
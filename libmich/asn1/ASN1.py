@@ -28,10 +28,12 @@
 
 try:
     from libmich.core.element import Layer
+    from libmich.core.shtr import BitReader
 except:
     log('libmich module unavailable: encoding / decoding will not work')
 else:
     Layer._byte_aligned = False
+from collections import OrderedDict
 from utils import *
 import parsers
 
@@ -174,6 +176,11 @@ class ASN1Obj(object):
     
     - msg: libmich Layer, or None; it stores the transfer message structure,
         ready to be sent over the wire.
+    
+    - plan: ASN1Plan, or None; frozen codec plan, precomputed from the 
+        content, extension and constraints by build_plan() when the object is
+        compiled or loaded, and used by the codec instead of computing them
+        at each encoding / decoding.
     '''
     # this adds verbosity on encoding / decoding objects
     #_DEBUG = 1
@@ -185,12 +192,17 @@ class ASN1Obj(object):
     # (however, the message will certainly be malformed)
     _RAISE_SILENTLY = True
     # when set, returns the libmich message structure set in ._msg attribute
-    # after encode()ing / decode()ing
+    # after encode()ing / decode()ing;
+    # otherwise, encode() writes straight into a buffer when the CODEC 
+    # supports it (encode_buf()), and ._msg is built when accessed
     _RET_STRUCT = False
     
     # CODEC for encoding / decoding ASN.1 transfer messages
     CODEC = None
     
+    # frozen codec plan, set by build_plan()
+    _plan = None
+    
     # the following attributes are used to store 
     # textual assignment collected from the ASN.1 module:
     #_text_decl
@@ -477,16 +489,14 @@ class ASN1Obj(object):
         if self._type == TYPE_CLASS or self._ext is None or val is None:
             return
         if self._SAFE:
-            # ensure all grouped extensions are set together
-            val_ext = [name for name in self._ext_flat if name in val]
-            for name in val_ext:
-                if self._cont[name]._group >= 0:
+            # ensure all mandatory grouped extensions are set together
+            for name in self._ext_flat:
+                if name in val and self._cont[name]._group >= 0:
                     group = self._ext_group[self._cont[name]._group]
-                    if not all([name in val_ext for name in group]):
+                    if not all([g in val for g in group \
+                                if self._cont[g]._flags is None]):
                         raise(ASN1_OBJ('%s: missing grouped extension'\
                               % self.get_fullname()))
-                    for g in group:
-                        val_ext.remove(g)
         for name in self._ext_flat:
             if name not in val:
                 # WNG: this is incorrect according to the specification
@@ -557,6 +567,35 @@ class ASN1Obj(object):
             else:
                 self._set_valset(val, None)
     
+    def _get_val_enc(self, val):
+        # returns val as the Layer-building encoder handles it when it is not
+        # set with set_val() (e.g. a decoded value): the values of CHOICE
+        # alternatives and SEQUENCE OF items are filtered through set_val(),
+        # those of SEQUENCE components and OPEN types are passed as is
+        if val is None:
+            return None
+        if self._type == TYPE_CHOICE:
+            if val[0] in self._cont:
+                cho = self._cont[val[0]]
+                cho.set_val(val[1])
+                val = (val[0], cho._val)
+                cho._val = None
+        elif self._type in (TYPE_SEQ_OF, TYPE_SET_OF):
+            vals = []
+            for v in val:
+                self._cont.set_val(v)
+                vals.append(self._cont._val)
+            self._cont._val = None
+            val = vals
+        elif self._type in (TYPE_SEQ, TYPE_SET):
+            val = dict([(name, self._cont[name]._get_val_enc(v)) \
+                        if name in self._cont else (name, v) \
+                        for name, v in val.items()])
+        elif self._type in (TYPE_OPEN, TYPE_ANY) and isinstance(val, tuple) \
+        and isinstance(self._cont, ASN1Obj):
+            val = (val[0], self._cont._get_val_enc(val[1]))
+        return val
+    
     #--------------------------------------------------------------------------#
     # encoding / decoding
     #--------------------------------------------------------------------------#
@@ -572,11 +611,58 @@ class ASN1Obj(object):
                       % (self.get_fullname(), self.CODEC)))
         if val is not None:
             self.set_val(val)
-        self._encode(**kwargs)
+        if self._RET_STRUCT or self._DEBUG \
+        or not hasattr(self.CODEC, 'encode_buf'):
+            self._encode(**kwargs)
+        elif val is None:
+            # the value in place is passed to the direct encoder in the form
+            # the Layer-building one handles it, for the same buffer
+            self._encode_buf(val=self._get_val_enc(self._val), **kwargs)
+        else:
+            self._encode_buf(**kwargs)
         if self._RET_STRUCT:
             return self._msg
     
+    def _encode_buf(self, **kwargs):
+        # encodes straight into a string buffer, with the codec's encode_buf():
+        # the libmich message structure is only built when ._msg is accessed
+        # (see __getattr__()), or when the codec raises, to handle the error 
+        # like _encode()
+        self.__dict__.pop('_msg', None)
+        self.__dict__.pop('_dec', None)
+        self._codec = self.CODEC()
+        try:
+            buf = self._codec.encode_buf(self, **kwargs)
+        except self.CODEC._enc_err:
+            self._encode(**kwargs)
+        else:
+            self._enc = (buf, self._val, kwargs)
+    
+    def __getattr__(self, attr):
+        if attr == '_msg' and '_enc' in self.__dict__:
+            # builds the message structure of the value encoded 
+            # with _encode_buf()
+            buf, val, kwargs = self._enc
+            cur, self._val = self._val, val
+            self._encode(**kwargs)
+            self._val = cur
+            return self._msg
+        elif attr == '_msg' and '_dec' in self.__dict__:
+            # builds the message structure of the value decoded 
+            # with _decode_val()
+            buf, kwargs = self._dec
+            if isinstance(buf, BitReader):
+                buf = BitReader(buf)
+            cur = self._val
+            self._decode(buf, **kwargs)
+            self._val = cur
+            return self._msg
+        raise(AttributeError('\'%s\' object has no attribute \'%s\'' \
+                             % (self.__class__.__name__, attr)))
+    
     def _encode(self, **kwargs):
+        self.__dict__.pop('_enc', None)
+        self.__dict__.pop('_dec', None)
         self._msg = Layer(self._name)
         #
         # do not encode ASN.1 objects which are set with their DEFAULT value
@@ -608,11 +694,39 @@ class ASN1Obj(object):
             or not issubclass(self.CODEC, ASN1Codec):
                 raise(ASN1_OBJ('%s: invalid decoder defined: %s' 
                       % (self.get_fullname(), self.CODEC)))
-        buf = self._decode(buf, **kwargs)
+        if self._RET_STRUCT or self._DEBUG \
+        or not hasattr(self.CODEC, 'decode_val'):
+            buf = self._decode(buf, **kwargs)
+        else:
+            buf = self._decode_val(buf, **kwargs)
         if self._RET_STRUCT:
             return self._msg
     
+    def _decode_val(self, buf, **kwargs):
+        # decodes the value straight from the buffer, with the codec's 
+        # decode_val(): the libmich message structure is only built when ._msg
+        # is accessed (see __getattr__()), or when the codec raises, to handle 
+        # the error like _decode()
+        self.__dict__.pop('_msg', None)
+        self.__dict__.pop('_enc', None)
+        # a BitReader is consumed in place: keep a copy at its current offset
+        if isinstance(buf, BitReader):
+            dec = BitReader(buf)
+        else:
+            dec = buf
+        self._codec = self.CODEC()
+        try:
+            self._val = self._codec.decode_val(self, buf, **kwargs)
+        except self.CODEC._dec_err:
+            if isinstance(buf, BitReader):
+                buf.reset(dec)
+            return self._decode(buf, **kwargs)
+        self._dec = (dec, kwargs)
+        return buf
+    
     def _decode(self, buf, **kwargs):
+        self.__dict__.pop('_enc', None)
+        self.__dict__.pop('_dec', None)
         self._msg = Layer(self._name)
         self._codec = self.CODEC()
         if self._RAISE_SILENTLY:
@@ -627,10 +741,39 @@ class ASN1Obj(object):
         if self._DEBUG:
             log('decode: %s, %s' % (self.get_fullname(), self()))
         return buf
+    
+    #--------------------------------------------------------------------------#
+    # reentrant encoding / decoding
+    #--------------------------------------------------------------------------#
+    # encode_val() and decode_val() use a new codec instance for each call,
+    # and pass the value along instead of setting it in the ASN1Obj:
+    # the ASN1Obj and its content are not modified, so they can be called
+    # concurrently (e.g. from several threads) on the same ASN1Obj;
+    # kwargs are passed to the codec (e.g. PER: offset, variant)
+    def encode_val(self, val, **kwargs):
+        # returns the buffer encoding val, val being in the form returned
+        # by decode_val() or set by set_val(), as it is not filtered
+        if not hasattr(self.CODEC, 'encode_buf'):
+            raise(ASN1_OBJ('%s: no reentrant encoder defined: %s' 
+                  % (self.get_fullname(), self.CODEC)))
+        kwargs['val'] = val
+        return self.CODEC().encode_buf(self, **kwargs)
+    
+    def decode_val(self, buf, **kwargs):
+        # returns the value decoded from buf, a BitReader being consumed 
+        # in place
+        # WNG: the few encodings which only the Layer-building decoder maps
+        # (e.g. non-zero padding, truncated integers, unsupported types) raise
+        # the codec's decoding error here, whereas decode() falls back to it
+        if not hasattr(self.CODEC, 'decode_val'):
+            raise(ASN1_OBJ('%s: no reentrant decoder defined: %s' 
+                  % (self.get_fullname(), self.CODEC)))
+        return self.CODEC().decode_val(self, buf, **kwargs)
     #
     # forwading libmich methods to the _msg attribute
     #
     def __str__(self):
+        if '_enc' in self.__dict__: return self._enc[0]
         if hasattr(self, '_msg'): return str(self._msg)
         else: return ''
     
@@ -646,6 +789,74 @@ class ASN1Obj(object):
         if hasattr(self, '_msg'): return self._msg.show()
         else: return ''
     
+    #--------------------------------------------------------------------------#
+    # value export
+    #--------------------------------------------------------------------------#
+    def export(self, names=False):
+        # returns the value as native python objects (see core/serial.py):
+        # - ENUMERATED, PrintableString and IA5String as unicode
+        # - OCTET STRING and unknown OPEN / ANY contents as str
+        # - CHOICE and OPEN / ANY with a known type as a single-item
+        #   OrderedDict {name: value}
+        # - SEQUENCE / SET / CLASS as OrderedDict, in the order of components
+        # - SEQUENCE OF / SET OF and OBJECT IDENTIFIER as list
+        # with names, an INTEGER having a named number is returned 
+        # as a tuple (int, unicode);
+        # the value is passed to the content objects, which are not modified
+        if self._mode == 2:
+            if self._val is None:
+                return None
+            val = []
+            if self._val['root'] is not None:
+                val.extend(self._val['root'])
+            if self._val['ext'] is not None:
+                val.extend(self._val['ext'])
+            return [self._export_val(v, names) for v in val]
+        return self._export_val(self._val, names)
+    
+    def _export_val(self, val, names):
+        if val is None:
+            return None
+        elif isinstance(val, ASN1Obj):
+            # CONTAINING constraint, or OPEN type assigned with an object
+            return val.export(names)
+        type = self._type
+        if type == TYPE_INTEGER:
+            if names and self._cont:
+                for name in self._cont:
+                    if self._cont[name] == val:
+                        return (val, name.decode('utf-8', 'replace'))
+            return val
+        elif type in (TYPE_ENUM, TYPE_IA5_STR, TYPE_PRINT_STR):
+            return val.decode('latin-1')
+        elif type == TYPE_OID:
+            return list(val)
+        elif type == TYPE_CHOICE:
+            name, v = val
+            if self._cont and name in self._cont:
+                v = self._cont[name]._export_val(v, names)
+            return OrderedDict([(name, v)])
+        elif type in (TYPE_SEQ, TYPE_SET, TYPE_CLASS):
+            ret = OrderedDict()
+            if self._cont:
+                for name in self._cont:
+                    if name in val:
+                        ret[name] = self._cont[name]._export_val(val[name], 
+                                                                 names)
+            for name in val:
+                # unknown extensions
+                if name not in ret:
+                    ret[name] = val[name]
+            return ret
+        elif type in (TYPE_SEQ_OF, TYPE_SET_OF):
+            return [self._cont._export_val(v, names) for v in val]
+        elif type in (TYPE_OPEN, TYPE_ANY) and isinstance(val, tuple):
+            name, v = val
+            if name in GLOBAL.TYPE:
+                v = GLOBAL.TYPE[name]._export_val(v, names)
+            return OrderedDict([(name, v)])
+        return val
+    
     #--------------------------------------------------------------------------#
     # content accessors
     #--------------------------------------------------------------------------#
@@ -714,6 +925,11 @@ class ASN1Obj(object):
                 typeref = typeref_more
     
     def get_const_int(self):
+        if self._plan is not None:
+            return self._plan.const_int
+        return self._get_const_int()
+    
+    def _get_const_int(self):
         if self._type == TYPE_INTEGER:
             lb, ub, ext = None, None, False
         elif self._type in (TYPE_BIT_STR, TYPE_OCTET_STR, TYPE_IA5_STR, 
@@ -743,6 +959,29 @@ class ASN1Obj(object):
                     return const
         return None
     
+    def get_plan(self):
+        # returns the codec plan built by build_plan(), 
+        # or a new one if it was not built
+        if self._plan is not None:
+            return self._plan
+        return ASN1Plan(self)
+    
+    def build_plan(self):
+        # builds the codec plan of the object and of all objects within
+        # its content: they must not be changed afterwards
+        stack, done = [self], set()
+        while stack:
+            obj = stack.pop()
+            if id(obj) in done:
+                continue
+            done.add(id(obj))
+            obj._plan = ASN1Plan(obj)
+            if isinstance(obj._cont, ASN1Obj):
+                stack.append(obj._cont)
+            elif isinstance(obj._cont, (OD, dict)):
+                stack.extend([c for c in obj._cont.values() \
+                              if isinstance(c, ASN1Obj)])
+    
     def get_internals(self):
         ASN1ObjDict = {}
         for kw in self.KW:
@@ -831,7 +1070,9 @@ class ASN1Obj(object):
     
     def _build_constructed_rootext(self):
         if self._ext is not None:
-            self._root_comp = [c for c in self._cont if c not in self._ext]
+            # grouped extensions are nested lists within _ext
+            ext_flat = flatten(self._ext)
+            self._root_comp = [c for c in self._cont if c not in ext_flat]
         else:
             self._root_comp = [c for c in self._cont]
         self._root_opt = []
@@ -999,7 +1240,7 @@ class ASN1Obj(object):
                 ASN1ObjDict['val'] = self._to_dict_set()
         if self._flags:
             ASN1ObjDict['flags'] = self._to_dict_flags()
-        if self._group:
+        if self._group is not None:
             ASN1ObjDict['group'] = int(self._group)
         if self._syntax:
             ASN1ObjDict['syntax'] = OD( map(lambda x:(str(x[0]), str(x[1])), 
@@ -1051,7 +1292,7 @@ class ASN1Obj(object):
         for e in self._ext:
             if isinstance(e, str):
                 ext_clone.append(str(e))
-            elif isinstance(e, (tuple, str)):
+            elif isinstance(e, (tuple, list)):
                 ext_clone.append(map(str, e))
         return ext_clone
     
@@ -1214,7 +1455,7 @@ class ASN1Obj(object):
                 self._from_dict_set( ASN1ObjDict['val'] )
         if ASN1ObjDict['flags']:
             self._from_dict_flags( ASN1ObjDict['flags'] )
-        if ASN1ObjDict['group']:
+        if ASN1ObjDict['group'] is not None:
             self._group = int(ASN1ObjDict['group'])
         if ASN1ObjDict['syntax']:
             self._syntax = OD( map(lambda x:(str(x[0]), str(x[1])),
@@ -1399,6 +1640,7 @@ class ASN1Obj(object):
         clone._flags = self._flags
         clone._group = self._group
         clone._syntax = self._syntax
+        clone._plan = self._plan
         if clone._type in (TYPE_SEQ, TYPE_SET, TYPE_CLASS):
             clone._build_constructed_rootext()
         return clone
@@ -1406,8 +1648,136 @@ class ASN1Obj(object):
     def clone_const(self):
         clone = self.clone_light()
         clone._from_dict_const( self._to_dict_const() )
+        clone._plan = None
         return clone
 
+#------------------------------------------------------------------------------#
+# ASN.1 object codec plan
+#------------------------------------------------------------------------------#
+class _ASN1Index(dict):
+    # index of names, raising like list.index() for unknown ones
+    def __missing__(self, name):
+        raise(ValueError('%r is not in list' % (name, )))
+
+class ASN1Plan(object):
+    '''
+    Frozen codec plan of an ASN1Obj, precomputed once the ASN1Obj is compiled 
+    (see ASN1Obj.build_plan()), so that codecs get with table lookups what 
+    never changes between 2 encodings / decodings. It has the following 
+    attributes, None when not relevant for the type of the object:
+    
+    - const_int: 3-tuple (lb, ub, ext), as returned by get_const_int()
+    
+    - ra: int, range of the INTEGER value or SIZE, when lb and ub are defined
+    
+    - bits: int, number of bits for encoding a value within ra, or an index 
+        within the root of an ENUMERATED
+    
+    - names: tuple of str, names of the content of ENUMERATED, CHOICE,
+        SEQUENCE and SET objects
+    
+    - ind: dict {str (name): int (index within names)}, raising ValueError
+        for unknown names, like list.index()
+    
+    - root_num: int, number of ENUMERATED or CHOICE names in the root
+    
+    - ext_ind: dict {str (name): int (index within the extension)}, like ind
+    
+    - dict_all, dict_root, dict_ext: dict {int (index): str (name)}, set
+        as Dict of encoded indexes (see PER._ENUM_BUILD_DICT), respectively 
+        for all names, names within the root and names within the extension
+    
+    - bm_len: int, length of the bitmap of OPTIONAL / DEFAULT root components
+    
+    - opt_mask: dict {str (name): int (mask within the bitmap)}
+    
+    - ext_set: frozenset of str, names of all extended components
+    
+    - ext_bm: tuple of frozenset of str, names of extended components for 
+        each bit of the extension bitmap (a stand-alone extension, or all 
+        components of a group, the bit being set when any of them is present)
+    '''
+    __slots__ = ('const_int', 'ra', 'bits', 'names', 'ind', 'root_num', 
+                 'ext_ind', 'dict_all', 'dict_root', 'dict_ext', 'bm_len',
+                 'opt_mask', 'ext_set', 'ext_bm')
+    
+    def __init__(self, obj):
+        for attr in self.__slots__:
+            object.__setattr__(self, attr, None)
+        # constraints
+        const_int = obj._get_const_int()
+        self._set('const_int', const_int)
+        lb, ub = const_int[0:2]
+        if lb is not None and ub is not None:
+            self._set('ra', ub - lb + 1)
+            self._set('bits', len_bits(ub - lb))
+        # content
+        if obj._type in (TYPE_ENUM, TYPE_CHOICE):
+            self._init_names(obj)
+        elif obj._type in (TYPE_SEQ, TYPE_SET, TYPE_CLASS) \
+        and obj._cont is not None:
+            self._init_comps(obj)
+    
+    def _set(self, attr, val):
+        object.__setattr__(self, attr, val)
+    
+    def _init_names(self, obj):
+        names = tuple(obj._cont.keys()) if obj._cont is not None else ()
+        self._set('names', names)
+        self._set('ind', _ASN1Index([(n, i) for (i, n) in enumerate(names)]))
+        self._set('dict_all', dict(enumerate(names)))
+        if obj._ext is not None:
+            self._set('ext_ind', _ASN1Index([(n, i) for (i, n) \
+                                             in enumerate(obj._ext)]))
+            self._set('dict_ext', dict(enumerate(obj._ext)))
+            if obj._type == TYPE_ENUM:
+                root_num = len(names) - len(obj._ext)
+            else:
+                root_names = [n for n in names if n not in obj._ext]
+                root_num = len(root_names)
+        else:
+            root_num = len(names)
+        if obj._type == TYPE_ENUM or obj._ext is None:
+            root_names = names[:root_num]
+        self._set('root_num', root_num)
+        self._set('dict_root', dict(enumerate(root_names)))
+        if obj._type == TYPE_ENUM and root_num > 1:
+            self._set('bits', len_bits(root_num-1))
+    
+    def _init_comps(self, obj):
+        names = tuple(obj._cont.keys())
+        self._set('names', names)
+        self._set('ind', _ASN1Index([(n, i) for (i, n) in enumerate(names)]))
+        root_opt = getattr(obj, '_root_opt', None)
+        if root_opt is not None:
+            bm_len = len(root_opt)
+            self._set('bm_len', bm_len)
+            self._set('opt_mask', dict([(n, 1 << (bm_len-i-1)) for (i, n) \
+                                        in enumerate(root_opt)]))
+        ext_flat = getattr(obj, '_ext_flat', None)
+        if obj._ext is not None and ext_flat is not None:
+            self._set('ext_set', frozenset(ext_flat))
+            self._set('ext_bm', tuple([frozenset(flatten([name])) \
+                                       for name in obj._ext]))
+    
+    def __setattr__(self, attr, val):
+        raise(ASN1_OBJ('ASN1Plan is frozen: %s cannot be set' % attr))
+    
+    def __delattr__(self, attr):
+        raise(ASN1_OBJ('ASN1Plan is frozen: %s cannot be deleted' % attr))
+    
+    def __getstate__(self):
+        return tuple([getattr(self, attr) for attr in self.__slots__])
+    
+    def __setstate__(self, state):
+        for (attr, val) in zip(self.__slots__, state):
+            object.__setattr__(self, attr, val)
+    
+    def __repr__(self):
+        return 'ASN1Plan(%s)' % ', '.join(['%s=%r' % (attr, getattr(self, attr))
+                                           for attr in self.__slots__ \
+                                           if getattr(self, attr) is not None])
+
 # this is to encapsulate any ASN.1 CODEC
 class ASN1Codec(object):
     _name = ''
@@ -33,7 +33,7 @@ __all__ = ['PER']
 from types import NoneType
 #
 from libmich.core.element import Str, Int, Bit, Layer, show
-from libmich.core.shtr import shtr
+from libmich.core.shtr import BitReader, BitWriter
 from libmich.core.shar import shar
 from libmich.utils.IntEncoder import *
 #
@@ -42,6 +42,9 @@ from utils import *
 
 class ASN1_PER_ENCODER(ASN1_CODEC): pass
 class ASN1_PER_DECODER(ASN1_CODEC): pass
+# for fields truncated by the end of the buffer with decode_val(), 
+# which are mapped leniently by decode()
+class ASN1_PER_DECODER_BUF(ASN1_PER_DECODER): pass
 
 ################################################################################
 # For each ASN.1 object that we want to encode / decode with PER, we can have:
@@ -136,7 +139,10 @@ class _PER_L(Layer):
         # reinit to the basic representation 
         self.__init__()
         # get the Form bit
-        s_0 = ord(s[0])
+        if isinstance(s, BitReader):
+            s_0 = s.left_val(8)
+        else:
+            s_0 = ord(s[0])
         F = s_0>>7
         # short form: do not change anything
         # long form:
@@ -230,21 +236,25 @@ class _PER_NSVAL(Layer):
     def map_ret(self, s=''):
         if not s:
             return ''
+        if not isinstance(s, BitReader):
+            # the rest of the buffer is returned as a shtr
+            return self.map_ret(BitReader(s)).to_shtr()
         # reinit to the basic representation 
         self.__init__()
         # get the Form bit
-        Sig = ord(s[0])>>7
+        Sig = s.left_val(1)
         # Sig = 0, small value: do not change anything
         if Sig == 0:
             return Layer.map_ret(self, s)
         # Sig = 1, not that small value: semi-constrained INTEGER
         self.Sig < 1
         self.remove(self[-1])
-        s = shtr(s) << 1
+        s.skip(1)
         Value = ASN1.ASN1Obj(name='Value', type=TYPE_INTEGER)
         Value.const.append({'type':CONST_VAL_RANGE, 
                             'lb':0, 'ub':None, 'ext':False})
-        s = Value.decode(s)
+        # the BitReader is consumed in place
+        Value.decode(s)
         self.append(Value._msg)
         return s
     
@@ -298,6 +308,10 @@ class PER(ASN1.ASN1Codec):
     # to build dictionnary for encoded ENUMERATED, CHOICE, ...
     _ENUM_BUILD_DICT = True
     #
+    # functions generated by codegen.gen_per() for the ASN1Obj of a module:
+    # {id(obj): (obj, variant, decoder, encoder)}, set by codegen.load_per()
+    _GEN = {}
+    #
     # libmich layers' representation (only for basic types)
     _REPR_P = 'bin' # padding
     _REPR_E = 'bin' # extensibility
@@ -555,7 +569,10 @@ class PER(ASN1.ASN1Codec):
     
     def _encode_int_minbits(self, obj, val, ra):
         # encoding in the minimum bumber of bits
-        dyn_ra = len_bits(ra-1)
+        if obj._plan is not None:
+            dyn_ra = obj._plan.bits
+        else:
+            dyn_ra = len_bits(ra-1)
         obj._msg.append(Bit('C', Pt=val, BitLen=dyn_ra, Repr=self._REPR_INT))
         self._off += dyn_ra
     
@@ -566,6 +583,8 @@ class PER(ASN1.ASN1Codec):
         # obj._val: identifier (string)
         # TODO: support large number of enum (> 255) in the root
         #
+        plan = obj.get_plan()
+        #
         # 1) encode potential extensibility marker
         if obj._ext is not None:
             self._add_E(obj)
@@ -576,19 +595,16 @@ class PER(ASN1.ASN1Codec):
                 # encoding with Normally Small Value (7 bits, no padding)
                 # value is the index (starting from 0) of the identifier assigned,
                 # without using its explicit tagging
-                c = _PER_NSVAL('C', obj._ext.index(obj._val), 
+                c = _PER_NSVAL('C', plan.ext_ind[obj._val], 
                                    Repr=self._REPR_ENUM)
                 if self._ENUM_BUILD_DICT:
-                    c[-1].Dict = dict(zip(xrange(len(obj._ext)), obj._ext))
+                    c[-1].Dict = plan.dict_ext
                 self._off += c.bit_len()
                 obj._msg.append(c)
                 return
-            else:
-                # 3) if value is in the root, encode value as short uint
-                # (no padding)
-                root_num = len(obj._cont) - len(obj._ext)
-        else:
-            root_num = len(obj._cont)
+        # 3) if value is in the root, encode value as short uint
+        # (no padding)
+        root_num = plan.root_num
         #
         if root_num == 0:
             # empty ENUM, who knows...
@@ -601,12 +617,11 @@ class PER(ASN1.ASN1Codec):
             raise(ASN1_PER_ENCODER('%s: enumeration too large (%s)' \
                   % (obj.get_fullname(), root_num)))
         #
-        dyn = len_bits(root_num-1)
-        obj._msg.append(Bit('C', Pt=obj._cont.keys().index(obj._val),
-                            BitLen=dyn, Repr=self._REPR_ENUM))
+        obj._msg.append(Bit('C', Pt=plan.ind[obj._val],
+                            BitLen=plan.bits, Repr=self._REPR_ENUM))
         if self._ENUM_BUILD_DICT:
-            obj._msg[-1].Dict = dict(zip(xrange(root_num), obj._cont.keys()))
-        self._off += dyn
+            obj._msg[-1].Dict = plan.dict_root
+        self._off += plan.bits
     
     #--------------------------------------------------------------------------#
     # BIT STRING
@@ -790,14 +805,12 @@ class PER(ASN1.ASN1Codec):
         # 2) extended CHOICE
         if obj._ext is not None:
             self._add_E(obj)
-            root_names = [i for i in obj._cont if i not in obj._ext]
             # check if CHOICE to encode is an extended one
             if obj._val[0] in obj._ext:
                 obj._msg.E > 1
                 self._encode_choice_ext(obj)
                 return
-        else:
-            root_names = obj._cont.keys()
+        plan = obj.get_plan()
         #
         # 3) CHOICE in the root
         # 3.1) add choice's index
@@ -809,12 +822,11 @@ class PER(ASN1.ASN1Codec):
         elif len(obj._cont) > 1:
             ind = ASN1.ASN1Obj(name='I', type=TYPE_INTEGER)
             ind._const.append({'type':CONST_VAL_RANGE, 
-                               'lb':0, 'ub':len(root_names)-1, 'ext':False})
-            ind.set_val(obj._cont.keys().index(obj._val[0]))
+                               'lb':0, 'ub':plan.root_num-1, 'ext':False})
+            ind.set_val(plan.ind[obj._val[0]])
             ind._encode(offset=self._off)
             if self._ENUM_BUILD_DICT:
-                ind._msg.C.Dict = dict(zip(xrange(len(obj._cont)),
-                                           obj._cont.keys()))
+                ind._msg.C.Dict = plan.dict_all
             obj._msg.append(ind._msg)
             self._off += ind._msg.bit_len()
         #
@@ -836,10 +848,11 @@ class PER(ASN1.ASN1Codec):
         # a normally small value
         # value is the index (starting from 0) of the identifier assigned,
         # without using its explicit tagging
-        i = _PER_NSVAL('I', obj._ext.index(obj._val[0]), 
+        plan = obj.get_plan()
+        i = _PER_NSVAL('I', plan.ext_ind[obj._val[0]], 
                        Repr=self._REPR_ENUM)
         if self._ENUM_BUILD_DICT:
-            i[-1].Dict = dict(zip(xrange(len(obj._ext)), obj._ext))
+            i[-1].Dict = plan.dict_ext
         obj._msg.append(i)
         self._off += i.bit_len()
         #
@@ -908,16 +921,18 @@ class PER(ASN1.ASN1Codec):
         if len(obj._cont) == 0 and obj._ext is None:
             return
         #
+        plan = obj.get_plan()
+        #
         # 2) check if extended values needs to be encoded
         extended = False
         if obj._ext is not None:
             self._add_E(obj)
-            if any([name in obj._ext_flat for name in obj._val]):
+            if not plan.ext_set.isdisjoint(obj._val):
                 extended = True
                 obj._msg.E > 1
         #
         # 3) build en empty bitmap preamble for OPTIONAL / DEFAULT components
-        bm_len = len(obj._root_opt)
+        bm_len = plan.bm_len
         if bm_len:
             bm = Bit('B', Pt=0, BitLen=bm_len, Repr=self._REPR_B)
             obj._msg.append(bm)
@@ -942,11 +957,11 @@ class PER(ASN1.ASN1Codec):
                 comp._encode(offset=self._off)
                 # if the component encodes (value different to DEFAULT one)
                 # add a 1-bit flag to the bitmap value
-                if bm_len and name in obj._root_opt:
+                if bm_len and name in plan.opt_mask:
                     if hasattr(comp, '_not_encoded'):
                         del comp._not_encoded
                     else:
-                        bm_val += 1 << (bm_len - obj._root_opt.index(name) - 1)
+                        bm_val += plan.opt_mask[name]
                         obj._msg.append(comp._msg)
                         self._off += comp._msg.bit_len()
                 else:
@@ -977,19 +992,27 @@ class PER(ASN1.ASN1Codec):
                     self._wrap_open_type(obj, comp)
                     # clean up content object
                     obj._cont[name]._val = None
-                elif isinstance(name, (tuple, list)) and name[0] in obj._val:
+                elif isinstance(name, (tuple, list)) \
+                and any([n in obj._val for n in name]):
                     # group of extensions, to be encapsulated in a SEQUENCE
-                    comp = ASN1.ASN1Obj(name=repr(name), type=TYPE_SEQ)
-                    comp._cont = OD()
-                    comp._val = {}
-                    for n in name:
-                        comp._cont[n] = obj._cont[n]
-                        comp._val[n] = obj._val[n]
+                    comp = self._ext_group(obj, name)
+                    comp._val = dict([(n, obj._val[n]) for n in name \
+                                      if n in obj._val])
                     self._wrap_open_type(obj, comp)
                     # clean up content objects
                     for n in name:
                         obj._cont[n]._val = None
     
+    def _ext_group(self, obj, names):
+        # SEQUENCE encapsulating the group of extended components names of obj
+        # (used by all encoders / decoders)
+        grp = ASN1.ASN1Obj(name=repr(names), type=TYPE_SEQ)
+        grp._cont = OD()
+        for n in names:
+            grp._cont[n] = obj._cont[n]
+        grp._build_constructed_rootext()
+        return grp
+    
     def _add_bitmap_ext(self, obj):
         # 0) extended bitmap is always starting on an octet-boundary
         if self.is_aligned():
@@ -1001,17 +1024,8 @@ class PER(ASN1.ASN1Codec):
         self._off += l.bit_len()
         #
         # 2) build a bitmap for all extended fields / groups
-        group_num, bitmap = -1, []
-        for name in obj._ext_flat:
-            if name in obj._val:
-                if obj._cont[name]._group == -1 \
-                or obj._cont[name]._group > group_num: 
-                    bitmap.append(1)
-            else:
-                if obj._cont[name]._group == -1 \
-                or obj._cont[name]._group > group_num: 
-                    bitmap.append(0)
-            group_num = obj._cont[name]._group
+        bitmap = [int(not names.isdisjoint(obj._val)) \
+                  for names in obj.get_plan().ext_bm]
         if bitmap:
             assert( len(bitmap) == len(obj._ext) )
             self._add_B(obj, bitmap)
@@ -1104,10 +1118,844 @@ class PER(ASN1.ASN1Codec):
         else:
             self._wrap_open_type(obj, '')
     
+    #--------------------------------------------------------------------------#
+    # direct encoder
+    #--------------------------------------------------------------------------#
+    # encode_buf() encodes the value of an ASN1Obj straight into a BitWriter,
+    # without building the libmich structure (._msg) of each ASN1Obj:
+    # it follows the encoder above step by step, and produces the same bits
+    # (including the offset-dependent padding)
+    #
+    # values are passed along with the ASN1Obj encoding them, which are not 
+    # modified: the values are expected to have been set with set_val(),
+    # or to be passed with the `val' kwarg in the same form
+    #
+    # self._w: BitWriter being written, 
+    # self._off: offset in bits, like with the encoder above
+    # the PER variant can be passed for the call with the `variant' kwarg
+    def encode_buf(self, obj, **kwargs):
+        self._off = 0
+        if 'offset' in kwargs:
+            self._off = kwargs['offset']
+        if 'variant' in kwargs:
+            self.VARIANT = kwargs['variant']
+        self._w = BitWriter()
+        if 'val' in kwargs:
+            self._w_top(obj, kwargs['val'])
+        else:
+            self._w_top(obj, obj._val)
+        return self._w.get_buf()
+    
+    def _w_top(self, obj, val):
+        # with the function generated for obj, if loaded for this variant
+        gen = self._GEN.get(id(obj))
+        if gen is not None and gen[0] is obj and gen[1] == self.VARIANT:
+            gen[3](self, val)
+        else:
+            self._w_obj(obj, val)
+    
+    def _w_obj(self, obj, val):
+        # do not encode ASN.1 objects which are set with their DEFAULT value
+        if obj._flags is not None and FLAG_DEF in obj._flags \
+        and val == obj._flags[FLAG_DEF]:
+            return
+        #
+        type = obj._type
+        if type == TYPE_NULL:
+            return
+        elif type == TYPE_BOOL:
+            self._w_val((0,1)[val], 1)
+        elif type == TYPE_INTEGER:
+            self._w_int(val, *obj.get_const_int())
+        elif type == TYPE_ENUM:
+            self._w_enum(obj, val)
+        elif type == TYPE_BIT_STR:
+            self._w_bit_str(obj, val)
+        elif type in (TYPE_OCTET_STR, TYPE_IA5_STR, TYPE_PRINT_STR):
+            self._w_oct_str(obj, val)
+        elif type == TYPE_CHOICE:
+            self._w_choice(obj, val)
+        elif type == TYPE_SEQ:
+            self._w_seq(obj, val)
+        elif type == TYPE_SEQ_OF:
+            self._w_seq_of(obj, val)
+        elif type in (TYPE_ANY, TYPE_OPEN):
+            self._w_open_type(obj, val)
+        else:
+            raise(ASN1_PER_ENCODER('%s: unsupported ASN.1 type: %s'\
+                  % (obj.get_fullname(), type)))
+    
+    # raw value
+    def _w_val(self, val, bitlen):
+        self._w.put_val(val, bitlen)
+        self._off += bitlen
+    
+    # Bit field: value confined to its bit length
+    def _w_bits(self, val, bitlen):
+        if bitlen > 0:
+            self._w.put_val(max(0, min((1<<bitlen)-1, val)), bitlen)
+            self._off += bitlen
+    
+    # Padding
+    def _w_P(self, pad_len=None):
+        if pad_len is None:
+            pad_len = (8 - self._off%8) % 8
+        if pad_len:
+            self._w.put_val(0, pad_len)
+            self._off += pad_len
+    
+    # Length determinant (_PER_L), returns its bit length
+    def _w_L(self, count):
+        if 0 <= count <= 127:
+            self._w.put_val(count, 8)
+            return 8
+        elif 128 <= count <= 16383:
+            self._w.put_val(0x8000 + count, 16)
+            return 16
+        elif count in (16384, 32768, 49152, 65536):
+            self._w.put_val(0xc0 + (count // 16384) - 1, 8)
+            return 8
+        else:
+            raise(ASN1_PER_ENCODER('max length is for 16/32/48/64K '\
+                                   'fragments'))
+    
+    # Normally small value (_PER_NSVAL)
+    def _w_NSVAL(self, val):
+        if 0 <= val <= 63:
+            self._w_val(val, 7)
+        else:
+            l = _PER_NSVAL('L', val)
+            self._w.put_buf(str(l), l.bit_len())
+            self._off += l.bit_len()
+    
+    def _w_int(self, val, lb, ub, ext):
+        # counterpart of encode_int()
+        if lb is None:
+            extended = ext and ub is not None and val > ub
+        else:
+            extended = ext and (val < lb or (ub is not None and val > ub))
+        if ext:
+            self._w_val(int(extended), 1)
+        if extended:
+            self._w_int_unconst(val)
+            return
+        if lb is None:
+            if ub is not None and val > ub:
+                raise(ASN1_PER_ENCODER('overflowing value %i' % val))
+            self._w_int_unconst(val)
+            return
+        if ub is None:
+            self._w_int_semiconst(val-lb)
+            return
+        ra = ub - lb + 1
+        if ra == 1 and val == lb:
+            return
+        if self.is_aligned():
+            self._w_int_const_align(val-lb, ra)
+        else:
+            self._w_bits(val-lb, len_bits(ra-1))
+    
+    def _w_int_unconst(self, val):
+        if not -2**63 <= val < 2**63:
+            raise(ASN1_PER_ENCODER('unconstrained integer value %i '\
+                  'over encoder limit (64 bit)' % val))
+        if self.is_aligned():
+            self._w_P()
+        int_dyn = minenc_int(val)[0]
+        self._w_val(int_dyn, 8)
+        self._w_val(val, int_dyn*8)
+    
+    def _w_int_semiconst(self, val):
+        if not 0 <= val < 2**64:
+            raise(ASN1_PER_ENCODER('semi-constrained integer value %i '\
+                  'over encoder limit (64 bit)' % val))
+        if self.is_aligned():
+            self._w_P()
+        int_dyn = minenc_uint(val)[0]
+        self._w_val(int_dyn, 8)
+        self._w_val(val, int_dyn*8)
+    
+    def _w_int_const_align(self, val, ra):
+        if ra <= 255:
+            self._w_bits(val, len_bits(ra-1))
+        elif ra <= 65536:
+            self._w_P()
+            if ra == 256:
+                self._w_bits(val, 8)
+            else:
+                self._w_bits(val, 16)
+        else:
+            dyn_val = len_bytes(val)
+            self._w_bits(dyn_val-1, len_bits(len_bytes(ra)))
+            self._w_P()
+            self._w_bits(val, dyn_val*8)
+    
+    def _w_enum(self, obj, val):
+        # counterpart of encode_enum()
+        plan = obj.get_plan()
+        if obj._ext is not None:
+            if val in obj._ext:
+                self._w_val(1, 1)
+                self._w_NSVAL(plan.ext_ind[val])
+                return
+            self._w_val(0, 1)
+        root_num = plan.root_num
+        if root_num <= 1:
+            return
+        elif root_num >= 256:
+            raise(ASN1_PER_ENCODER('%s: enumeration too large (%s)' \
+                  % (obj.get_fullname(), root_num)))
+        self._w_bits(plan.ind[val], plan.bits)
+    
+    def _w_contained(self, obj, pad_len=None):
+        # encodes obj at offset 0 in a new BitWriter, and pads it:
+        # returns its buffer and bit length
+        w, off = self._w, self._off
+        self._w, self._off = BitWriter(), 0
+        self._w_obj(obj, obj._val)
+        self._w_P(pad_len)
+        buf, bitlen = self._w.get_buf(), self._w.bit_len()
+        self._w, self._off = w, off
+        return buf, bitlen
+    
+    def _w_bit_str(self, obj, val):
+        # counterpart of encode_bit_str(), 
+        # the content being a Bit field or a contained ASN1Obj
+        lb, ub, ext = obj.get_const_int()
+        if isinstance(val, ASN1.ASN1Obj):
+            buf, size = self._w_contained(val)
+        else:
+            buf, size = None, val[1]
+        #
+        if ext:
+            if size < lb or (ub and size > ub):
+                self._w_val(1, 1)
+                self._w_bit_str_noub(val, buf, size)
+                return
+            self._w_val(0, 1)
+        if ub is None:
+            self._w_bit_str_noub(val, buf, size)
+            return
+        if ub == 0:
+            return
+        if ub == lb and ub < 65536:
+            if lb > 16 and self.is_aligned():
+                self._w_P()
+            self._w_bit_str_cont(val, buf, size)
+            return
+        if ub >= 65536:
+            raise(ASN1_PER_ENCODER('%s: length determinant for upper bound'\
+                  '(%s) over encoder limit (64k)' % (obj.get_fullname(), ub)))
+        self._w_int(size, lb, ub, False)
+        if self.is_aligned():
+            self._w_P()
+        self._w_bit_str_cont(val, buf, size)
+    
+    def _w_bit_str_noub(self, val, buf, size):
+        if self.is_aligned():
+            self._w_P()
+        self._off += self._w_L(size)
+        self._w_bit_str_cont(val, buf, size)
+    
+    def _w_bit_str_cont(self, val, buf, size):
+        if buf is None:
+            self._w_bits(val[0], size)
+        else:
+            self._w.put_buf(buf, size)
+            self._off += size
+    
+    def _w_oct_str(self, obj, val):
+        # counterpart of encode_oct_str(),
+        # the content being a string or a contained ASN1Obj
+        lb, ub, ext = obj.get_const_int()
+        if isinstance(val, ASN1.ASN1Obj):
+            val = self._w_contained(val)[0]
+        size = len(val)
+        #
+        if ext:
+            if size < lb or (ub and size > ub):
+                self._w_val(1, 1)
+                self._w_oct_str_noub(val)
+                return
+            self._w_val(0, 1)
+        if ub is None:
+            self._w_oct_str_noub(val)
+            return
+        if ub == 0:
+            return
+        if ub == lb and ub < 65536:
+            if lb > 2 and self.is_aligned():
+                self._w_P()
+            self._w.put_buf(val)
+            self._off += size*8
+            return
+        if ub >= 65536:
+            raise(ASN1_PER_ENCODER('%s: length determinant for upper bound'\
+                  '(%s) over encoder limit (64k)' % (obj.get_fullname(), ub)))
+        self._w_int(size, lb, ub, False)
+        if size == 0:
+            return
+        if self.is_aligned():
+            self._w_P()
+        self._w.put_buf(val)
+        self._off += size*8
+    
+    def _w_oct_str_noub(self, val):
+        if self.is_aligned():
+            self._w_P()
+        self._off += self._w_L(len(val))
+        self._w.put_buf(val)
+        self._off += len(val)*8
+    
+    def _w_choice(self, obj, val):
+        # counterpart of encode_choice()
+        if len(obj._cont) == 0 and obj._ext is None:
+            return
+        plan = obj.get_plan()
+        if obj._ext is not None:
+            if val[0] in obj._ext:
+                self._w_val(1, 1)
+                # extended CHOICE index, and padding (also added by 
+                # _encode_choice_ext() in the unaligned variant)
+                self._w_NSVAL(plan.ext_ind[val[0]])
+                self._w_P()
+                self._w_wrap(obj._cont[val[0]], val[1])
+                return
+            self._w_val(0, 1)
+        if len(obj._cont) == 0:
+            return
+        elif len(obj._cont) > 1:
+            self._w_int(plan.ind[val[0]], 0, plan.root_num-1, False)
+        self._w_obj(obj._cont[val[0]], val[1])
+    
+    def _w_wrap(self, wrapped, val):
+        # counterpart of _wrap_open_type(), 
+        # wrapped being an ASN1Obj encoding val, or a string buffer
+        if isinstance(wrapped, str):
+            buf = wrapped
+        else:
+            w, off = self._w, self._off
+            self._w, self._off = BitWriter(), 0
+            self._w_top(wrapped, val)
+            # zero bit field are padded with 8 bits
+            if self._w.bit_len() == 0:
+                self._w_P(8)
+            else:
+                self._w_P()
+            buf = self._w.get_buf()
+            self._w, self._off = w, off
+        self._off += self._w_L(len(buf))
+        if self.is_aligned():
+            self._w_P()
+        self._w.put_buf(buf)
+        self._off += len(buf)*8
+    
+    def _w_seq(self, obj, val):
+        # counterpart of encode_seq()
+        if len(obj._cont) == 0 and obj._ext is None:
+            return
+        plan = obj.get_plan()
+        extended = False
+        if obj._ext is not None:
+            extended = not plan.ext_set.isdisjoint(val)
+            self._w_val(int(extended), 1)
+        #
+        # bitmap for OPTIONAL / DEFAULT components which are encoded
+        bm_len, opt_mask = plan.bm_len, plan.opt_mask
+        if val is None:
+            self._w_val(0, bm_len)
+            return
+        comps, bm_val = [], 0
+        for name in obj._root_comp:
+            if name in val:
+                comp, v = obj._cont[name], val[name]
+                comps.append( (comp, v) )
+                if bm_len and name in opt_mask \
+                and (comp._flags is None or FLAG_DEF not in comp._flags \
+                 or v != comp._flags[FLAG_DEF]):
+                    bm_val += opt_mask[name]
+        self._w_bits(bm_val, bm_len)
+        #
+        # root components
+        aligned = self.is_aligned()
+        for (comp, v) in comps:
+            if aligned and comp._type in (TYPE_OPEN, TYPE_ANY):
+                self._w_P()
+            self._w_obj(comp, v)
+        #
+        if extended:
+            self._w_seq_ext(obj, val)
+    
+    def _w_seq_ext(self, obj, val):
+        # extended bitmap and components, like within encode_seq()
+        aligned = self.is_aligned()
+        if aligned:
+            self._w_P()
+        self._w_NSVAL(len(obj._ext)-1)
+        bitmap, bitmap_len = 0, 0
+        for names in obj.get_plan().ext_bm:
+            bitmap = (bitmap << 1) + (not names.isdisjoint(val))
+            bitmap_len += 1
+        if bitmap_len:
+            assert( bitmap_len == len(obj._ext) )
+            self._w_val(bitmap, bitmap_len)
+        if aligned:
+            self._w_P()
+        # extended components, wrapped like OPEN TYPE
+        for name in obj._ext:
+            if isinstance(name, str) and name in val:
+                self._w_wrap(obj._cont[name], val[name])
+            elif isinstance(name, (tuple, list)) \
+            and any([n in val for n in name]):
+                self._w_wrap(self._ext_group(obj, name),
+                             dict([(n, val[n]) for n in name if n in val]))
+    
+    def _w_seq_of(self, obj, val):
+        # counterpart of encode_seq_of(), which goes on after encoding
+        # the semi-constrained count or the fixed count
+        lb, ub, ext = obj.get_const_int()
+        count = len(val)
+        if ext:
+            if count < lb or (ub and count > ub):
+                self._w_val(1, 1)
+                self._w_seq_of_noub(obj, val)
+                return
+            self._w_val(0, 1)
+        if ub is None:
+            self._w_seq_of_noub(obj, val)
+        if ub == lb and ub < 65536:
+            self._w_seq_of_obj(obj, val)
+        if ub >= 65536:
+            raise(ASN1_PER_ENCODER('%s: length determinant for upper bound'\
+                  '(%s) over encoder limit (64k)' % (obj.get_fullname(), ub)))
+        self._w_int(count, lb, ub, False)
+        self._w_seq_of_obj(obj, val)
+    
+    def _w_seq_of_noub(self, obj, val):
+        if self.is_aligned():
+            self._w_P()
+        # the count is not accounted in the offset, like with 
+        # _encode_seq_of_noub()
+        self._w_L(len(val))
+        self._w_seq_of_obj(obj, val)
+    
+    def _w_seq_of_obj(self, obj, val):
+        cont = obj._cont
+        for v in val:
+            self._w_obj(cont, v)
+    
+    def _w_open_type(self, obj, val):
+        # counterpart of encode_open_type()
+        if isinstance(val, tuple):
+            # see ASN1Obj._set_val_open()
+            if val[0] in GLOBAL.TYPE:
+                self._w_wrap(GLOBAL.TYPE[val[0]], val[1])
+            else:
+                self._w_wrap(obj._cont, val[1])
+        elif isinstance(val, str):
+            self._w_wrap(val, None)
+        else:
+            self._w_wrap('', None)
+    
+    #--------------------------------------------------------------------------#
+    # direct decoder
+    #--------------------------------------------------------------------------#
+    # decode_val() decodes the value of an ASN1Obj straight from a BitReader, 
+    # without building the libmich structure (._msg) of each ASN1Obj:
+    # it follows the decoder below step by step, and returns the same value 
+    # as the one set in obj._val by decode()
+    #
+    # ASN1Obj are not modified, all the decoding state being kept in the 
+    # codec instance: a new instance can be used for each call concurrently;
+    # cases which are handled by the decoder below through specific libmich 
+    # elements (non-zero padding, truncated integers, unsupported types) 
+    # raise ASN1_PER_DECODER, so that the caller can fall back to decode()
+    #
+    # self._r: BitReader being read, consumed in place, 
+    # self._off: offset in bits, like with the decoder below
+    # the PER variant can be passed for the call with the `variant' kwarg
+    def decode_val(self, obj, buf, **kwargs):
+        if not isinstance(buf, BitReader):
+            buf = BitReader(buf)
+        self._off = 0
+        if 'offset' in kwargs:
+            self._off = kwargs['offset']
+        if 'variant' in kwargs:
+            self.VARIANT = kwargs['variant']
+        self._r = buf
+        return self._r_top(obj)
+    
+    def _r_top(self, obj):
+        # with the function generated for obj, if loaded for this variant
+        gen = self._GEN.get(id(obj))
+        if gen is not None and gen[0] is obj and gen[1] == self.VARIANT:
+            return gen[2](self)
+        return self._r_obj(obj)
+    
+    def _r_obj(self, obj):
+        type = obj._type
+        if type == TYPE_NULL:
+            return None
+        elif type == TYPE_BOOL:
+            return (False, True)[self._r_val(1)]
+        elif type == TYPE_INTEGER:
+            return self._r_int(*obj.get_const_int())
+        elif type == TYPE_ENUM:
+            return self._r_enum(obj)
+        elif type == TYPE_BIT_STR:
+            return self._r_bit_str(obj)
+        elif type in (TYPE_OCTET_STR, TYPE_IA5_STR, TYPE_PRINT_STR):
+            return self._r_oct_str(obj)
+        elif type == TYPE_CHOICE:
+            return self._r_choice(obj)
+        elif type == TYPE_SEQ:
+            return self._r_seq(obj)
+        elif type == TYPE_SEQ_OF:
+            return self._r_seq_of(obj)
+        elif type in (TYPE_ANY, TYPE_OPEN):
+            # like decode_open_type(), which does not set any value
+            self._r_wrap(None)
+            return None
+        else:
+            raise(ASN1_PER_DECODER('%s: unsupported ASN.1 type'\
+                  % obj.get_fullname()))
+    
+    # raw value
+    def _r_val(self, bitlen):
+        self._off += bitlen
+        return self._r.get_val(bitlen)
+    
+    # raw string buffer (Str), always the last field of the object decoded:
+    # like with the decoder below, the object's length is the length of the
+    # buffer actually read, when truncated by the end of the buffer
+    def _r_str(self, size):
+        buf = self._r.left_buf(size*8)
+        self._r.skip(len(buf)*8)
+        self._off += len(buf)*8
+        return buf
+    
+    # Padding
+    def _r_P(self, pad_len=None):
+        if pad_len is None:
+            pad_len = (8 - self._off%8) % 8
+        if pad_len and self._r_val(pad_len):
+            raise(ASN1_PER_DECODER('non-zero padding'))
+    
+    # Length determinant (_PER_L), 
+    # which is left to the decoder below at the end of the buffer
+    def _r_L(self):
+        form = self._r.left_val(8)
+        if self._r.bit_len() < (8, 16)[0x80 <= form < 0xc0]:
+            raise(ASN1_PER_DECODER_BUF('length determinant out of buffer'))
+        if form < 0x80:
+            self._r.skip(8)
+            self._off += 8
+            return form
+        elif form < 0xc0:
+            return self._r_val(16) & 0x3fff
+        else:
+            self._r.skip(8)
+            self._off += 8
+            return (form & 0x3f) * 16384
+    
+    # Normally small value (_PER_NSVAL), which is left to the decoder below 
+    # when truncated by the end of the buffer
+    def _r_NSVAL(self):
+        if 0 < self._r.bit_len() < 7:
+            raise(ASN1_PER_DECODER_BUF('normally small value out of '\
+                                       'buffer'))
+        if not self._r.left_val(1):
+            return self._r_val(7)
+        # value over 63: semi-constrained INTEGER, decoded at offset 0
+        self._r_val(1)
+        off = self._off
+        self._off = 0
+        val = self._r_int_unconst(False)
+        self._off += off
+        return val
+    
+    def _r_int(self, lb, ub, ext):
+        # counterpart of decode_int()
+        if ext and self._r_val(1):
+            return self._r_int_unconst(True)
+        if lb is None:
+            return self._r_int_unconst(True)
+        if ub is None:
+            return self._r_int_unconst(False) + lb
+        ra = ub - lb + 1
+        if ra == 1:
+            return lb
+        if ra > 255 and self.is_aligned():
+            return self._r_int_const_align(ra) + lb
+        return self._r_val(len_bits(ra-1)) + lb
+    
+    def _r_int_unconst(self, signed):
+        # counterpart of _decode_int_unconst() and _decode_int_semiconst()
+        if self.is_aligned():
+            self._r_P()
+        size = self._r_L()
+        if not 0 < size <= 8:
+            raise(ASN1_PER_DECODER('integer value length (%i) over decoder '\
+                  'limit (64 bit)' % size))
+        elif size > len(self._r):
+            raise(ASN1_PER_DECODER_BUF('integer value out of buffer'))
+        val = self._r_val(8*size)
+        if signed and val >> (8*size-1):
+            return val - (1 << (8*size))
+        return val
+    
+    def _r_int_const_align(self, ra):
+        if ra <= 65536:
+            self._r_P()
+            if ra == 256:
+                return self._r_val(8)
+            return self._r_val(16)
+        size = self._r_val(len_bits(len_bytes(ra))) + 1
+        self._r_P()
+        return self._r_val(size*8)
+    
+    def _r_enum(self, obj):
+        # counterpart of decode_enum(), 
+        # unknown values (which are not set by decode_enum()) returning None
+        if obj._ext is not None:
+            if self._r_val(1):
+                ind = self._r_NSVAL()
+                if ind < len(obj._ext):
+                    return obj._ext[ind]
+                return None
+        plan = obj.get_plan()
+        root_num = plan.root_num
+        if root_num == 0:
+            return None
+        elif root_num == 1:
+            return plan.names[0]
+        elif root_num >= 256:
+            raise(ASN1_PER_DECODER('%s: enumeration too large (%s)' \
+                  % (obj.get_fullname(), len(obj._cont))))
+        ind = self._r_val(plan.bits)
+        if ind >= root_num:
+            raise(ASN1_PER_DECODER('%s: invalid enumerated index (%s)'\
+                  % (obj.get_fullname(), ind)))
+        return plan.names[ind]
+    
+    def _r_bit_str(self, obj):
+        # counterpart of decode_bit_str()
+        lb, ub, ext = obj.get_const_int()
+        if (ext and self._r_val(1)) or ub is None:
+            if self.is_aligned():
+                self._r_P()
+            size = self._r_L()
+            return (self._r_val(size), size)
+        if lb == ub and ub < 65536:
+            if lb > 16 and self.is_aligned():
+                self._r_P()
+            return (self._r_val(lb), lb)
+        if ub >= 65536:
+            raise(ASN1_PER_DECODER('%s: length determinant for upper bound'\
+                  '(%s) over decoder limit (64k)' % (obj.get_fullname(), ub)))
+        size = self._r_int(lb, ub, False)
+        if self.is_aligned():
+            self._r_P()
+        return (self._r_val(size), size)
+    
+    def _r_oct_str(self, obj):
+        # counterpart of decode_oct_str()
+        lb, ub, ext = obj.get_const_int()
+        if (ext and self._r_val(1)) or ub is None:
+            if self.is_aligned():
+                self._r_P()
+            return self._r_str(self._r_L())
+        if lb == ub and ub <= 65536:
+            if lb > 2 and self.is_aligned():
+                self._r_P()
+            return self._r_str(lb)
+        if ub >= 65536:
+            raise(ASN1_PER_DECODER('%s: length determinant for upper bound'\
+                  '(%s) over decoder limit (64k)' % (obj.get_fullname(), ub)))
+        size = self._r_int(lb, ub, False)
+        if size == 0:
+            return ''
+        if self.is_aligned():
+            self._r_P()
+        return self._r_str(size)
+    
+    def _r_choice(self, obj):
+        # counterpart of decode_choice()
+        if len(obj._cont) == 0 and obj._ext is None:
+            return None
+        if obj._ext is not None:
+            if self._r_val(1):
+                # extended CHOICE index, and padding (also got by 
+                # _decode_choice_ext() in the unaligned variant)
+                ind = self._r_NSVAL()
+                self._r_P()
+                if ind >= len(obj._ext):
+                    return ('_ext_%i' % ind, self._r_wrap(None))
+                return (obj._ext[ind], self._r_wrap(obj._cont[obj._ext[ind]]))
+        if len(obj._cont) == 0:
+            return None
+        plan = obj.get_plan()
+        if len(obj._cont) == 1:
+            name = plan.names[0]
+        else:
+            root_num = plan.root_num
+            ind = self._r_int(0, root_num-1, False)
+            if ind >= root_num:
+                raise(ASN1_PER_DECODER('%s: invalid choice index (%s)'\
+                      % (obj.get_fullname(), ind)))
+            name = plan.names[ind]
+        return (name, self._r_obj(obj._cont[name]))
+    
+    def _r_wrap(self, wrapped):
+        # counterpart of _unwrap_open_type(), 
+        # wrapped being an ASN1Obj, or None to return the string buffer
+        size = self._r_L()
+        if self.is_aligned():
+            self._r_P()
+        if wrapped is None:
+            return self._r_str(size)
+        off = self._off
+        self._off = 0
+        val = self._r_obj(wrapped)
+        # zero bit field are padded with 8 bits
+        if self._off == 0:
+            self._r_P(8)
+        else:
+            self._r_P()
+        if self._SAFE and self._off != size*8:
+            raise(ASN1_PER_DECODER('%s: invalid wrapped length (%i)'\
+                  % (wrapped.get_fullname(), size)))
+        self._off = off + size*8
+        return val
+    
+    def _r_seq(self, obj):
+        # counterpart of decode_seq()
+        if len(obj._cont) == 0 and obj._ext is None:
+            return None
+        extended = obj._ext is not None and self._r_val(1)
+        opt_names = []
+        if obj._root_opt:
+            plan = obj.get_plan()
+            bm = self._r_val(plan.bm_len)
+            opt_names = [name for name in obj._root_opt \
+                         if bm & plan.opt_mask[name]]
+        #
+        val = dict()
+        for name in obj._root_comp:
+            comp = obj._cont[name]
+            if comp._flags is None or name in opt_names:
+                if comp._type in (TYPE_OPEN, TYPE_ANY):
+                    if self.is_aligned():
+                        self._r_P()
+                    val[name] = self._r_seq_open(obj, comp, val)
+                else:
+                    val[name] = self._r_obj(comp)
+            elif FLAG_DEF in comp._flags:
+                val[name] = comp._flags[FLAG_DEF]
+        #
+        if extended:
+            val = self._r_seq_ext(obj, val)
+        if not val:
+            return None
+        return val
+    
+    def _r_seq_open(self, obj, comp, val):
+        # OPEN TYPE component decoded at offset 0 within decode_seq(), 
+        # and further with its CONST_SET_REF constraint (_decode_open_ref())
+        off = self._off
+        self._off = 0
+        size = self._r_L()
+        if self.is_aligned():
+            self._r_P()
+        l_len = self._off
+        buf = self._r_str(size)
+        self._off = off + l_len + len(buf)*8
+        #
+        const = comp.get_const_ref()
+        if not const:
+            return None
+        if not const['at']:
+            raise(ASN1_OBJ('%s: invalid SET_REF constraint'\
+                  % obj.get_fullname()))
+        if const['at'] not in val:
+            return None
+        try:
+            obj_ref = const['ref'](const['at'], val[const['at']])
+        except:
+            return None
+        comp_typename = comp.get_typename()
+        if comp_typename not in obj_ref:
+            raise(ASN1_OBJ('%s: not able to retrieve %s within '\
+                  'object info set' % (obj.get_fullname(), comp_typename)))
+        comp_ref = obj_ref[comp_typename]
+        #
+        r, off = self._r, self._off
+        self._r, self._off = BitReader(buf), 0
+        try:
+            ref_val = self._r_top(comp_ref)
+            self._r_P()
+            ref_len = self._off
+        except ASN1_PER_DECODER_BUF:
+            # left to the decoder below
+            raise
+        except:
+            # invalid value against the referred type
+            return None
+        finally:
+            self._r, self._off = r, off
+        if self._SAFE and ref_len != len(buf)*8:
+            raise(ASN1_PER_DECODER('%s: invalid OPEN TYPE length (%i)'\
+                  % (comp.get_fullname(), size)))
+        self._off = off - len(buf)*8 + ref_len
+        return (comp_ref._name, ref_val)
+    
+    def _r_seq_ext(self, obj, val):
+        # counterpart of _decode_seq_ext()
+        bm_len = 1 + self._r_NSVAL()
+        bm = self._r_val(bm_len)
+        if self.is_aligned():
+            self._r_P()
+        for i in xrange(bm_len):
+            if not bm & (1 << (bm_len-i-1)):
+                continue
+            if i < len(obj._ext):
+                comp = obj._ext[i]
+                if isinstance(comp, str):
+                    val[comp] = self._r_wrap(obj._cont[comp])
+                elif isinstance(comp, (list, tuple)):
+                    grp_val = self._r_wrap(self._ext_group(obj, comp))
+                    if grp_val:
+                        val.update(grp_val)
+            else:
+                # hack for supporting unknown extension
+                val = ('_ext_%i' % i, self._r_wrap(None))
+        return val
+    
+    def _r_seq_of(self, obj):
+        # counterpart of decode_seq_of()
+        lb, ub, ext = obj.get_const_int()
+        if (ext and self._r_val(1)) or ub is None:
+            if self.is_aligned():
+                self._r_P()
+            count = self._r_L()
+        elif lb == ub:
+            count = lb
+        elif ub >= 65536:
+            raise(ASN1_PER_DECODER('%s: length determinant for upper bound'\
+                  '(%s) over decoder limit (64k)' % (obj.get_fullname(), ub)))
+        else:
+            count = self._r_int(lb, ub, False)
+        cont = obj._cont
+        return [self._r_obj(cont) for i in xrange(count)]
+    
     #--------------------------------------------------------------------------#
     # decoder
     #--------------------------------------------------------------------------#
     def decode(self, obj, buf, **kwargs):
+        # the buffer is decoded through a BitReader, which is shared with 
+        # all the recursive decoders and consumed in place
+        if not isinstance(buf, BitReader):
+            buf = BitReader(buf)
         # propagate bit offset for recursive decoding
         self._off = 0
         if 'offset' in kwargs:
@@ -1331,7 +2179,10 @@ class PER(ASN1.ASN1Codec):
     
     def _decode_int_minbits(self, obj, buf, lb, ra):
         # decoding in the minimum number of bits
-        dyn_ra = len_bits(ra-1)
+        if obj._plan is not None:
+            dyn_ra = obj._plan.bits
+        else:
+            dyn_ra = len_bits(ra-1)
         c = Bit('C', BitLen=dyn_ra, Repr=self._REPR_INT)
         buf = c.map_ret(buf)
         obj._msg.append( c )
@@ -1345,6 +2196,8 @@ class PER(ASN1.ASN1Codec):
     #--------------------------------------------------------------------------#
     def decode_enum(self, obj, buf):
         # obj._val: identifier (string)
+        plan = obj.get_plan()
+        #
         # 1) decode potential extensibility marker
         if obj._ext is not None:
             buf = self._get_E(obj, buf)
@@ -1353,7 +2206,7 @@ class PER(ASN1.ASN1Codec):
                 c = _PER_NSVAL('C', Repr=self._REPR_ENUM)
                 buf = c.map_ret(buf)
                 if self._ENUM_BUILD_DICT:
-                    c[-1].Dict = dict(zip(xrange(len(obj._ext)), obj._ext))
+                    c[-1].Dict = plan.dict_ext
                 obj._msg.append(c)
                 self._off += c.bit_len()
                 #
@@ -1365,37 +2218,33 @@ class PER(ASN1.ASN1Codec):
                 # WNG: this is silently handled here, 
                 # as no concrete value is set for within obj._val
                 return buf
-            else:
-                # 3) value is in the root
-                root_num = len(obj._cont) - len(obj._ext)
-        else:
-            root_num = len(obj._cont)
+        # 3) value is in the root
+        root_num = plan.root_num
         #
         if root_num == 0:
             # empty ENUM, who knows...
             return buf
         elif root_num == 1:
             # no arms, no chocolate...
-            obj._val = obj._cont.keys()[0]
+            obj._val = plan.names[0]
             return buf
         elif root_num >= 256:
             # TODO: support larger enumeration
             raise(ASN1_PER_DECODER('%s: enumeration too large (%s)' \
                   % (obj.get_fullname(), len(obj._cont))))
         #
-        dyn = len_bits(root_num-1)
-        c = Bit('C', BitLen=dyn, Repr=self._REPR_ENUM)
+        c = Bit('C', BitLen=plan.bits, Repr=self._REPR_ENUM)
         buf = c.map_ret(buf)
         if self._ENUM_BUILD_DICT:
-            c.Dict = dict(zip(xrange(root_num), obj._cont.keys()))
+            c.Dict = plan.dict_root
         obj._msg.append(c)
-        self._off += dyn
+        self._off += plan.bits
         #
         ind = c()
         if ind >= root_num:
             raise(ASN1_PER_DECODER('%s: invalid enumerated index (%s)'\
                   % (obj.get_fullname(), ind)))
-        obj._val = obj._cont.keys()[ind]
+        obj._val = plan.names[ind]
         return buf
     
     #--------------------------------------------------------------------------#
@@ -1574,12 +2423,10 @@ class PER(ASN1.ASN1Codec):
         # 2) decode potential extensibility marker
         if obj._ext is not None:
             buf = self._get_E(obj, buf)
-            root_names = [i for i in obj._cont if i not in obj._ext]
             # check if extended
             if obj._msg.E():
                 return self._decode_choice_ext(obj, buf)
-        else:
-            root_names = obj._cont.keys()
+        plan = obj.get_plan()
         #
         # for CHOICE in the root
         # 3) get choice's name
@@ -1588,24 +2435,23 @@ class PER(ASN1.ASN1Codec):
             return buf
         elif len(obj._cont) == 1:
             # single choice possible, no encoding of choice index
-            cho_name = obj._cont.keys()[0]
+            cho_name = plan.names[0]
             cho = obj._cont[cho_name]
         else:
             # multiple choices possible: use INTEGER for decoding choice index
             ind = ASN1.ASN1Obj(name='I', type=TYPE_INTEGER)
             ind._const.append({'type':CONST_VAL_RANGE,
-                               'lb':0, 'ub':len(root_names)-1, 'ext':False})
+                               'lb':0, 'ub':plan.root_num-1, 'ext':False})
             buf = ind._decode(buf, offset=self._off)
             ind_val = ind._val
             if self._ENUM_BUILD_DICT:
-                ind._msg.C.Dict = dict(zip(xrange(len(root_names)), 
-                                           root_names))
+                ind._msg.C.Dict = plan.dict_root
             obj._msg.append(ind._msg)
             self._off += ind._msg.bit_len()
-            if ind._val >= len(root_names):
+            if ind._val >= plan.root_num:
                 raise(ASN1_PER_DECODER('%s: invalid choice index (%s)'\
                       % (obj.get_fullname(), ind._val)))
-            cho_name = obj._cont.keys()[ind._val]
+            cho_name = plan.names[ind._val]
             cho = obj._cont[cho_name]
         #
         # 3bis) get potential padding
@@ -1628,7 +2474,7 @@ class PER(ASN1.ASN1Codec):
         ind = _PER_NSVAL('I', Repr=self._REPR_ENUM)
         buf = ind.map_ret(buf)
         if self._ENUM_BUILD_DICT:
-            ind[-1].Dict = dict(zip(xrange(len(obj._ext)), obj._ext))
+            ind[-1].Dict = obj.get_plan().dict_ext
         obj._msg.append(ind)
         self._off += ind.bit_len()
         ind_val = ind()
@@ -1701,7 +2547,7 @@ class PER(ASN1.ASN1Codec):
         # obj._val: dict {str (name): single_value (type-dependent)}
         # 1) for empty SEQUENCE
         if len(obj._cont) == 0 and obj._ext is None:
-            return
+            return buf
         #
         # 2) decode potential extensibility marker
         extended = False
@@ -1716,7 +2562,7 @@ class PER(ASN1.ASN1Codec):
         # there is no assumption about the canonicity or even correctness
         # of the encoder for DEFAULT values handling
         if obj._root_opt:
-            buf = self._get_B(obj, buf, bitmap_len=len(obj._root_opt))
+            buf = self._get_B(obj, buf, bitmap_len=obj.get_plan().bm_len)
             # keep only component that are identified by the bitmap
             opt_names = filter(lambda x:x!=None, 
                                map(lambda x,y:x if y=='1' else None,
@@ -1848,18 +2694,13 @@ class PER(ASN1.ASN1Codec):
                         comp_obj._val = None
                     elif isinstance(comp, (list, tuple)):
                         # grouped fields
-                        comp_obj = ASN1.ASN1Obj(name=repr(comp), type=TYPE_SEQ)
-                        comp_obj._cont = OD()
-                        for name in comp:
-                            comp_obj._cont[name] = obj._cont[name]
-                            if obj._cont[name]._type in (TYPE_OPEN, TYPE_ANY):
-                                # TODO: decode further OPEN TYPE with CONST_SET_REF
-                                pass
+                        # TODO: decode further OPEN TYPE with CONST_SET_REF
+                        comp_obj = self._ext_group(obj, comp)
                         buf = self._unwrap_open_type(obj, buf, comp_obj)
-                        # assign values and clean up content objects
-                        for name in comp:
-                            obj._val[name] = obj._cont[name]._val
-                            obj._cont[name]._val = None
+                        # assign values and clean up the group object
+                        if comp_obj._val:
+                            obj._val.update(comp_obj._val)
+                        comp_obj._val = None
                 else:
                     # 5) unknown extended field
                     buf = self._unwrap_open_type(obj, buf, None)
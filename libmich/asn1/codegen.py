@@ -0,0 +1,867 @@
+# -*- coding: UTF-8 -*-
+
+# PER codec generator:
+# gen_per() generates the source of a Python module with a decoding and an
+# encoding function for each ASN.1 type of a compiled module, for a given PER
+# variant; they follow the direct decoder / encoder of PER (decode_val() and
+# encode_buf()) step by step, with the types' constraints, bitmap lengths,
+# components' order and names resolved at generation time
+#
+# the generated module is written by processor.compile() next to the pickled
+# module in MODULES_DIR, as <module>_per.py, with the fingerprint of the
+# pickled file it was generated from (both are build outputs, which are not
+# distributed), and is loaded with
+# processor.load_module(<module>, per_codec=True) (or load_codec(<module>)):
+# its functions are then used by PER.decode_val() and PER.encode_buf()
+# for the ASN1Obj in GLOBAL.TYPE, when the codec's VARIANT is the one
+# they were generated for
+#
+# identical functions (e.g. for the same type referenced by several
+# components) are only generated once; the parts which are not generated
+# (e.g. OPEN TYPE with CONST_SET_REF constraint, extension groups,
+# unsupported types) are left to the PER codec methods, with references to
+# the ASN1Obj they need (O), which are resolved at loading time from the
+# components' path within GLOBAL.TYPE
+
+import os
+import re
+import imp
+from types import NoneType
+#
+import ASN1
+from utils import *
+from PER import PER
+
+# helpers included in each generated module,
+# counterparts of PER methods taking functions instead of ASN1Obj
+_HELPERS = '''
+def _r_wrap(c, dec):
+    # PER._r_wrap()
+    size = c._r_L()
+    if ALIGNED:
+        c._r_P()
+    off = c._off
+    c._off = 0
+    val = dec(c)
+    if c._off == 0:
+        c._r_P(8)
+    else:
+        c._r_P()
+    if c._SAFE and c._off != size*8:
+        raise(ASN1_PER_DECODER('invalid wrapped length (%i)' % size))
+    c._off = off + size*8
+    return val
+
+def _r_choice_ext(c, ext, dec):
+    # extended alternative of PER._r_choice()
+    ind = c._r_NSVAL()
+    c._r_P()
+    if ind >= len(ext):
+        return ('_ext_%i' % ind, c._r_wrap(None))
+    return (ext[ind], _r_wrap(c, dec[ind]))
+
+def _r_seq_ext(c, val, ext):
+    # PER._r_seq_ext() without extension group,
+    # ext being the list of (name, decoder)
+    bm_len = 1 + c._r_NSVAL()
+    bm = c._r_val(bm_len)
+    if ALIGNED:
+        c._r_P()
+    for i in xrange(bm_len):
+        if not bm & (1 << (bm_len-i-1)):
+            continue
+        if i < len(ext):
+            val[ext[i][0]] = _r_wrap(c, ext[i][1])
+        else:
+            val = ('_ext_%i' % i, c._r_wrap(None))
+    return val
+
+def _w_wrap(c, enc, val):
+    # PER._w_wrap()
+    w, off = c._w, c._off
+    c._w, c._off = BitWriter(), 0
+    enc(c, val)
+    if c._w.bit_len() == 0:
+        c._w_P(8)
+    else:
+        c._w_P()
+    buf = c._w.get_buf()
+    c._w, c._off = w, off
+    c._off += c._w_L(len(buf))
+    if ALIGNED:
+        c._w_P()
+    w.put_buf(buf)
+    c._off += len(buf)*8
+
+def _w_seq_ext(c, val, ext):
+    # PER._w_seq_ext() without extension group,
+    # ext being the list of (name, encoder)
+    if ALIGNED:
+        c._w_P()
+    c._w_NSVAL(len(ext)-1)
+    bm = 0
+    for (name, enc) in ext:
+        bm = (bm << 1) + (name in val)
+    c._w_val(bm, len(ext))
+    if ALIGNED:
+        c._w_P()
+    for (name, enc) in ext:
+        if name in val:
+            _w_wrap(c, enc, val[name])
+
+def _w_bit_str(c, val, lb, ub, ext):
+    # PER._w_bit_str()
+    if isinstance(val, ASN1Obj):
+        buf, size = c._w_contained(val)
+    else:
+        buf, size = None, val[1]
+    if ext:
+        if size < lb or (ub and size > ub):
+            c._w_val(1, 1)
+            c._w_bit_str_noub(val, buf, size)
+            return
+        c._w_val(0, 1)
+    if ub is None:
+        c._w_bit_str_noub(val, buf, size)
+        return
+    if ub == 0:
+        return
+    if ub == lb and ub < 65536:
+        if lb > 16 and ALIGNED:
+            c._w_P()
+        c._w_bit_str_cont(val, buf, size)
+        return
+    if ub >= 65536:
+        raise(ASN1_PER_ENCODER('length determinant for upper bound (%s) '\\
+              'over encoder limit (64k)' % ub))
+    c._w_int(size, lb, ub, False)
+    if ALIGNED:
+        c._w_P()
+    c._w_bit_str_cont(val, buf, size)
+
+def _w_oct_str(c, val, lb, ub, ext):
+    # PER._w_oct_str()
+    if isinstance(val, ASN1Obj):
+        val = c._w_contained(val)[0]
+    size = len(val)
+    if ext:
+        if size < lb or (ub and size > ub):
+            c._w_val(1, 1)
+            c._w_oct_str_noub(val)
+            return
+        c._w_val(0, 1)
+    if ub is None:
+        c._w_oct_str_noub(val)
+        return
+    if ub == 0:
+        return
+    if ub == lb and ub < 65536:
+        if lb > 2 and ALIGNED:
+            c._w_P()
+        c._w.put_buf(val)
+        c._off += size*8
+        return
+    if ub >= 65536:
+        raise(ASN1_PER_ENCODER('length determinant for upper bound (%s) '\\
+              'over encoder limit (64k)' % ub))
+    c._w_int(size, lb, ub, False)
+    if size == 0:
+        return
+    if ALIGNED:
+        c._w_P()
+    c._w.put_buf(val)
+    c._off += size*8
+'''
+
+# local reader / writer used in a generated function
+_RE_R = re.compile(r'\br\.')
+_RE_W = re.compile(r'\bw\.')
+
+_STR_TYPES = (TYPE_OCTET_STR, TYPE_IA5_STR, TYPE_PRINT_STR)
+_GEN_TYPES = (TYPE_NULL, TYPE_BOOL, TYPE_INTEGER, TYPE_ENUM, TYPE_BIT_STR,
+              TYPE_CHOICE, TYPE_SEQ, TYPE_SEQ_OF, TYPE_OPEN, TYPE_ANY) \
+              + _STR_TYPES
+
+def _is_lit(val):
+    # True if val can be written as a Python literal in the generated source
+    if isinstance(val, (NoneType, bool, int, long, float, str, unicode)):
+        return True
+    elif isinstance(val, tuple):
+        return all([_is_lit(v) for v in val])
+    return False
+
+class _PERGen(object):
+    # generator state for a single module
+    
+    def __init__(self, variant):
+        self.aligned = variant[:1] == 'A'
+        # generated functions' name, per ASN1Obj id, and per source body
+        self.dec, self.enc = {}, {}
+        self.bodies = {}
+        self.funcs = []
+        self.aliases = []
+        # constants (tuples of names) and tables (of functions)
+        self.consts, self.const_lines = {}, []
+        self.tables, self.table_lines = {}, []
+        # referenced ASN1Obj, with their path from GLOBAL.TYPE
+        self.paths = {}
+        self.refs, self.ref_paths = {}, []
+        self.cnt = 0
+    
+    def set_paths(self, obj, path):
+        # records the first path found to each ASN1Obj from the root types
+        if id(obj) in self.paths:
+            return
+        self.paths[id(obj)] = path
+        if obj._type in (TYPE_SEQ_OF, TYPE_SET_OF):
+            if isinstance(obj._cont, ASN1.ASN1Obj):
+                self.set_paths(obj._cont, path + (None, ))
+        elif obj._type in TYPE_CONSTRUCTED and obj._cont is not None:
+            for name in obj._cont:
+                if isinstance(obj._cont[name], ASN1.ASN1Obj):
+                    self.set_paths(obj._cont[name], path + (name, ))
+    
+    def ref(self, obj):
+        # reference to obj in the generated module
+        if id(obj) not in self.refs:
+            self.refs[id(obj)] = len(self.ref_paths)
+            self.ref_paths.append( self.paths[id(obj)] )
+        return 'O[%i]' % self.refs[id(obj)]
+    
+    def const(self, val, wrap=''):
+        # module constant for the tuple val, possibly wrapped (e.g. frozenset)
+        src = repr(tuple(val))
+        if wrap:
+            src = '%s(%s)' % (wrap, src)
+        if src not in self.consts:
+            self.consts[src] = 'K_%i' % len(self.consts)
+            self.const_lines.append('%s = %s' % (self.consts[src], src))
+        return self.consts[src]
+    
+    def table(self, items, names=None):
+        # module table of functions, defined after them,
+        # or dict of functions when names are given
+        if names is None:
+            src = '(%s)' % ''.join(['%s, ' % i for i in items])
+        else:
+            src = '{%s}' % ', '.join(['%r: %s' % (n, i) \
+                                      for (n, i) in zip(names, items)])
+        if src not in self.tables:
+            self.tables[src] = 'T_%i' % len(self.tables)
+            self.table_lines.append('%s = %s' % (self.tables[src], src))
+        return self.tables[src]
+    
+    def default(self, obj):
+        # DEFAULT value of the component obj
+        val = obj._flags[FLAG_DEF]
+        if _is_lit(val):
+            return repr(val)
+        return '%s._flags[%r]' % (self.ref(obj), FLAG_DEF)
+    
+    def func(self, obj, pre):
+        # name of the decoding ('d') or encoding ('e') function of obj
+        names = (self.dec, self.enc)[pre == 'e']
+        if id(obj) in names:
+            return names[id(obj)]
+        self.cnt += 1
+        name = '%s_%i' % (pre, self.cnt)
+        names[id(obj)] = name
+        if pre == 'd':
+            L = self.dec_func(obj)
+            args = 'c'
+        else:
+            L = self.enc_func(obj)
+            args = 'c, x'
+        body = '\n'.join(L)
+        if _RE_R.search(body):
+            body = '    r = c._r\n' + body
+        if _RE_W.search(body):
+            body = '    w = c._w\n' + body
+        if (pre, body) in self.bodies:
+            # identical function already generated
+            self.aliases.append('%s = %s' % (name, self.bodies[(pre, body)]))
+            names[id(obj)] = self.bodies[(pre, body)]
+            return names[id(obj)]
+        self.bodies[(pre, body)] = name
+        self.funcs.append('def %s(%s):\n%s\n' % (name, args, body))
+        return name
+    
+    #--------------------------------------------------------------------------#
+    # decoder
+    #--------------------------------------------------------------------------#
+    def dec_func(self, obj):
+        L, t = [], [0]
+        ind = ' '*4
+        if obj._type == TYPE_CHOICE:
+            self.dec_choice(obj, L, ind, t)
+        elif obj._type == TYPE_SEQ:
+            self.dec_seq(obj, L, ind, t)
+        elif obj._type == TYPE_SEQ_OF:
+            self.dec_seq_of(obj, L, ind, t)
+        else:
+            self.dec_obj(obj, 'v', L, ind, t)
+            L.append(ind + 'return v')
+        return L
+    
+    def tmp(self, t, pre):
+        t[0] += 1
+        return '%s%i' % (pre, t[0])
+    
+    def dec_obj(self, obj, tgt, L, ind, t):
+        # decodes obj into the tgt variable
+        type = obj._type
+        if type == TYPE_NULL:
+            L.append(ind + '%s = None' % tgt)
+        elif type == TYPE_BOOL:
+            L.append(ind + 'c._off += 1')
+            L.append(ind + '%s = (False, True)[r.get_val(1)]' % tgt)
+        elif type == TYPE_INTEGER:
+            self.dec_int(tgt, obj.get_const_int(), L, ind)
+        elif type == TYPE_ENUM:
+            self.dec_enum(obj, tgt, L, ind, t)
+        elif type == TYPE_BIT_STR:
+            self.dec_bit_str(obj, tgt, L, ind, t)
+        elif type in _STR_TYPES:
+            self.dec_oct_str(obj, tgt, L, ind, t)
+        elif type in (TYPE_CHOICE, TYPE_SEQ, TYPE_SEQ_OF):
+            L.append(ind + '%s = %s(c)' % (tgt, self.func(obj, 'd')))
+        elif type in (TYPE_OPEN, TYPE_ANY):
+            L.append(ind + 'c._r_wrap(None)')
+            L.append(ind + '%s = None' % tgt)
+        else:
+            L.append(ind + '%s = c._r_obj(%s)' % (tgt, self.ref(obj)))
+    
+    def dec_int(self, tgt, (lb, ub, ext), L, ind):
+        # PER._r_int()
+        if ext or lb is None or ub is None:
+            L.append(ind + '%s = c._r_int(%r, %r, %r)' % (tgt, lb, ub, ext))
+            return
+        ra = ub - lb + 1
+        add = (' + %r' % lb, '')[lb == 0]
+        if ra == 1:
+            L.append(ind + '%s = %r' % (tgt, lb))
+        elif ra > 255 and self.aligned:
+            L.append(ind + '%s = c._r_int_const_align(%r)%s' % (tgt, ra, add))
+        else:
+            bitlen = len_bits(ra-1)
+            L.append(ind + 'c._off += %i' % bitlen)
+            L.append(ind + '%s = r.get_val(%i)%s' % (tgt, bitlen, add))
+    
+    def dec_enum(self, obj, tgt, L, ind, t):
+        # PER._r_enum()
+        if obj._ext is not None:
+            root_num = len(obj._cont) - len(obj._ext)
+        else:
+            root_num = len(obj._cont)
+        if root_num >= 256:
+            L.append(ind + '%s = c._r_enum(%s)' % (tgt, self.ref(obj)))
+            return
+        if obj._ext is not None:
+            i = self.tmp(t, 'i')
+            L.append(ind + 'c._off += 1')
+            L.append(ind + 'if r.get_val(1):')
+            L.append(ind + '    %s = c._r_NSVAL()' % i)
+            L.append(ind + '    %s = %s[%s] if %s < %i else None' \
+                     % (tgt, self.const(obj._ext), i, i, len(obj._ext)))
+            L.append(ind + 'else:')
+            ind += ' '*4
+        if root_num == 0:
+            L.append(ind + '%s = None' % tgt)
+        elif root_num == 1:
+            L.append(ind + '%s = %r' % (tgt, obj._cont.keys()[0]))
+        else:
+            i = self.tmp(t, 'i')
+            bitlen = len_bits(root_num-1)
+            L.append(ind + 'c._off += %i' % bitlen)
+            L.append(ind + '%s = r.get_val(%i)' % (i, bitlen))
+            L.append(ind + 'if %s >= %i:' % (i, root_num))
+            L.append(ind + '    raise(ASN1_PER_DECODER(\'invalid enumerated '\
+                                 'index (%%s)\' %% %s))' % i)
+            L.append(ind + '%s = %s[%s]' \
+                     % (tgt, self.const(obj._cont.keys()[:root_num]), i))
+    
+    def dec_ext_bit(self, ext, noub, rest, L, ind):
+        # extension bit, followed by the unbounded or the constrained form
+        if ext:
+            L.append(ind + 'c._off += 1')
+            L.append(ind + 'if r.get_val(1):')
+            noub(ind + ' '*4)
+            L.append(ind + 'else:')
+            rest(ind + ' '*4)
+        else:
+            rest(ind)
+    
+    def dec_bit_str(self, obj, tgt, L, ind, t):
+        # PER._r_bit_str()
+        lb, ub, ext = obj.get_const_int()
+        size = self.tmp(t, 's')
+        def noub(ind):
+            if self.aligned:
+                L.append(ind + 'c._r_P()')
+            L.append(ind + '%s = c._r_L()' % size)
+            L.append(ind + 'c._off += %s' % size)
+            L.append(ind + '%s = (r.get_val(%s), %s)' % (tgt, size, size))
+        def rest(ind):
+            if ub is None:
+                noub(ind)
+            elif lb == ub and ub < 65536:
+                if lb > 16 and self.aligned:
+                    L.append(ind + 'c._r_P()')
+                L.append(ind + 'c._off += %r' % lb)
+                L.append(ind + '%s = (r.get_val(%r), %r)' % (tgt, lb, lb))
+            elif ub >= 65536:
+                self.dec_limit(ub, L, ind)
+            else:
+                self.dec_int(size, (lb, ub, False), L, ind)
+                if self.aligned:
+                    L.append(ind + 'c._r_P()')
+                L.append(ind + 'c._off += %s' % size)
+                L.append(ind + '%s = (r.get_val(%s), %s)' % (tgt, size, size))
+        self.dec_ext_bit(ext, noub, rest, L, ind)
+    
+    def dec_oct_str(self, obj, tgt, L, ind, t):
+        # PER._r_oct_str()
+        lb, ub, ext = obj.get_const_int()
+        size = self.tmp(t, 's')
+        def noub(ind):
+            if self.aligned:
+                L.append(ind + 'c._r_P()')
+            L.append(ind + '%s = c._r_str(c._r_L())' % tgt)
+        def rest(ind):
+            if ub is None:
+                noub(ind)
+            elif lb == ub and ub <= 65536:
+                if lb > 2 and self.aligned:
+                    L.append(ind + 'c._r_P()')
+                L.append(ind + '%s = c._r_str(%r)' % (tgt, lb))
+            elif ub >= 65536:
+                self.dec_limit(ub, L, ind)
+            else:
+                self.dec_int(size, (lb, ub, False), L, ind)
+                L.append(ind + 'if %s == 0:' % size)
+                L.append(ind + '    %s = \'\'' % tgt)
+                L.append(ind + 'else:')
+                if self.aligned:
+                    L.append(ind + '    c._r_P()')
+                L.append(ind + '    %s = c._r_str(%s)' % (tgt, size))
+        self.dec_ext_bit(ext, noub, rest, L, ind)
+    
+    def dec_limit(self, ub, L, ind):
+        L.append(ind + 'raise(ASN1_PER_DECODER(\'length determinant for '\
+                       'upper bound (%s) over decoder limit (64k)\'))' % ub)
+    
+    def dec_choice(self, obj, L, ind, t):
+        # PER._r_choice()
+        if len(obj._cont) == 0 and obj._ext is None:
+            L.append(ind + 'return None')
+            return
+        if obj._ext is not None:
+            ext = [self.func(obj._cont[name], 'd') for name in obj._ext]
+            L.append(ind + 'c._off += 1')
+            L.append(ind + 'if r.get_val(1):')
+            L.append(ind + '    return _r_choice_ext(c, %s, %s)' \
+                     % (self.const(obj._ext), self.table(ext)))
+            root_num = len([i for i in obj._cont if i not in obj._ext])
+        else:
+            root_num = len(obj._cont)
+        if len(obj._cont) == 0:
+            L.append(ind + 'return None')
+        elif len(obj._cont) == 1:
+            name = obj._cont.keys()[0]
+            L.append(ind + 'return (%r, %s(c))' \
+                     % (name, self.func(obj._cont[name], 'd')))
+        else:
+            names = obj._cont.keys()[:root_num]
+            self.dec_int('i', (0, root_num-1, False), L, ind)
+            L.append(ind + 'if i >= %i:' % root_num)
+            L.append(ind + '    raise(ASN1_PER_DECODER(\'invalid choice index '\
+                                 '(%s)\' % i))')
+            L.append(ind + 'return (%s[i], %s[i](c))' % (self.const(names),
+                     self.table([self.func(obj._cont[n], 'd') for n in names])))
+    
+    def dec_seq(self, obj, L, ind, t):
+        # PER._r_seq()
+        if len(obj._cont) == 0 and obj._ext is None:
+            L.append(ind + 'return None')
+            return
+        if obj._ext is not None:
+            L.append(ind + 'c._off += 1')
+            L.append(ind + 'e = r.get_val(1)')
+        bm_len = len(obj._root_opt)
+        if bm_len:
+            L.append(ind + 'c._off += %i' % bm_len)
+            L.append(ind + 'b = r.get_val(%i)' % bm_len)
+        L.append(ind + 'v = {}')
+        for name in obj._root_comp:
+            comp = obj._cont[name]
+            tgt = 'v[%r]' % name
+            if comp._flags is None:
+                self.dec_comp(obj, comp, tgt, L, ind, t)
+                continue
+            elif bm_len and name in obj._root_opt:
+                mask = 1 << (bm_len - obj._root_opt.index(name) - 1)
+                L.append(ind + 'if b & %i:' % mask)
+                self.dec_comp(obj, comp, tgt, L, ind + ' '*4, t)
+                if FLAG_DEF in comp._flags:
+                    L.append(ind + 'else:')
+                    L.append(ind + '    %s = %s' % (tgt, self.default(comp)))
+            elif FLAG_DEF in comp._flags:
+                L.append(ind + '%s = %s' % (tgt, self.default(comp)))
+        if obj._ext is not None:
+            if all([isinstance(name, str) for name in obj._ext]):
+                ext = ['(%r, %s)' % (name, self.func(obj._cont[name], 'd')) \
+                       for name in obj._ext]
+                L.append(ind + 'if e:')
+                L.append(ind + '    v = _r_seq_ext(c, v, %s)' \
+                         % self.table(ext))
+            else:
+                L.append(ind + 'if e:')
+                L.append(ind + '    v = c._r_seq_ext(%s, v)' % self.ref(obj))
+        L.append(ind + 'if not v:')
+        L.append(ind + '    return None')
+        L.append(ind + 'return v')
+    
+    def dec_comp(self, obj, comp, tgt, L, ind, t):
+        if comp._type in (TYPE_OPEN, TYPE_ANY):
+            if self.aligned:
+                L.append(ind + 'c._r_P()')
+            L.append(ind + '%s = c._r_seq_open(%s, %s, v)' \
+                     % (tgt, self.ref(obj), self.ref(comp)))
+        else:
+            self.dec_obj(comp, tgt, L, ind, t)
+    
+    def dec_seq_of(self, obj, L, ind, t):
+        # PER._r_seq_of()
+        lb, ub, ext = obj.get_const_int()
+        def noub(ind):
+            if self.aligned:
+                L.append(ind + 'c._r_P()')
+            L.append(ind + 'n = c._r_L()')
+        def rest(ind):
+            if ub is None:
+                noub(ind)
+            elif lb == ub:
+                L.append(ind + 'n = %r' % lb)
+            elif ub >= 65536:
+                self.dec_limit(ub, L, ind)
+            else:
+                self.dec_int('n', (lb, ub, False), L, ind)
+        self.dec_ext_bit(ext, noub, rest, L, ind)
+        L.append(ind + 'return [%s(c) for i in xrange(n)]' \
+                 % self.func(obj._cont, 'd'))
+    
+    #--------------------------------------------------------------------------#
+    # encoder
+    #--------------------------------------------------------------------------#
+    def enc_func(self, obj):
+        L, t = [], [0]
+        ind = ' '*4
+        if obj._flags is not None and FLAG_DEF in obj._flags:
+            L.append(ind + 'if x == %s:' % self.default(obj))
+            L.append(ind + '    return')
+        if obj._type == TYPE_CHOICE:
+            self.enc_choice(obj, L, ind, t)
+        elif obj._type == TYPE_SEQ:
+            self.enc_seq(obj, L, ind, t)
+        elif obj._type == TYPE_SEQ_OF:
+            self.enc_seq_of(obj, L, ind, t)
+        else:
+            self.enc_leaf(obj, 'x', L, ind, t)
+        if not L:
+            L.append(ind + 'pass')
+        return L
+    
+    def enc_obj(self, obj, src, L, ind, t):
+        # encodes the value src (a variable name) with obj, like PER._w_obj()
+        if obj._type in (TYPE_CHOICE, TYPE_SEQ, TYPE_SEQ_OF):
+            L.append(ind + '%s(c, %s)' % (self.func(obj, 'e'), src))
+            return
+        if obj._flags is not None and FLAG_DEF in obj._flags:
+            L.append(ind + 'if %s != %s:' % (src, self.default(obj)))
+            ind += ' '*4
+        num = len(L)
+        self.enc_leaf(obj, src, L, ind, t)
+        if len(L) == num:
+            L.append(ind + 'pass')
+    
+    def enc_leaf(self, obj, src, L, ind, t):
+        type = obj._type
+        if type == TYPE_NULL:
+            return
+        elif type == TYPE_BOOL:
+            L.append(ind + 'w.put_val((0, 1)[%s], 1)' % src)
+            L.append(ind + 'c._off += 1')
+        elif type == TYPE_INTEGER:
+            self.enc_int(src, obj.get_const_int(), L, ind)
+        elif type == TYPE_ENUM:
+            self.enc_enum(obj, src, L, ind)
+        elif type == TYPE_BIT_STR:
+            L.append(ind + '_w_bit_str(c, %s, %r, %r, %r)' \
+                     % ((src, ) + obj.get_const_int()))
+        elif type in _STR_TYPES:
+            L.append(ind + '_w_oct_str(c, %s, %r, %r, %r)' \
+                     % ((src, ) + obj.get_const_int()))
+        elif type in (TYPE_OPEN, TYPE_ANY):
+            L.append(ind + 'c._w_open_type(%s, %s)' % (self.ref(obj), src))
+        else:
+            L.append(ind + 'c._w_obj(%s, %s)' % (self.ref(obj), src))
+    
+    def enc_bits(self, src, bitlen, L, ind):
+        # PER._w_bits()
+        if bitlen > 0:
+            L.append(ind + 'w.put_val(max(0, min(%i, %s)), %i)' \
+                     % ((1<<bitlen)-1, src, bitlen))
+            L.append(ind + 'c._off += %i' % bitlen)
+    
+    def enc_int(self, src, (lb, ub, ext), L, ind):
+        # PER._w_int()
+        if ext or lb is None or ub is None:
+            L.append(ind + 'c._w_int(%s, %r, %r, %r)' % (src, lb, ub, ext))
+            return
+        ra = ub - lb + 1
+        val = (('%s - %r' % (src, lb)), src)[lb == 0]
+        if ra == 1:
+            L.append(ind + 'if %s != %r:' % (src, lb))
+            self.enc_bits(val, len_bits(0), L, ind + ' '*4)
+        elif ra > 255 and self.aligned:
+            L.append(ind + 'c._w_int_const_align(%s, %r)' % (val, ra))
+        else:
+            self.enc_bits(val, len_bits(ra-1), L, ind)
+    
+    def enc_enum(self, obj, src, L, ind):
+        # PER._w_enum()
+        if obj._ext is not None:
+            root_num = len(obj._cont) - len(obj._ext)
+        else:
+            root_num = len(obj._cont)
+        if root_num >= 256:
+            L.append(ind + 'c._w_enum(%s, %s)' % (self.ref(obj), src))
+            return
+        if obj._ext is not None:
+            ext = self.const(obj._ext)
+            L.append(ind + 'if %s in %s:' % (src, ext))
+            L.append(ind + '    w.put_val(1, 1)')
+            L.append(ind + '    c._off += 1')
+            L.append(ind + '    c._w_NSVAL(%s.index(%s))' % (ext, src))
+            L.append(ind + 'else:')
+            ind += ' '*4
+            L.append(ind + 'w.put_val(0, 1)')
+            L.append(ind + 'c._off += 1')
+        if root_num > 1:
+            self.enc_bits('%s.index(%s)' % (self.const(obj._cont.keys()), src),
+                          len_bits(root_num-1), L, ind)
+    
+    def enc_choice(self, obj, L, ind, t):
+        # PER._w_choice()
+        if len(obj._cont) == 0 and obj._ext is None:
+            L.append(ind + 'return')
+            return
+        if obj._ext is not None:
+            ext = self.const(obj._ext)
+            L.append(ind + 'if x[0] in %s:' % ext)
+            L.append(ind + '    w.put_val(1, 1)')
+            L.append(ind + '    c._off += 1')
+            L.append(ind + '    c._w_NSVAL(%s.index(x[0]))' % ext)
+            L.append(ind + '    c._w_P()')
+            funcs = self.table([self.func(obj._cont[name], 'e') \
+                                for name in obj._ext])
+            L.append(ind + '    _w_wrap(c, %s[%s.index(x[0])], x[1])' \
+                     % (funcs, ext))
+            L.append(ind + '    return')
+            L.append(ind + 'w.put_val(0, 1)')
+            L.append(ind + 'c._off += 1')
+            root_num = len([i for i in obj._cont if i not in obj._ext])
+        else:
+            root_num = len(obj._cont)
+        if len(obj._cont) == 0:
+            L.append(ind + 'return')
+            return
+        names = obj._cont.keys()
+        funcs = [self.func(obj._cont[n], 'e') for n in names]
+        if len(obj._cont) > 1:
+            L.append(ind + 'i = %s.index(x[0])' % self.const(names))
+            self.enc_int('i', (0, root_num-1, False), L, ind)
+            L.append(ind + '%s[i](c, x[1])' % self.table(funcs))
+        else:
+            L.append(ind + '%s[x[0]](c, x[1])' % self.table(funcs, names))
+    
+    def enc_seq(self, obj, L, ind, t):
+        # PER._w_seq()
+        if len(obj._cont) == 0 and obj._ext is None:
+            L.append(ind + 'return')
+            return
+        if obj._ext is not None:
+            L.append(ind + 'e = not %s.isdisjoint(x)' \
+                     % self.const(obj._ext_flat, 'frozenset'))
+            L.append(ind + 'w.put_val(int(e), 1)')
+            L.append(ind + 'c._off += 1')
+        bm_len = len(obj._root_opt)
+        L.append(ind + 'if x is None:')
+        L.append(ind + '    w.put_val(0, %i)' % bm_len)
+        L.append(ind + '    c._off += %i' % bm_len)
+        L.append(ind + '    return')
+        if bm_len:
+            L.append(ind + 'b = 0')
+            for name in obj._root_comp:
+                if name not in obj._root_opt:
+                    continue
+                comp = obj._cont[name]
+                mask = 1 << (bm_len - obj._root_opt.index(name) - 1)
+                if comp._flags is None or FLAG_DEF not in comp._flags:
+                    L.append(ind + 'if %r in x:' % name)
+                else:
+                    L.append(ind + 'if %r in x and x[%r] != %s:' \
+                             % (name, name, self.default(comp)))
+                L.append(ind + '    b += %i' % mask)
+            L.append(ind + 'w.put_val(b, %i)' % bm_len)
+            L.append(ind + 'c._off += %i' % bm_len)
+        for name in obj._root_comp:
+            comp = obj._cont[name]
+            L.append(ind + 'if %r in x:' % name)
+            if self.aligned and comp._type in (TYPE_OPEN, TYPE_ANY):
+                L.append(ind + '    c._w_P()')
+            L.append(ind + '    y = x[%r]' % name)
+            self.enc_obj(comp, 'y', L, ind + ' '*4, t)
+        if obj._ext is not None:
+            # extended bitmap, as computed by PER._w_seq_ext()
+            group_num, bitmap = -1, []
+            for name in obj._ext_flat:
+                group = obj._cont[name]._group
+                if group == -1 or group > group_num:
+                    bitmap.append(name)
+                group_num = group
+            if bitmap == list(obj._ext) \
+            and all([isinstance(name, str) for name in obj._ext]):
+                ext = ['(%r, %s)' % (name, self.func(obj._cont[name], 'e')) \
+                       for name in obj._ext]
+                L.append(ind + 'if e:')
+                L.append(ind + '    _w_seq_ext(c, x, %s)' % self.table(ext))
+            else:
+                L.append(ind + 'if e:')
+                L.append(ind + '    c._w_seq_ext(%s, x)' % self.ref(obj))
+    
+    def enc_seq_of(self, obj, L, ind, t):
+        # PER._w_seq_of(), which goes on after encoding the semi-constrained
+        # count or the fixed count
+        lb, ub, ext = obj.get_const_int()
+        func = self.func(obj._cont, 'e')
+        def items(ind):
+            L.append(ind + 'for y in x:')
+            L.append(ind + '    %s(c, y)' % func)
+        def noub(ind):
+            if self.aligned:
+                L.append(ind + 'c._w_P()')
+            L.append(ind + 'c._w_L(len(x))')
+            items(ind)
+        if ext:
+            cond = []
+            if lb is not None:
+                cond.append('len(x) < %r' % lb)
+            if ub:
+                cond.append('len(x) > %r' % ub)
+            if cond:
+                L.append(ind + 'if %s:' % ' or '.join(cond))
+                L.append(ind + '    w.put_val(1, 1)')
+                L.append(ind + '    c._off += 1')
+                noub(ind + ' '*4)
+                L.append(ind + '    return')
+            L.append(ind + 'w.put_val(0, 1)')
+            L.append(ind + 'c._off += 1')
+        if ub is None:
+            noub(ind)
+        if ub == lb and ub < 65536:
+            items(ind)
+        if ub >= 65536:
+            L.append(ind + 'raise(ASN1_PER_ENCODER(\'length determinant for '\
+                           'upper bound (%s) over encoder limit (64k)\'))' % ub)
+            return
+        self.enc_int('len(x)', (lb, ub, False), L, ind)
+        items(ind)
+    
+    #--------------------------------------------------------------------------#
+    # module
+    #--------------------------------------------------------------------------#
+    def module(self, name, variant, types, fingerprint=''):
+        # types: list of (name, decoder, encoder) for the root types
+        lines = [
+            '# -*- coding: UTF-8 -*-',
+            '# PER codec of the ASN.1 module %s, variant %s' % (name, variant),
+            '# generated by libmich.asn1.codegen.gen_per(), do not edit',
+            '',
+            'from libmich.core.shtr import BitWriter',
+            'from libmich.asn1.ASN1 import ASN1Obj',
+            'from libmich.asn1.PER import ASN1_PER_DECODER, ASN1_PER_ENCODER',
+            '',
+            'VARIANT = %r' % variant,
+            'ALIGNED = %r' % self.aligned,
+            '# fingerprint of the pickled module, checked by load_per()',
+            'FINGERPRINT = %r' % fingerprint,
+            '',
+            '# ASN1Obj referenced, resolved from PATHS by load_per()',
+            'O = []',
+            _HELPERS]
+        lines.extend(self.const_lines)
+        lines.append('')
+        lines.extend(self.funcs)
+        lines.extend(self.aliases)
+        lines.append('')
+        lines.extend(self.table_lines)
+        lines.append('')
+        lines.append('PATHS = [')
+        lines.extend(['    %r,' % (p, ) for p in self.ref_paths])
+        lines.append('    ]')
+        lines.append('')
+        lines.append('TYPES = {')
+        lines.extend(['    %r: (%s, %s),' % t for t in types])
+        lines.append('    }')
+        lines.append('')
+        return '\n'.join(lines)
+
+def gen_per(obj_list, variant='A', name='', fingerprint=''):
+    '''
+    returns the source of the PER codec module for the variant 'A' (aligned)
+    or 'U' (unaligned), for the list of (name, ASN1Obj) compiled,
+    as pickled by processor.compile(), whose fingerprint is embedded in it
+    '''
+    gen = _PERGen(variant)
+    roots = [(n, obj) for (n, obj) in obj_list \
+             if isinstance(obj, ASN1.ASN1Obj) and obj._mode == 0]
+    for n, obj in roots:
+        gen.set_paths(obj, (n, ))
+    types = []
+    for n, obj in roots:
+        if obj._type not in _GEN_TYPES \
+        or (obj._flags is not None and FLAG_DEF in obj._flags):
+            continue
+        types.append( (n, gen.func(obj, 'd'), gen.func(obj, 'e')) )
+    return gen.module(name, variant, types, fingerprint)
+
+def _get_path(path):
+    obj = GLOBAL.TYPE[path[0]]
+    for name in path[1:]:
+        if name is None:
+            obj = obj._cont
+        else:
+            obj = obj._cont[name]
+    return obj
+
+def load_per(path, fingerprint=None):
+    '''
+    loads the PER codec module generated by gen_per() at path, and sets its
+    functions for the ASN1Obj in GLOBAL.TYPE
+    
+    If fingerprint is given, it must be the one embedded in the codec module:
+    otherwise, it was generated for another pickled module than the one
+    loaded in GLOBAL, and ASN1_PROC is raised
+    '''
+    name = os.path.splitext(os.path.basename(path))[0]
+    mod = imp.load_source(name, path)
+    if fingerprint is not None \
+    and getattr(mod, 'FINGERPRINT', None) != fingerprint:
+        raise(ASN1_PROC('%s: PER codec generated for another pickled module,'\
+              ' to be generated again' % path))
+    mod.O[:] = [_get_path(p) for p in mod.PATHS]
+    for n, (dec, enc) in mod.TYPES.items():
+        obj = GLOBAL.TYPE[n]
+        PER._GEN[id(obj)] = (obj, mod.VARIANT, dec, enc)
+    return mod
@@ -27,6 +27,7 @@
 #*/ 
 
 import os
+from hashlib import md5
 try:
     import cPickle as pickle
 except ImportError:
@@ -39,6 +40,7 @@ import ASN1
 # only here for commodity, should be removed
 from libmich.utils.repr import *
 from PER import PER
+from codegen import gen_per, load_per
 #ASN1.ASN1Obj.CODEC = PER
 
 PICKLE_PROTOCOL = 2
@@ -51,7 +53,16 @@ MODULE_NAMES = [\
     ('x2ap_36423-c10.asn', 'x2ap')
     ]
 
-def compile(texts, create_pickle_name=''):
+# PER variant of the codec generated for each module
+MODULE_VARIANTS = {
+    'rrc3g': 'U',
+    'rrclte': 'U',
+    'ranap': 'A',
+    's1ap': 'A',
+    'x2ap': 'A'
+    }
+
+def compile(texts, create_pickle_name='', per_variant=None):
     '''
     Scans the texts (or list of texts) to find ASN.1 modules, and compile them
     into Python objects.
@@ -59,6 +70,12 @@ def compile(texts, create_pickle_name=''):
     
     For each module scanned, possibly creates a Python pickled file 
     in MODULES_DIR for further quicker loading of this module within Python
+    
+    If per_variant is 'A' or 'U', also creates the PER codec module generated
+    for this variant next to the pickled file (see codegen.py)
+    
+    Codec plans of all compiled objects are built after pickling them 
+    (see ASN1Obj.build_plan())
     '''
     # 1) parse subtype definition / content
     if isinstance(texts, str):
@@ -93,13 +110,21 @@ def compile(texts, create_pickle_name=''):
             log('compiled results storage error: pickle AssertionError')
             log('returning full ASN.1 objects\' list')
             return obj_list
+        fd.close()
+        if per_variant:
+            _write_codec(create_pickle_name, obj_list, per_variant)
     #
+    for mod in M:
+        for kind in ('TYPE', 'VALUE', 'SET'):
+            _build_plans(mod[kind].values())
     return M
 
-def load_module(name=''):
-    '''
-    returns the list of modules compiled and pickled by compile()
-    '''
+def _build_plans(objs):
+    for obj in objs:
+        if isinstance(obj, ASN1.ASN1Obj):
+            obj.build_plan()
+
+def _load_pickle(name=''):
     path = '%s%s.pck' % (get_modules_dir(), os.path.basename(name))
     if not os.path.exists(path):
         raise(ASN1_PROC('invalid module name: %s' % name))
@@ -109,7 +134,41 @@ def load_module(name=''):
         obj_list = p.load()
     except:
         raise(ASN1_PROC('Invalid module content'))
+    fd.close()
+    return obj_list
+
+def _get_fingerprint(name=''):
+    # fingerprint of the pickled module, embedded in the PER codec module
+    # generated for it
+    path = '%s%s.pck' % (get_modules_dir(), os.path.basename(name))
+    if not os.path.exists(path):
+        raise(ASN1_PROC('invalid module name: %s' % name))
+    fd = open(path, 'rb')
+    fingerprint = md5(fd.read()).hexdigest()
+    fd.close()
+    return fingerprint
+
+def _write_codec(name, obj_list, variant):
+    path = '%s%s_per.py' % (get_modules_dir(), os.path.basename(name))
+    try:
+        fd = open(path, 'w')
+    except:
+        raise(ASN1_PROC('Invalid file path for writing codec: %s' % path))
+    fd.write( gen_per(obj_list, variant, name, _get_fingerprint(name)) )
+    fd.close()
+
+def load_module(name='', per_codec=False):
+    '''
+    returns the list of modules compiled and pickled by compile()
+    
+    Codec plans of all objects loaded are built (see ASN1Obj.build_plan())
+    
+    If per_codec is True, also loads the PER codec module generated for it
+    (see load_codec())
+    '''
+    obj_list = _load_pickle(name)
     GLOBAL.clear()
+    PER._GEN.clear()
     for obj_name, obj in obj_list:
         if obj['mode'] == 0:
             GLOBAL.TYPE[obj_name] = obj
@@ -117,7 +176,37 @@ def load_module(name=''):
             GLOBAL.VALUE[obj_name] = obj
         elif obj['mode'] == 2:
             GLOBAL.SET[obj_name] = obj
+    _build_plans([obj for (obj_name, obj) in obj_list])
     log('%s: %s objects loaded into GLOBAL' % (name, len(obj_list)))
+    if per_codec:
+        load_codec(name)
+
+def load_codec(name=''):
+    '''
+    loads the PER codec module generated by compile() for the module name,
+    which must have been loaded into GLOBAL with load_module():
+    PER.decode_val() and PER.encode_buf() then use its functions for the
+    objects in GLOBAL.TYPE, when the PER variant is the one of the codec
+    
+    The codec module is generated with generate_codec() when it is missing;
+    ASN1_PROC is raised when it was generated for another pickled module
+    (e.g. compiled again without per_variant), generate_codec() being then
+    needed
+    '''
+    path = '%s%s_per.py' % (get_modules_dir(), os.path.basename(name))
+    if not os.path.exists(path):
+        generate_codec(name)
+    mod = load_per(path, _get_fingerprint(name))
+    log('%s: PER codec loaded, variant %s' % (name, mod.VARIANT))
+
+def generate_codec(name='', variant=None):
+    '''
+    generates the PER codec module for the module name pickled by compile(),
+    without compiling it again
+    '''
+    if variant is None:
+        variant = MODULE_VARIANTS.get(name, 'A')
+    _write_codec(name, _load_pickle(name), variant)
 
 def generate_modules(mods=MODULE_NAMES):
     for asn_name, mod_name in mods:
@@ -127,7 +216,7 @@ def generate_modules(mods=MODULE_NAMES):
         fd.close()
         GLOBAL.clear()
         log('processing %s' % asn_name)
-        compile(asntext, mod_name)
+        compile(asntext, mod_name, MODULE_VARIANTS.get(mod_name))
 
 def inline(text=''):
     '''
@@ -141,6 +230,7 @@ def inline(text=''):
         GLOBAL.clear_tmp()
         init_assignment(Obj)
         process_assignment(Obj)
+        Obj.build_plan()
     return Obj
 
 def get_modules_dir():
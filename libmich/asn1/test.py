@@ -26,7 +26,11 @@
 # *--------------------------------------------------------
 #*/ 
 
+import sys
 from time import time
+from random import Random
+from threading import Thread
+from traceback import format_exc
 
 from libmich.utils.repr import *
 
@@ -614,6 +618,37 @@ def test_per_sequence(print_info=True):
     b.decode(str(a))
     assert(a._msg.__hex__() == b._msg.__hex__() and a() == b())
     
+    if print_info: print('testing SEQUENCE extension group encoding / decoding (PER unaligned)')
+    a = inline('''
+        A ::= SEQUENCE {
+            s1  INTEGER (0..7),
+            ...,
+            [[ s2  INTEGER (0..7),
+               s3  BOOLEAN OPTIONAL ]],
+            s4  INTEGER (0..3) OPTIONAL
+            }
+    ''')
+    b = a.clone()
+    
+    a.encode({'s1':1, 's2':5})
+    #print('a (1, 5): %s' % a._msg.show())
+    assert(a._msg.__hex__() == '90300a80')
+    b.decode(str(a))
+    assert(a._msg.__hex__() == b._msg.__hex__() and a() == b())
+    assert(a.decode_val(str(a)) == a() and a.encode_val(a()) == str(a))
+    a.encode({'s1':1, 's2':5, 's3':True})
+    #print('a (1, 5, True): %s' % a._msg.show())
+    assert(a._msg.__hex__() == '90300ec0')
+    b.decode(str(a))
+    assert(a._msg.__hex__() == b._msg.__hex__() and a() == b())
+    assert(a.decode_val(str(a)) == a() and a.encode_val(a()) == str(a))
+    a.encode({'s1':2, 's2':3, 's4':1})
+    #print('a (2, 3, 1): %s' % a._msg.show())
+    assert(a._msg.__hex__() == 'a03809800a00')
+    b.decode(str(a))
+    assert(a._msg.__hex__() == b._msg.__hex__() and a() == b())
+    assert(a.decode_val(str(a)) == a() and a.encode_val(a()) == str(a))
+    
     if print_info: print('testing SEQUENCE OF encoding / decoding (PER aligned)')
     PER.VARIANT = 'A'
     a = inline('''
@@ -859,6 +894,105 @@ def test_rrc3g():
     if pkts is not None:
         void = _test_rrc3g(pkts, pkts_non_canon)
     
+def _test_per_vectors():
+    # (ASN1Obj, buffer) for all S1AP and RRC 3G test vectors,
+    # each module being loaded in turn
+    pkts = _test_s1ap_prep()
+    if pkts is not None:
+        pdu = GLOBAL.TYPE['S1AP-PDU']
+        yield 'A', [(pdu, msg) for msg in pkts]
+    pkts, pkts_non_canon = _test_rrc3g_prep()
+    if pkts is not None:
+        pcch = GLOBAL.TYPE['PCCH-Message']
+        dldcch = GLOBAL.TYPE['DL-DCCH-Message']
+        uldcch = GLOBAL.TYPE['UL-DCCH-Message']
+        yield 'U', [(pcch, msg) for msg in pkts[0:3]] + \
+                   [(dldcch, msg) for msg in pkts[3:14] + pkts_non_canon[:3]] + \
+                   [(uldcch, msg) for msg in pkts[14:] + pkts_non_canon[3:]]
+
+def test_per_encode_buf():
+    # the direct encoder returns the same buffer as the Layer-building one,
+    # for the values decoded from the test vectors, either left in place
+    # (ASN1Obj.encode() without value) or set with set_val()
+    ASN1.ASN1Obj._RET_STRUCT = False
+    for variant, msgs in _test_per_vectors():
+        for pdu, msg in msgs:
+            pdu._decode(msg)
+            val = pdu._val
+            pdu._encode()
+            buf = str(pdu._msg)
+            pdu._val = val
+            pdu.encode()
+            assert( pdu._enc[0] == buf )
+            if buf != msg:
+                # non-canonical encoding: empty components decoded are
+                # missing once set with set_val()
+                continue
+            #
+            pdu.set_val(val)
+            val = pdu._val
+            pdu._encode()
+            buf = str(pdu._msg)
+            assert( pdu.encode_val(val) == buf )
+            assert( pdu.encode_val(val, variant=variant) == buf )
+
+def test_per_decode_val():
+    # the direct decoder returns the same value as the Layer-building one,
+    # for all the test vectors, either called reentrantly (decode_val(), with
+    # and without the generated variant) or through ASN1Obj.decode(), whose
+    # Layer is then rebuilt identical
+    ASN1.ASN1Obj._RET_STRUCT = False
+    for variant, msgs in _test_per_vectors():
+        for pdu, msg in msgs:
+            pdu._decode(msg)
+            val = pdu._val
+            txt = pdu._msg.show()
+            assert( pdu.decode_val(msg) == val )
+            assert( pdu.decode_val(msg, variant=variant) == val )
+            pdu.decode(msg)
+            assert( pdu._val == val )
+            assert( pdu._msg.show() == txt )
+    
+def test_per_threads(threads=8, calls=60):
+    # decode_val() and encode_val() are reentrant: called concurrently 
+    # by several threads on the same objects, they return the same values 
+    # and buffers as when called by a single thread
+    # (open types' values are encoded according to the module in GLOBAL,
+    # hence the threads are run for each module in turn)
+    ASN1.ASN1Obj._RET_STRUCT = False
+    errors = []
+    def run(vects, seed):
+        rnd = Random(seed)
+        try:
+            for i in range(calls):
+                variant, pdu, msg, val, buf = rnd.choice(vects)
+                assert( pdu.decode_val(msg, variant=variant) == val )
+                if buf is not None:
+                    assert( pdu.encode_val(val, variant=variant) == buf )
+        except:
+            errors.append( format_exc() )
+    # switch threads often
+    interval = sys.getcheckinterval()
+    sys.setcheckinterval(5)
+    try:
+        for variant, msgs in _test_per_vectors():
+            vects = []
+            for pdu, msg in msgs:
+                val = pdu.decode_val(msg, variant=variant)
+                try:
+                    buf = pdu.encode_val(val, variant=variant)
+                except:
+                    buf = None
+                vects.append( (variant, pdu, msg, val, buf) )
+            th = [Thread(target=run, args=(vects, i)) for i in range(threads)]
+            for t in th:
+                t.start()
+            for t in th:
+                t.join()
+            assert( not errors ), errors[0]
+    finally:
+        sys.setcheckinterval(interval)
+    
 def test_all(print_info=False):
     test_def(print_info)
     test_per_integer(print_info)
@@ -866,6 +1000,9 @@ def test_all(print_info=False):
     test_per_sequence(print_info)
     #test_s1ap()
     #test_rrc3g()
+    #test_per_encode_buf()
+    #test_per_decode_val()
+    #test_per_threads()
     
 if __name__ == '__main__':
     test_all()
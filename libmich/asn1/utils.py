@@ -28,6 +28,7 @@
 
 import re
 from collections import OrderedDict
+import threading
 
 #------------------------------------------------------------------------------#
 # library-wide Python routines
@@ -127,10 +128,13 @@ class ASN1_OBJ(Exception): pass
 # for all ASN.1 codec error
 class ASN1_CODEC(Exception): pass
 
-# this is to support _RAISE_SILENTLY
-class RAISED:
+# this is to support _RAISE_SILENTLY, 
+# the error state being kept for each thread
+class _RAISED(threading.local):
     set = False
 
+RAISED = _RAISED()
+
 #------------------------------------------------------------------------------#
 # library-wide Python global objects
 #------------------------------------------------------------------------------#
@@ -52,8 +52,8 @@ from binascii import hexlify, unhexlify
 __all__ = ['CSN1', 'LHFlag', 'CSN1FIELDS', 'BREAK', 'BREAK_LOOP']
 
 from libmich.core.element import Bit, Int, Str, Layer, show, showattr, \
-    log, DBG, WNG, ERR
-from libmich.core.shtr import shtr
+    log, DBG, WNG, ERR, _is_std
+from libmich.core.shtr import BitReader
 from libmich.core.IANA_dict import IANA_dict as iad
 from copy import deepcopy
 
@@ -304,8 +304,11 @@ class CSN1(Layer):
         # in case CSN1 list is empty
         if len(self.csn1List) == 0:
             return
-        # initialize the string buffer to be mapped
-        self.BUF, self._buflen = shtr(string), len(string)*8
+        # initialize the string buffer to be mapped:
+        # BUF is a BitReader, which is read forward without being shifted
+        # (a BitReader passed by a parent CSN1 is not consumed)
+        self.BUF = BitReader(string)
+        self._buflen = self.BUF.bit_len() + byte_offset
         self._consumed, self._offset, self._map_exit = 0, byte_offset, False
         self.elementList = []
         #
@@ -374,7 +377,7 @@ class CSN1(Layer):
             # collect a uniq set of the 1st bit from all conditions
             conds_1bit = set([c[:1] for c in conds_proc])
             # consume buffer bit per bit: 1st get binary value from BUF
-            bufval = (self.BUF<<offset).left_val(1)
+            bufval = self.BUF.left_val(1, offset)
             #
             # check if we need to evaluate padding conditions
             if all([c in 'LH' for c in conds_1bit]):
@@ -456,11 +459,21 @@ class CSN1(Layer):
         else:
             self.append(csn1f)
         #
+        # fields with a specific map() method get the rest of the buffer
+        # as a shtr
         if isinstance(self[-1], CSN1):
-            self[-1].map(self.BUF, (self._consumed+self._offset)%8)
+            if _is_std(self[-1], CSN1, 'map'):
+                self[-1].map(self.BUF, (self._consumed+self._offset)%8)
+            else:
+                self[-1].map(self.BUF.to_shtr(), 
+                             (self._consumed+self._offset)%8)
             bitlen = self[-1].bit_len()
         else:
-            self[-1].map(self.BUF)
+            if isinstance(self[-1], Bit) and _is_std(self[-1], Bit, 'map') \
+            or isinstance(self[-1], Layer) and _is_std(self[-1], Layer, 'map'):
+                self[-1].map(self.BUF)
+            else:
+                self[-1].map(self.BUF.to_shtr())
             bitlen = self[-1].bit_len()
             # check if LHFlag to possibly update its LH dictionnary
             if isinstance(self[-1], LHFlag):
@@ -469,11 +482,12 @@ class CSN1(Layer):
                 self[-1].LHdict = iad({l:'L', h:'H'})
         #
         # update global BUFFER and consumed bit length 
-        self.BUF = self.BUF << bitlen
+        self.BUF.skip(bitlen)
         self._consumed += bitlen
         #
     
-    def show(self, with_trans=False):
+    def show(self, with_trans=False, depth=None, width=None):
+        # depth and width as in Layer.show()
         re, tr = '', ''
         if self.ReprName != '':
             re = '%s ' % self.ReprName
@@ -485,19 +499,26 @@ class CSN1(Layer):
         # Layer content
         #str_lst = [e.show().replace('\n', '\n ') for e in self]
         str_lst = []
+        sub = None if depth is None else depth-1
         for e in self:
-            if e.is_transparent():
+            if e.is_transparent() or depth is not None and depth <= 0:
                 pass
             elif not self._show_all and e.CallName in self._IE_no_show:
                 pass
             else:
                 if isinstance(e, Str) and isinstance(e.Pt, Layer):
-                    str_lst.append(e.Pt.show(with_trans).replace('\n', '\n '))
+                    str_lst.append(e.Pt.show(with_trans, sub, width)\
+                                   .replace('\n', '\n '))
+                elif isinstance(e, Layer):
+                    str_lst.append(e.show(with_trans, sub, width)\
+                                   .replace('\n', '\n '))
                 else:
                     str_lst.append(e.show(with_trans).replace('\n', '\n '))
         #
         # insert spaces for nested layers and filter out empty content
         str_lst = [' %s\n' % s for s in str_lst if s]
+        if width is not None and len(str_lst) > width:
+            str_lst[width:] = [' ... (%i more)\n' % (len(str_lst)-width)]
         # insert layer's title
         str_lst.insert(0, '### %s[%s]%s ###\n' % (re, self.CallName, tr))
         # return full inline string without last CR
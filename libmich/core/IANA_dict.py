@@ -28,6 +28,8 @@
 
 #!/usr/bin/env python
 
+from bisect import bisect, insort
+
 # test with the following:
 # test = IANA_dict({1 : ('test 1', 't1'), 2 : ('test 2', 't2'), \
 #                   8 : ('test 8', 't8'), 9 : 'test 9', 20: 'test 20'})
@@ -41,7 +43,14 @@ class IANA_dict(dict):
     call it like this:
     IANA_dict( { integer : ("parameter name", "parameter abbreviation"), 
                  integer: "parameter name", ... } )
+    
+    lookups use a sorted list of keys and a reverse index 
+    {name or abbreviation: key}, built on demand and updated by __setitem__;
+    the other methods changing the dict content make them be built again
     '''
+    # sorted list of keys, reverse index (None when they need to be built)
+    _keys = None
+    _rev = None
     
     def __init__(self, IANA_dict={}):
         '''
@@ -67,6 +76,19 @@ class IANA_dict(dict):
                                  'string' % i[1])
         
         dict.update(self, IANA_dict)
+        self.__build_index()
+    
+    def __build_index(self):
+        keys = dict.keys(self)
+        keys.sort()
+        rev = {}
+        # names and abbreviations refer to the 1st key (in sorted order)
+        # having them
+        for k in reversed(keys):
+            for v in dict.__getitem__(self, k):
+                if type(v) is str and len(v) > 0:
+                    rev[v] = k
+        self._keys, self._rev = keys, rev
     
     def __getitem__(self, key):
         '''
@@ -77,25 +99,19 @@ class IANA_dict(dict):
         [+] If 'key' is string and exists as value (name or abbreviation),
             returns first key found corresponding to the value.
         '''
-        values = []
-        for e in self.values():
-            for v in e:
-                if type(v) is str and len(v) > 0:
-                    values.append(v)
-        
         if self.__contains__(key):
             return dict.__getitem__(self, key)[0]
         
-        elif type(key) in (int, long) \
-        and self.s_keys()[0] < key < self.s_keys().pop():
-            i = 0
-            while self.__contains__(key-i) is False: i += 1
-            return dict.__getitem__(self, key-i)[0]
+        if self._keys is None:
+            self.__build_index()
+        keys = self._keys
+        
+        if type(key) in (int, long) and keys[0] < key < keys[-1]:
+            # last key lower than key
+            return dict.__getitem__(self, keys[bisect(keys, key)-1])[0]
         
-        elif type(key) is str and key in values:
-            i = 0
-            while key not in self.items()[i][1]: i += 1
-            return self.items()[i][0]
+        elif type(key) is str and key in self._rev:
+            return self._rev[key]
         
         else: 
             try: return dict.__getitem__(self, key)
@@ -114,23 +130,56 @@ class IANA_dict(dict):
         if type(item) is not tuple or len(item) != 2:
             raise ValueError('%s : value must be string or 2-tuple of '\
                              'string' % item)
+        if self._keys is not None and not self.__contains__(key):
+            # new key: index updated in place
+            insort(self._keys, key)
+            for v in item:
+                if type(v) is str and len(v) > 0 \
+                and (v not in self._rev or key < self._rev[v]):
+                    self._rev[v] = key
+        else:
+            # the names of the previous item may refer to another key now
+            self._keys, self._rev = None, None
         dict.__setitem__(self, key, item)
     
+    # other methods changing the content: index to be built again
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self._keys, self._rev = None, None
+    
+    def clear(self):
+        dict.clear(self)
+        self._keys, self._rev = None, None
+    
+    def pop(self, *args):
+        self._keys, self._rev = None, None
+        return dict.pop(self, *args)
+    
+    def popitem(self):
+        self._keys, self._rev = None, None
+        return dict.popitem(self)
+    
+    def setdefault(self, *args):
+        self._keys, self._rev = None, None
+        return dict.setdefault(self, *args)
+    
+    def update(self, *args, **kwargs):
+        dict.update(self, *args, **kwargs)
+        self._keys, self._rev = None, None
+    
     def s_keys(self):
         '''
         returns a sorted list of keys
         ''' 
-        s_keys = dict.keys(self)
-        s_keys.sort()
-        return s_keys
+        if self._keys is None:
+            self.__build_index()
+        return list(self._keys)
     
     def items(self):
         '''
         returns the list of (key, value), following the order of sorted keys.
         '''
-        items = []
-        s_keys = self.s_keys()
-        for k in s_keys:
-            items.append( (k, dict.__getitem__(self, k)) )
-        return items
+        if self._keys is None:
+            self.__build_index()
+        return [(k, dict.__getitem__(self, k)) for k in self._keys]
 #
\ No newline at end of file
@@ -26,4 +26,5 @@
 # *--------------------------------------------------------
 #*/ 
 
-__all__ = ['element', 'shtr', 'fuzz', 'CSN1', 'IANA_dict', 'shar']
\ No newline at end of file
+__all__ = ['element', 'shtr', 'fuzz', 'CSN1', 'IANA_dict', 'shar', 
+           'production', 'stream', 'serial']
\ No newline at end of file
@@ -100,13 +100,17 @@ __all__ = ['Element', 'Str', 'Int', 'Bit', 'Layer', 'RawLayer', 'Block',
            'testTLV', 'testA', 'testB']
 
 from copy import deepcopy
-from struct import pack, unpack
+from collections import OrderedDict
+from types import MethodType
+from struct import pack, unpack, Struct, error as StructError
 from socket import inet_ntoa
+from threading import local
 from binascii import hexlify, unhexlify
 from re import split, sub
 
 from libmich.core.shar import shar
-from libmich.core.shtr import shtr, decomposer
+from libmich.core.shtr import shtr, decomposer, BitReader, BitWriter
+from libmich.core.stream import read_records, BUFSIZE
 # TODO: cleanup the rest of libmich-related code to remove this import here
 from libmich.utils.repr import show, showattr
 
@@ -137,6 +141,115 @@ def debug(thres, level, string):
     if level and level<=thres:
         print('[%s] %s' %(debug_level[level], string))
 
+# integer to big endian string of `length' bytes, and to bitstream of `bitlen'
+# bits ('100110011...1101011')
+def _int_to_bytes(val, length):
+    return unhexlify('%0*x' % (2*length, val))
+
+def _int_to_bin(val, bitlen):
+    if not bitlen:
+        return ''
+    return format(val, '0%ib' % bitlen)
+
+#------------------------------------------------------------------------------#
+# serialization memo
+#------------------------------------------------------------------------------#
+# BuildMemo instance in use by the current thread during the serialization
+# of an outermost Layer or Block, None otherwise
+class _BuildLocal(local):
+    memo = None
+
+_local = _BuildLocal()
+
+def _state(obj):
+    # attributes an Element or Layer value is computed from
+    # (the lazy buffer standing for the value of a lazy Element)
+    if isinstance(obj, Element):
+        return (obj.Pt, obj.Val if obj._lazy is None else obj._lazy, 
+                obj.Trans, 0)
+    d = obj.__dict__
+    return (d.get('Pt'), d.get('Val'), d.get('Trans'),
+            len(d.get('elementList', ())))
+
+def _build(func):
+    # runs the serialization func() of an outermost Layer or Block
+    # with a new BuildMemo
+    _local.memo = BuildMemo()
+    try:
+        return func()
+    finally:
+        _local.memo = None
+
+class BuildMemo(object):
+    '''
+    memo of the Layer strings and of the Element values automated with PtFunc,
+    computed while building an outermost Layer or Block:
+    each value is recorded with the state (Pt, Val, Trans) of all the
+    objects read while computing it, and is returned again as long as
+    they are unchanged (e.g. Layer's length and checksum automations
+    serialize the same payload only once)
+    
+    attributes:
+    vals: dict {object: [value, dict {object read: state}, version]};
+    stack: list of dict {object read: state}, one for each value
+           being computed;
+    version: incremented each time a state attribute is assigned, values
+             are checked again against their states only after it changed;
+    '''
+    
+    def __init__(self):
+        self.vals, self.stack, self.version = {}, [], 0
+    
+    def read(self, obj):
+        # records obj in the value being computed
+        if self.stack and obj not in self.stack[-1]:
+            self.stack[-1][obj] = _state(obj)
+    
+    def get(self, obj, func, children=()):
+        # returns the value of obj, computed by func()
+        # (children being read by func() anyway)
+        stack = self.stack
+        if obj in self.vals:
+            memo = self.vals[obj]
+            val, deps = memo[:2]
+            if memo[2] != self.version:
+                for o in deps:
+                    if _state(o) != deps[o]:
+                        break
+                else:
+                    memo[2] = self.version
+            if memo[2] == self.version:
+                if stack:
+                    self.__merge(stack[-1], deps)
+                return val
+        # when an object read is assigned during the computation, the value
+        # has to be checked again against the states recorded
+        deps, version = {obj: _state(obj)}, self.version
+        for e in children:
+            # _state(e), inlined
+            if isinstance(e, Element):
+                deps[e] = (e.Pt, e.Val if e._lazy is None else e._lazy, 
+                           e.Trans, 0)
+            else:
+                d = e.__dict__
+                deps[e] = (d.get('Pt'), d.get('Val'), d.get('Trans'),
+                           len(d.get('elementList', ())))
+        stack.append(deps)
+        try:
+            val = func()
+        finally:
+            stack.pop()
+        self.vals[obj] = [val, deps, version]
+        if stack:
+            self.__merge(stack[-1], deps)
+        return val
+    
+    def __merge(self, deps, new):
+        # keeps the state of objects when they have been read 1st
+        for o in new:
+            if o not in deps:
+                deps[o] = new[o]
+
 #------------------------------------------------------------------------------#
 # basic Element definitions
 #------------------------------------------------------------------------------#
@@ -146,7 +259,14 @@ def debug(thres, level, string):
 class Element(object):
     '''
     encapsulating class for: Str, Bit, Int
+    
+    Element attributes are stored in slots, to keep instances small;
+    the __dict__ slot only gets allocated when additional attributes are
+    set on an instance (e.g. _endian, or _lazy for lazy elements)
     '''
+    __slots__ = ('CallName', 'ReprName', 'Pt', 'PtFunc', 'Val', 
+                 'Repr', 'Trans', 'TransFunc', '__dict__')
+    
     # checking Element boundaries extensively
     safe = True
     #safe = False
@@ -199,6 +319,26 @@ class Element(object):
             re = ''.join((self.ReprName, ' '))
         return '<%s[%s%s] : %s>' % ( re, self.CallName, tr, repr(self) )
     
+    # this is to export the element's value as a native python value 
+    # (see core/serial.py): an integer, or a byte string for Str;
+    # with names, an integer which is in the element's Dict is returned 
+    # with its name, as a tuple (int, unicode)
+    def export(self, with_trans=False, names=False):
+        val = self()
+        if names:
+            Dict = getattr(self, 'Dict', None)
+            if Dict is not None:
+                if self.DictFunc is not None:
+                    Dict = self.DictFunc(Dict)
+                try:
+                    name = Dict[val]
+                except (KeyError, IndexError, TypeError):
+                    return val
+                if not isinstance(name, unicode):
+                    name = str(name).decode('utf-8', 'replace')
+                return (val, name)
+        return val
+    
     # when willing to bit shift str, call this instead of standard __str__()
     def shtr(self):
         return shtr(self.__str__())
@@ -213,6 +353,34 @@ class Element(object):
 	# this is for uniformity with Block()
     def parse(self, s=''):
         self.map(s)
+    
+    # lazy mapping (see Layer._lazy_map): 
+    # the element only records where its value stands in the buffer, 
+    # and decodes it when .Val is accessed for the 1st time;
+    # it stays lazy until .Val is assigned
+    _lazy = None
+    
+    def set_lazy(self, buf, off, ln):
+        try:
+            _VAL.__delete__(self)
+        except AttributeError:
+            pass
+        self.__dict__['_lazy'] = (buf, off, ln)
+    
+    def is_lazy(self):
+        return self._lazy is not None
+    
+    def __getattr__(self, attr):
+        if attr == 'Val' and self._lazy is not None:
+            val = self._decode_lazy(*self._lazy)
+            _VAL.__set__(self, val)
+            return val
+        raise AttributeError('\'%s\' object has no attribute \'%s\'' \
+                             % (self.__class__.__name__, attr))
+
+# slot descriptor, to set or delete an element's value without going through
+# __setattr__ (e.g. for lazy elements)
+_VAL = Element.Val
 
 class Str(Element):
     '''
@@ -236,6 +404,7 @@ class Str(Element):
     TransFunc: when defined, TransFunc(Trans) is used to automate the 
                transparency aspect: used e.g. for conditional element;
     '''
+    __slots__ = ('Len', 'LenFunc', 'Type')
     
     # this is used when printing the object representation
     _repr_limit = 1024
@@ -250,7 +419,7 @@ class Str(Element):
                  Len=None, LenFunc=None,
                  Repr="hum",
                  Trans=False, TransFunc=None):
-        if CallName or not self.CallName:
+        if CallName or not getattr(self, 'CallName', None):
             self.CallName = CallName
         if ReprName is None :
             self.ReprName = ''
@@ -304,9 +473,16 @@ class Str(Element):
         #    setattr(self.Pt, attr, val)
         # ...does not work properly
         # and the final standard python behaviour
+        if attr == 'Val' and self._lazy is not None:
+            del self.__dict__['_lazy']
+        memo = _local.memo
+        if memo is not None and attr in ('Pt', 'Val', 'Trans'):
+            memo.version += 1
         object.__setattr__(self, attr, val)
     
     def __getattr__(self, attr):
+        if attr in Element.__slots__:
+            return Element.__getattr__(self, attr)
         # this is for Layer() pointed by Pt attr in Str() object
         if isinstance(self.Pt, Layer) and hasattr(self.Pt, attr):
             return getattr(self.Pt, attr)
@@ -321,6 +497,9 @@ class Str(Element):
     # building basic methods for manipulating easily the Element 
     # from its attributes
     def __call__(self, l=None):
+        memo = _local.memo
+        if memo is not None:
+            memo.read(self)
         # when length has fixed value:
         if not l and type(self.Len) is int:
             l = self.Len
@@ -340,9 +519,11 @@ class Str(Element):
             return str(self.Val)[:l]
         # else: use self.Pt capabilities to get the string
         elif self.PtFunc is not None: 
-            if self.safe: 
-                assert(hasattr(self.PtFunc(self.Pt), '__str__'))
-            return str(self.PtFunc(self.Pt))[:l]
+            # automated value computed once when building a Layer
+            memo = _local.memo
+            if memo is not None:
+                return memo.get(self, self.__pt_val)[:l]
+            return self.__pt_val()[:l]
         else:
             # allow to pass tuple or list of libmich internal instances
             if isinstance(self.Pt, (list, tuple)) \
@@ -353,6 +534,24 @@ class Str(Element):
                 assert(hasattr(self.Pt, '__str__'))
             return str(self.Pt)[:l]
     
+    def __pt_val(self):
+        if self.safe: 
+            assert(hasattr(self.PtFunc(self.Pt), '__str__'))
+        return str(self.PtFunc(self.Pt))
+    
+    def export(self, with_trans=False, names=False):
+        # a Block or Layer (or a list of them) assigned to the Str 
+        # is exported in place
+        val = self.Val
+        if val is None and self.PtFunc is None:
+            val = self.Pt
+        if self.__is_intern_inst(val):
+            return val.export(with_trans, names)
+        elif isinstance(val, (list, tuple)) and val \
+        and False not in map(self.__is_intern_inst, val):
+            return [v.export(with_trans, names) for v in val]
+        return self()
+    
     def __str__(self):
         # when Element is Transparent:
         if self.is_transparent():
@@ -397,11 +596,9 @@ class Str(Element):
         # does not use the standard python 'bin' function to keep 
         # the right number of prefixed 0 bits
         h = hex(self)
-        binary = ''
-        for i in xrange(0, len(h), 2):
-            b = format( int(h[i:i+2], 16), 'b' )
-            binary += ( 8-len(b) ) * '0' + b
-        return binary
+        if not h:
+            return ''
+        return format( int(h, 16), 'b' ).zfill( len(h)*4 )
     
     def __hex__(self):
         return self().encode('hex')
@@ -421,24 +618,22 @@ class Str(Element):
             ret = '0b%s' % self.__bin__()
         # check for the best human-readable representation
         elif self.Repr == 'hum':
-            # standard return
-            ret = repr( self() )
-            # complex return:
-            # allow to assign a full Block or Layer to a Str...
-            if self.__is_intern_inst(self.Pt):
-                ret = repr(self.Pt)
-            if self.__is_intern_inst(self.Val):
-                ret = repr(self.Val)
+            # the representation which applies last is the only one computed
+            Pt, Val = self.Pt, self.Val
+            # self.Val can be a raw value... still
+            # (which includes a full Block or Layer, or a list of them)
+            if Val is not None:
+                ret = repr(Val)
             # allow to assign a list or tuple of Block or Layer...
-            if isinstance(self.Pt, (list, tuple)) \
-            and False not in map(self.__is_intern_inst, self.Pt):
-                ret = '|'.join(map(repr, self.Pt))
-            if isinstance(self.Val, (list, tuple)) \
-            and False not in map(self.__is_intern_inst, self.Val):
-                ret = '|'.join(map(repr, self.Val))
-            # finally, self.Val can be a raw value... still
-            if self.Val is not None and hasattr(self.Val, '__repr__'):
-                ret = repr(self.Val)
+            elif isinstance(Pt, (list, tuple)) \
+            and False not in map(self.__is_intern_inst, Pt):
+                ret = '|'.join(map(repr, Pt))
+            # allow to assign a full Block or Layer to a Str...
+            elif self.__is_intern_inst(Pt):
+                ret = repr(Pt)
+            # standard return
+            else:
+                ret = repr( self() )
         # truncate representation if string too long:
         # avoid terminal panic...
         if len(ret) <= self._repr_limit:
@@ -487,9 +682,20 @@ class Str(Element):
                     % (repr(string), self.CallName, repr(self)))
     
     def map_ret(self, string=''):
+        if isinstance(string, BitReader):
+            # the BitReader is consumed in place
+            l = self.map_len()
+            self.map(string.left_buf(None if l is None else l*8))
+            string.skip(len(self)*8)
+            return string
         self.map(string)
         return string[len(self):]
     
+    def _decode_lazy(self, buf, off, ln):
+        if ln is None:
+            return buf[off:]
+        return buf[off:off+ln]
+    
     # shar manipulation interface
     def to_shar(self):
         ret = shar()
@@ -528,6 +734,8 @@ class Int(Element):
     TransFunc: when defined, TransFunc(Trans) is used to automate the 
                transparency aspect: used e.g. for conditional element;
     '''
+    __slots__ = ('Type', 'Dict', 'DictFunc', 'Len')
+    
     # endianness is 'little' or 'big'
     _endian = 'big'
     # types format for struct library
@@ -545,7 +753,7 @@ class Int(Element):
                  Type='int32', Dict=None, DictFunc=None,
                  Repr='hum', 
                  Trans=False, TransFunc=None):
-        if CallName or not self.CallName:
+        if CallName or not getattr(self, 'CallName', None):
             self.CallName = CallName
         if ReprName is None: 
             self.ReprName = ''
@@ -594,9 +802,17 @@ class Int(Element):
                     raise AttributeError('TransFunc must be a function')
         if attr == 'Type':
             self.Len = int(val.lstrip('uint'))//8
+        if attr == 'Val' and self._lazy is not None:
+            del self.__dict__['_lazy']
+        memo = _local.memo
+        if memo is not None and attr in ('Pt', 'Val', 'Trans'):
+            memo.version += 1
         object.__setattr__(self, attr, val)
     
     def __call__(self):
+        memo = _local.memo
+        if memo is not None:
+            memo.read(self)
         # when no values are defined at all, arbitrary returns None:
         if self.Val is None and self.Pt is None:
             # instead of "return None" 
@@ -608,12 +824,19 @@ class Int(Element):
         elif self.Val is not None: 
             return self.__confine( self.Val )
         elif self.PtFunc is not None: 
-            if self.safe: 
-                assert( type(self.PtFunc(self.Pt)) in (int, long) )
-            return self.__confine(self.PtFunc(self.Pt))
+            # automated value computed once when building a Layer
+            memo = _local.memo
+            if memo is not None:
+                return memo.get(self, self.__pt_val)
+            return self.__pt_val()
         else:
             return self.__confine(int(self.Pt))
     
+    def __pt_val(self):
+        if self.safe: 
+            assert( type(self.PtFunc(self.Pt)) in (int, long) )
+        return self.__confine(self.PtFunc(self.Pt))
+    
     def __confine(self, value):
         # unsigned
         if self.Type[0] == 'u':
@@ -718,11 +941,18 @@ class Int(Element):
     def map_ret(self, string=''):
         l = len(self)
         if 0 < l <= len(string):
+            if isinstance(string, BitReader):
+                # the BitReader is consumed in place
+                self.map(string.get_buf(l*8))
+                return string
             self.map(string)
             return string[l:]
         else:
             return string
     
+    def _decode_lazy(self, buf, off, ln):
+        return self.__unpack(buf[off:off+ln])
+    
     def __pack(self):
         # manage endianness (just in case...)
         if self._endian == 'little': e = '<'
@@ -823,6 +1053,8 @@ class Bit(Element):
     TransFunc: when defined, TransFunc(Trans) is used to automate the 
                transparency aspect: used e.g. for conditional element;
     '''
+    __slots__ = ('BitLen', 'BitLenFunc', 'Dict', 'DictFunc')
+    
     # for object representation
     _reprs = ['hex', 'bin', 'hum']
     
@@ -831,7 +1063,7 @@ class Bit(Element):
                  BitLen=1, BitLenFunc=None,
                  Dict=None, DictFunc=None, Repr='bin', 
                  Trans=False, TransFunc=None):
-        if CallName or not self.CallName:
+        if CallName or not getattr(self, 'CallName', None):
             self.CallName = CallName
         if ReprName is None: 
             self.ReprName = ''
@@ -877,17 +1109,32 @@ class Bit(Element):
             elif attr == 'TransFunc':
                 if val is not None and not isinstance(val, type_funcs) :
                     raise AttributeError('TransFunc must be a function')
+        if attr == 'Val' and self._lazy is not None:
+            del self.__dict__['_lazy']
+        memo = _local.memo
+        if memo is not None and attr in ('Pt', 'Val', 'Trans'):
+            memo.version += 1
         object.__setattr__(self, attr, val)
     
     def __call__(self):
+        memo = _local.memo
+        if memo is not None:
+            memo.read(self)
         if self.Val is None and self.Pt is None: return 0
         if self.Val is not None: return self.__confine(self.Val) 
         elif self.PtFunc is not None:
-            if self.safe:
-                assert( type(self.PtFunc(self.Pt)) is int )
-            return self.__confine(self.PtFunc(self.Pt))
+            # automated value computed once when building a Layer
+            memo = _local.memo
+            if memo is not None:
+                return memo.get(self, self.__pt_val)
+            return self.__pt_val()
         else: return self.__confine(int(self.Pt))
     
+    def __pt_val(self):
+        if self.safe:
+            assert( type(self.PtFunc(self.Pt)) is int )
+        return self.__confine(self.PtFunc(self.Pt))
+    
     def __confine(self, value):
         # makes sure value provided does not overflow bit length
         return max( 0, min( pow(2, self.bit_len())-1, value ))
@@ -901,12 +1148,10 @@ class Bit(Element):
         # manages Element transparency
         if self.is_transparent():
             return ''
-        # do it the dirty way:
-        h = self.__hex__()
-        if not h:
+        bitlen = self.bit_len()
+        if not bitlen:
             return ''
-        if len(h) % 2: h = ''.join(('0', h))
-        return str(shtr(unhexlify(h)) << (8-(self.bit_len()%8))%8)
+        return _int_to_bytes(self() << (-bitlen % 8), 1 + (bitlen-1)//8)
     
     def __len__(self):
         # just for fun here, 
@@ -1004,10 +1249,12 @@ class Bit(Element):
     
     def map(self, string=''):
         # map each bit of the string from left to right
-        # using the shtr() class to shift the string
-        # string must be ascii-encoded (see shtr)
+        # using the BitReader() class to read the string (or shtr) 
+        # without copying it
         if not self.is_transparent():
-            self.map_bit( shtr(string).left_val(self.bit_len()) )
+            if not isinstance(string, BitReader):
+                string = BitReader(string)
+            self.map_bit( string.left_val(self.bit_len()) )
     
     def map_bit(self, value=0):
         # map an int / long value
@@ -1018,12 +1265,22 @@ class Bit(Element):
     def map_ret(self, string=''):
         if self.is_transparent():
             return string
+        elif isinstance(string, BitReader):
+            # the BitReader is consumed in place
+            self.map_bit( string.get_val(self.bit_len()) )
+            return string
         else:
             shtring = shtr(string)
             bitlen = self.bit_len()
             self.map_bit( shtring.left_val(bitlen) )
             return shtring << bitlen
     
+    def _decode_lazy(self, buf, off, ln):
+        # off and ln are in bits here
+        end = off + ln
+        val = int(hexlify(buf[off//8:1+(end-1)//8]), 16)
+        return int( (val >> (-end % 8)) & ((1<<ln)-1) )
+    
     # shar manipulation interface
     def to_shar(self):
         ret = shar()
@@ -1078,6 +1335,13 @@ class Layer(object):
     #
     # represent transparent elements in __repr__()
     _repr_trans = True
+    #
+    # lazy mapping for byte-aligned Layers: elements only record where they
+    # stand in the buffer and are decoded when their value is accessed;
+    # str() returns the original buffer, with only the elements assigned since
+    # serialized again and spliced into it (mapped lengths and checksums are 
+    # kept, unless reautomatize() is called on them)
+    _lazy_map = False
     
     # structure description:
     constructorList = []
@@ -1098,71 +1362,75 @@ class Layer(object):
         self.inBlock = False
         self.Trans = Trans
         
-        CallNames = []
-        for e in self.constructorList:
-            # This is for little players
-            #if isinstance(e, Element):
-            # OK, now let's put the balls on the table and
-            # make Layer recursive (so will have Layer() into Layer())
-            if isinstance(e, (Element, Layer)):
-                if e.CallName in self.Reservd:
-                    if self.safe or self.dbg >= ERR:
-                        log(ERR, '(Layer - %s) using a reserved '
-                            'attribute as CallName %s: aborting...' \
-                          % (self.__class__, e.CallName))
-                    return
-                if e.CallName in CallNames:
-                    if self.dbg >= WNG:
-                        log(WNG, '(Layer - %s) different elements have ' \
-                           'the same CallName %s' % (self.__class__, e.CallName))
-                if isinstance(e, Element):
-                    self.append(e.clone())
-                # do not clone Layer() as it breaks dynamic element inside
-                # i.e. element with PtFunc, LenFunc, DictFunc, TransFunc defined
-                # TODO: patch Layer().clone() method to solve this...
-                # lets try with deepcopy()
-                elif isinstance(e, Layer):
-                    self.append(e.clone())
-            CallNames.append(e.CallName)
+        # the constructorList is compiled once per class into a template,
+        # which provides cheap copies of its elements and the fixed length
+        # of the Layer (when it can be deduced)
+        tmpl = self.__class__.get_template(self.constructorList)
+        self.elementList = tmpl.elements()
+        self.__dict__['_int_runs'] = tmpl.int_runs
+        if tmpl.err is not None:
+            if self.safe or self.dbg >= ERR:
+                log(ERR, '(Layer - %s) using a reserved '
+                    'attribute as CallName %s: aborting...' \
+                  % (self.__class__, tmpl.err))
+            return
         
         # check for bit alignment until we lost information on the Layer length
         # also check if fixed length can be deduced
-        self.BitLen = 0
-        for e in self.elementList:
-            if self.dbg >= DBG:
-                log(DBG, '(Layer - %s) length verification for %s' \
-                    % (self.__class__, e.CallName))
-            if isinstance(e, Bit):
-                self.BitLen += e.bit_len()
-            elif hasattr(e, 'Len') and type(e.Len) is int:
-                self.BitLen += (e.Len)*8
-            else:
-                self.BitLen, self.Len = 'var', 'var'
-                break
-        if type(self.BitLen) is int :
-            if self.BitLen % 8:
-                if self.dbg >= WNG and self._byte_aligned:
-                    log(WNG, '(Layer - %s) Elements seem not to be '\
-                        'byte-aligned: hope you expect it!' \
-                        % self.__class__)
-                # record length in bit (precise one) and in bytes (unprecised)
-                self.Len = 1 + self.BitLen//8
-            else:
-                self.Len = self.BitLen//8
+        if tmpl.BitLen is not None:
+            self.BitLen, self.Len = tmpl.BitLen, tmpl.Len
+        else:
+            self.BitLen = 0
+            for e in self.elementList:
+                if self.dbg >= DBG:
+                    log(DBG, '(Layer - %s) length verification for %s' \
+                        % (self.__class__, e.CallName))
+                if isinstance(e, Bit):
+                    self.BitLen += e.bit_len()
+                elif hasattr(e, 'Len') and type(e.Len) is int:
+                    self.BitLen += (e.Len)*8
+                else:
+                    self.BitLen, self.Len = 'var', 'var'
+                    break
+            if type(self.BitLen) is int :
+                if self.BitLen % 8:
+                    if self.dbg >= WNG and self._byte_aligned:
+                        log(WNG, '(Layer - %s) Elements seem not to be '\
+                            'byte-aligned: hope you expect it!' \
+                            % self.__class__)
+                    # record length in bit (precise one) 
+                    # and in bytes (unprecised)
+                    self.Len = 1 + self.BitLen//8
+                else:
+                    self.Len = self.BitLen//8
         #
         # check additional args that would correspond to contained Element
-        args = kwargs.keys()
-        if self.dbg >= DBG:
-            log(DBG, '(Layer - %s) init kwargs: %s' % (self.__class__, args))
-        for e in self:
-            if hasattr(e, 'CallName') and hasattr(e, 'Pt') \
-            and e.CallName in args:
-                e.Pt = kwargs[e.CallName]
+        if kwargs:
+            args = kwargs.keys()
+            if self.dbg >= DBG:
+                log(DBG, '(Layer - %s) init kwargs: %s' % (self.__class__, args))
+            for e in self:
+                if hasattr(e, 'Pt') and e.CallName in kwargs:
+                    e.Pt = kwargs[e.CallName]
+    
+    # the template is stored in the class itself (not inherited by subclasses),
+    # and rebuilt if the constructorList has been replaced
+    @classmethod
+    def get_template(cls, constructorList=None):
+        if constructorList is None:
+            constructorList = cls.constructorList
+        tmpl = cls.__dict__.get('_template')
+        if tmpl is None or tmpl.constructorList is not constructorList \
+        or tmpl.num != len(constructorList):
+            tmpl = LayerTemplate(cls, constructorList)
+            if constructorList is cls.constructorList:
+                type.__setattr__(cls, '_template', tmpl)
+        return tmpl
     
     # define some basic list facilities for managing elements into the Layer, 
     # through the "elementList" attribute:
     def __iter__(self):
-        if 'elementList' in self.__dict__.keys():
+        if 'elementList' in self.__dict__:
             return self.__dict__['elementList'].__iter__()
         else: return [].__iter__()
     
@@ -1189,14 +1457,14 @@ class Layer(object):
         self.elementList[num].Val = value
     
     def append(self, element):
-        CallNames = self.getattr()
         #if isinstance(element, Element):
         # make Layer recursive:
         if isinstance(element, (Element, Layer)):
-            if self.dbg >= WNG and element.CallName in CallNames:
+            if self.dbg >= WNG and element.CallName in self.getattr():
                 log(WNG, '(Layer - %s) different elements have the same '\
                          'CallName %s' % (self.__class__, element.CallName))
             self.elementList.append(element)
+            self.__index_elt(element)
     
     def __lshift__(self, element):
         self.append(element)
@@ -1204,14 +1472,17 @@ class Layer(object):
             element.inc_hierarchy(self.hierarchy)
     
     def insert(self, index, element):
-        CallNames = self.getattr()
         #if isinstance(element, Element):
         # make Layer recursive:
         if isinstance(element, (Element, Layer)):
-            if self.dbg >= WNG and element.CallName in CallNames:
+            if self.dbg >= WNG and element.CallName in self.getattr():
                 log(WNG, '(Layer - %s) different elements have the same '\
                          'CallName %s' % (self.__class__, element.CallName))
             self.elementList.insert(index, element)
+            if element is self.elementList[-1]:
+                self.__index_elt(element)
+            else:
+                self.reindex()
     
     def __rshift__(self, element):
         self.insert(0, element)
@@ -1226,6 +1497,7 @@ class Layer(object):
         for e in self:
             if e == element:
                 self.elementList.remove(element)
+        self.reindex()
     
     def replace(self, current_element, new_element):
         # check index of the element ro replace
@@ -1244,39 +1516,71 @@ class Layer(object):
     # with elements which could have same CallName
     # 
     # list facilities can be preferred in this case
+    #
+    # elements are referenced by their CallName and ReprName in the ._index
+    # dict, which is kept up to date by the methods modifying the elementList;
+    # when several elements have the same name, the 1st one is referenced
+    # (if the elementList is modified in place, .reindex() must be called)
     def __getattr__(self, name):
-        for e in self:
-            if name in (e.CallName, e.ReprName):
-                return e
-            #l = []
-            #if name == e.CallName or name == e.ReprName: 
-            #    l.append( e )
-        #if len(l) == 1: return l[0]
-        #else: return l
-        return object.__getattribute__(self, name)
+        try:
+            return self.__dict__['_index'][name]
+        except KeyError:
+            return object.__getattribute__(self, name)
         raise AttributeError( '"Layer" has no "%s" attribute: %s' \
               % (name, self.getattr()) )
     
     def __setattr__(self, name, value):
         # special handling here: use to override the element value 
         # with its "Val" attribute (like when mapping a string)
-        for e in self:
-            if name == e.CallName or name == e.ReprName: 
-                e.Val = value
-                return
-        return object.__setattr__(self, name, value)
-        raise AttributeError( '"Layer" has no "%s" attribute: %s' \
-              % (name, self.getattr()) )
+        index = self.__dict__.get('_index')
+        if index and name in index:
+            index[name].Val = value
+            return
+        memo = _local.memo
+        if memo is not None and name == 'Trans':
+            memo.version += 1
+        elif name == 'hierarchy' and self.__dict__.get('inBlock'):
+            _hier[0] += 1
+        object.__setattr__(self, name, value)
+        if name == 'elementList':
+            self.reindex()
     
     def __hasattr__(self, name):
-        for e in self:
-            if name == e.CallName or name == e.ReprName: 
-                return True
+        if name in self.__dict__.get('_index', ()):
+            return True
         #return object.__hasattr__(self, name): 
         # not needed (does not work in the code... but works in python...)
         raise AttributeError( '"Layer" has no "%s" attribute: %s' \
               % (name, self.getattr()) )
     
+    def __index_elt(self, element):
+        self.__dict__.pop('_int_runs', None)
+        memo = _local.memo
+        if memo is not None:
+            memo.version += 1
+        index = self.__dict__['_index']
+        if element.CallName and element.CallName not in index:
+            index[element.CallName] = element
+        if element.ReprName and element.ReprName not in index:
+            index[element.ReprName] = element
+    
+    def reindex(self):
+        self.__dict__.pop('_int_runs', None)
+        memo = _local.memo
+        if memo is not None:
+            memo.version += 1
+        object.__setattr__(self, '_index', {})
+        for e in self:
+            self.__index_elt(e)
+    
+    # runs of contiguous Int elements, packed and unpacked together when
+    # serializing and mapping the Layer; rebuilt after the elementList
+    # has been modified
+    def __get_int_runs(self):
+        if '_int_runs' not in self.__dict__:
+            self.__dict__['_int_runs'] = _int_runs(self.elementList)
+        return self.__dict__['_int_runs']
+    
     # method for managing the Layer hierarchy (easy):
     def set_hierarchy(self, hier=0):
         self.hierarchy = hier
@@ -1306,95 +1610,150 @@ class Layer(object):
     def __str__(self):
         if self.dbg >= DBG:
             log(DBG, '(Layer.__str__) entering str() for %s' % self.CallName)
+        # inner Layers are serialized once when building an outermost 
+        # Layer or Block, until one of their elements is changed 
+        # (see BuildMemo)
+        memo = _local.memo
+        if memo is None:
+            return _build(self.__str_build)
+        return memo.get(self, self.__str_build, self.elementList)
+    
+    def __str_build(self):
         # First take care of transparent Layer (e.g. in L3Mobile)
         if hasattr(self, 'Trans') and self.Trans:
             return ''
+        # lazily mapped Layer: the original buffer is returned, 
+        # with only the elements assigned since spliced into it
+        span = self.__lazy_span()
+        if span is not None:
+            return self.__str_splice(span)
         # dispatch to the right method depending of byte alignment
         if self._byte_aligned is True:
             return self.__str_aligned()
         else:
             return self.__str_unaligned()
     
+    def __str_splice(self, span):
+        # span[6] lists the data ranges of the lazy elements, in order: 
+        # the ranges of elements still lazy are taken from the buffer at once,
+        # those of elements assigned since (e.g. with reautomatize() for 
+        # lengths or checksums to be computed again) are serialized again
+        buf, s = span[0], []
+        start = span[1]
+        for elts, off, end in span[6]:
+            for e in elts:
+                if not e.is_lazy():
+                    break
+            else:
+                continue
+            if off > start:
+                s.append( buf[start:off] )
+            if isinstance(elts[0], Bit):
+                # a group of contiguous Bit elements, ending on a byte boundary
+                BitAcc, BitAcc_len = 0, 0
+                for b in elts:
+                    bitlen = b.bit_len()
+                    if bitlen:
+                        BitAcc = (BitAcc << bitlen) + b()
+                        BitAcc_len += bitlen
+                s.append( _int_to_bytes(BitAcc, BitAcc_len//8) )
+            else:
+                s.append( str(elts[0]) )
+            start = end
+        if not s:
+            return buf[start:span[2]]
+        if span[2] > start:
+            s.append( buf[start:span[2]] )
+        return ''.join(s)
+    
     def __str_unaligned(self):
-        # then init resulting string 
-        # and bit offset needed to shift unaligned strings
-        s = []
-        off = 0
+        # each element is appended to a BitWriter, at the bit offset 
+        # where the previous one ended, without shifting what is already 
+        # written
+        w = BitWriter()
         # loop on each element into the Layer
         # also on Layer into Layer...
         for e in self:
-            shtr_e, bitlen_e = e.shtr(), e.bit_len()
-            rest_e = bitlen_e % 8
-            if self.dbg >= DBG:
-                log(DBG, '(Layer.__str__) %s: %s, %i, offset: %i' \
-                    % (e.CallName, hexlify(shtr_e), bitlen_e, off))
-            # if s is not byte-aligned and e is not transparent
-            # update the last component of s
-            if off and shtr_e:
-                # 1st update last bits of s with MSB of e, 
-                # before stacking with the rest of e
-                # (8 - off) is the room left in the LSB of s
-                s[-1] = ''.join((s[-1][:-1],
-                                  chr(ord(s[-1][-1]) + shtr_e.left_val(8-off)),
-                                  (shtr_e << (8-off))
-                                ))
-                # take care in case the shifting of e voids its last byte
-                if rest_e and rest_e-(8-off) <= 0:
-                    s[-1] = s[-1][:-1]
-                # update offset
-                if rest_e:
-                    off += bitlen_e
-                    off %= 8
-            # in case s is already aligned, append a new component to s
-            elif shtr_e:
-                s.append(shtr_e)
-                # update offset
-                if rest_e:
-                    off += rest_e
+            if isinstance(e, Bit) and _is_std(e, Bit, '__str__', '__call__'):
+                if not e.is_transparent():
+                    w.put_val(e(), e.bit_len())
+            else:
+                str_e = str(e)
+                if str_e:
+                    w.put_buf(str_e, e.bit_len())
             if self.dbg >= DBG:
-                log(DBG, '(Layer.__str__) %s' % hexlify(s))
+                log(DBG, '(Layer.__str__) %s: %i, offset: %i' \
+                    % (e.CallName, e.bit_len(), w.bit_len()))
         # well done!
-        return ''.join(s)
+        return w.get_buf()
     
     def __str_aligned(self):
         s = []
-        BitStream = ''
+        # contiguous "Bit" elements are stacked into an integer accumulator
+        # BitAcc of BitAcc_len bits, which is flushed to s by whole bytes
+        BitAcc, BitAcc_len = 0, 0
+        runs, elts = self.__get_int_runs(), self.elementList
+        i, num = 0, len(elts)
         # loop on each element in the Layer
         # also on Layer into Layer...
-        for e in self:
+        while i < num:
+            e = elts[i]
+            i += 1
+            # runs of Int elements are packed at once
+            if i-1 in runs:
+                end, types, fmt = runs[i-1]
+                run = elts[i-1:end]
+                st = _int_struct(run, types, fmt)
+                if st is not None:
+                    if BitAcc_len:
+                        self.__is_aligned(_int_to_bin(BitAcc, BitAcc_len))
+                        BitAcc, BitAcc_len = 0, 0
+                    # Val is packed as is when defined, values out of 
+                    # the Int range are then confined by standard processing
+                    try:
+                        s.append( st.pack(*[r() if r.Val is None else r.Val \
+                                            for r in run]) )
+                    except StructError:
+                        pass
+                    else:
+                        i = end
+                        continue
             # need special processing for stacking "Bit" element: 
-            #   using "BitStream" variable
             #   works only with contiguous "Bit" elements 
             #   to avoid byte-misalignment of other element in the Layer 
             #   (and programming complexity with shifting everywhere...)
             if isinstance(e, Bit):
                 # manage element transparency with (Trans, TranFunc)
-                # and build a bitstream ('100110011...1101011') from Bit values
                 if not e.is_transparent():
-                    BitStream += str(e.__bin__())
-                # when arriving on a byte boundary from bitstream, 
+                    bitlen = e.bit_len()
+                    if bitlen:
+                        BitAcc = (BitAcc << bitlen) + e()
+                        BitAcc_len += bitlen
+                # when arriving on a byte boundary, 
                 # create bytes and put it into the s variable
-                if len(BitStream) >= 8:
-                    while 1:
-                        s.append( pack('!B', int(BitStream[:8], 2)) )
-                        BitStream = BitStream[8:]
-                        if len(BitStream) < 8:
-                            break
+                if BitAcc_len >= 8:
+                    rest = BitAcc_len % 8
+                    s.append( _int_to_bytes(BitAcc >> rest, BitAcc_len//8) )
+                    BitAcc &= (1<<rest)-1
+                    BitAcc_len = rest
                 if self.dbg >= DBG:
                     log(DBG, '(Element) %s: %s, %s\nBitstream: %s' \
-                        % (e.CallName, e(), e.__bin__(), BitStream))
+                        % (e.CallName, e(), e.__bin__(), 
+                           _int_to_bin(BitAcc, BitAcc_len)))
             # when going to standard Str or Int element, 
             # or directly end of __str__ function 
-            # verify the full BitStream has been consumed
+            # verify all the stacked bits have been consumed
             # and continue to build the resulting string easily...
             else:
                 # possible byte mis-alignment for Str / Int is not managed...
-                self.__is_aligned(BitStream)
-                BitStream = ''
+                if BitAcc_len:
+                    self.__is_aligned(_int_to_bin(BitAcc, BitAcc_len))
+                    BitAcc, BitAcc_len = 0, 0
                 if isinstance(e, Layer) and not e.Trans \
                 or isinstance(e, Element):
                     s.append( str(e) )
-        self.__is_aligned(BitStream)
+        if BitAcc_len:
+            self.__is_aligned(_int_to_bin(BitAcc, BitAcc_len))
         return ''.join(s)
     
     def __is_aligned(self, BitStream):
@@ -1449,15 +1808,65 @@ class Layer(object):
             return shtr(self).left_val(self.bit_len())
     
     def __repr__(self):
+        out = []
+        self._show_repr(out)
+        return ''.join(out)
+    
+    def _show_repr(self, out):
+        # writes the representation of the Layer into the list out
+        entry = self._show_entry()
+        if entry is None:
+            parts = self._show_parts()
+        else:
+            if entry[2] is None:
+                entry[2] = self._show_parts()
+            parts = entry[2]
+        for p in parts:
+            if isinstance(p, str):
+                out.append(p)
+            elif _show_std(p):
+                p._show_repr(out)
+            else:
+                out.append( repr(p) )
+    
+    def _show_entry(self):
+        # cache entry of the rendering of the Layer, [key, items, parts], 
+        # with items and parts built when first needed;
+        # it is kept while the elements are unchanged (see _show_key());
+        # the Layer is rendered without any cache the first time 
+        # (None is returned), and is cached from the next time on
+        entry = self.__dict__.get('_show_cache')
+        if entry is None:
+            self.__dict__['_show_cache'] = False
+            return None
+        key = _show_key(self)
+        if key is None or entry is False or entry[0] != key:
+            entry = [key, None, None]
+            if key is not None:
+                self.__dict__['_show_cache'] = entry
+        return entry
+    
+    def _show_parts(self):
+        # representation of the Layer, with the inner Layers 
+        # to be represented in place
         t = ''
         if self.Trans:
             t = ' - transparent '
-        s = '<%s[%s]%s: ' % ( self.ReprName, self.CallName, t )
-        for e in self:
-            if self._repr_trans or not e.is_transparent():
-                s += '%s(%s):%s, ' % ( e.CallName, e.ReprName, repr(e) )
-        s = s[:-2] + '>'
-        return s
+        parts = ['<%s[%s]%s: ' % ( self.ReprName, self.CallName, t )]
+        repr_trans = self._repr_trans
+        for e in self.__dict__.get('elementList', ()):
+            if repr_trans or not e.is_transparent():
+                if isinstance(e, Layer):
+                    parts.extend( ('%s(%s):' % (e.CallName, e.ReprName), e, 
+                                   ', ') )
+                else:
+                    parts.extend( ('%s(%s):%s' % (e.CallName, e.ReprName, 
+                                                  repr(e)), ', ') )
+        if len(parts) > 1:
+            parts[-1] = '>'
+        else:
+            parts[0] = parts[0][:-2] + '>'
+        return parts
     
     def map_len(self):
         return len(self)
@@ -1473,7 +1882,9 @@ class Layer(object):
             print('%s : %s' % ( a, repr(self.__getattr__(a))) )
     
     def clone(self):
-        return deepcopy(self)
+        # structural copy of the Layer (see _clone()): as with deepcopy(),
+        # a Layer in a Block is cloned together with its Block
+        return _clone(self, {})
     
     def is_transparent(self):
         if self.Trans:
@@ -1481,23 +1892,76 @@ class Layer(object):
         else:
             return False
     
-    def show(self, with_trans=False):
+    def show(self, with_trans=False, depth=None, width=None):
+        # depth: number of levels of inner Layers rendered, 
+        # the deeper ones having only their title rendered;
+        # width: number of elements rendered in each Layer
+        if self.is_transparent() and not with_trans:
+            return ''
+        out = []
+        self._show_write(out, '', depth, width)
+        return ''.join(out)[:-1]
+    
+    def _show_items(self):
+        # rendering of the Layer: its title, then for each element not empty,
+        # its rendering or the inner Layer to be rendered
         re, tr = '', ''
         if self.ReprName != '':
             re = '%s ' % self.ReprName
         if self.is_transparent():
-            # TODO: eval the best convinience here
-            if not with_trans:
-                return ''
             tr = ' - transparent'
-        # Layer content
-        str_lst = [e.show().replace('\n', '\n ') for e in self]
-        # insert spaces for nested layers and filter out empty content
-        str_lst = [' %s\n' % s for s in str_lst if s]
-        # insert layer's title
-        str_lst.insert(0, '### %s[%s]%s ###\n' % (re, self.CallName, tr))
-        # return full inline string without last CR
-        return ''.join(str_lst)[:-1]
+        items = ['### %s[%s]%s ###' % (re, self.CallName, tr)]
+        for e in self.__dict__.get('elementList', ()):
+            if isinstance(e, Layer):
+                if not e.is_transparent():
+                    items.append(e)
+            else:
+                s = e.show()
+                if s:
+                    items.append(s)
+        return items
+    
+    def _show_write(self, out, indent, depth, width):
+        # writes the rendering of the Layer into the list out, line by line
+        entry = self._show_entry()
+        if entry is None:
+            items = self._show_items()
+        else:
+            if entry[1] is None:
+                entry[1] = self._show_items()
+            items = entry[1]
+        out.extend( (indent, items[0], '\n') )
+        if depth is not None and depth <= 0:
+            return
+        sub = indent + ' '
+        for i in xrange(1, len(items)):
+            if width is not None and i > width:
+                out.extend( (sub, '... (%i more)' % (len(items)-i), '\n') )
+                break
+            e = items[i]
+            if isinstance(e, str):
+                out.extend( (sub, e.replace('\n', '\n'+sub), '\n') )
+            elif _show_std(e):
+                e._show_write(out, sub, None if depth is None else depth-1,
+                              width)
+            else:
+                # Layer with its own show()
+                e = e.show(False, None if depth is None else depth-1, width)
+                if e:
+                    out.extend( (sub, e.replace('\n', '\n'+sub), '\n') )
+    
+    def export(self, with_trans=False, names=False):
+        # exports the values of the elements which are not transparent, 
+        # in an OrderedDict by CallName (see Element.export()), 
+        # inner Layers being exported in place
+        ret = OrderedDict()
+        for e in self.__dict__.get('elementList', ()):
+            if with_trans or not e.is_transparent():
+                name = e.CallName
+                if name in ret:
+                    name = _export_name(ret, name)
+                ret[name] = e.export(with_trans, names)
+        return ret
     
     def map(self, string=''):
         if self.dbg >= DBG:
@@ -1505,57 +1969,30 @@ class Layer(object):
         # First take care of transparent Layer (e.g. in L3Mobile)
         if hasattr(self, 'Trans') and self.Trans:
             return
+        self.__dict__.pop('_lazy_span', None)
         # dispatch to the right method depending of byte alignment
         if self._byte_aligned is True:
-            self.__map_aligned(string)
+            if isinstance(string, BitReader):
+                string = string.to_shtr()
+            self.__map_buf(string, 0, self._lazy_map)
         else:
-            self.__map_unaligned(string)
+            # map() does not consume the BitReader it may get
+            self.__map_reader(BitReader(string))
     
-    def __map_unaligned(self, string=''):
-        s = shtr(string)
-        # otherwise go to map() over all elements
+    def __map_reader(self, r):
+        # maps each element one after the other on the BitReader r,
+        # which is consumed in place and returned
         for e in self:
             if self.dbg >= DBG:
-                log(DBG, '(Layer.__map_unaligned) %s, bit length: %i' \
-                    % (e.CallName, e.bit_len()))
-                log(DBG, '(Layer.__map_unaligned) string: %s' % hexlify(s))
-            # this is beautiful
-            s = e.map_ret(s)
-    
-    def __map_aligned(self, string=''):
-        # Bit() elements are processed intermediary: 
-        # 1st placed into BitStack
-        # and when BitStack is byte-aligned (check against BitStack_len)
-        # string buffer is then mapped to it
-        self.__BitStack = []
-        self.__BitStack_len = 0
-        # Furthermore, it manages only contiguous Bit elements 
-        # for commodity... otherwise, all other elements should be shifted
-        #
-        for e in self:
-            # special processing for Bit() element:
-            if isinstance(e, Bit):
-                self.__add_to_bitstack(e)
-                # if BitStack is byte aligned, map string to it:
-                if self.__BitStack_len % 8 == 0:
-                    string = self.__map_to_bitstack(string)
-            # for other elements (Str(), Int(), Layer()), standard processing:   
+                log(DBG, '(Layer.__map_reader) %s, bit length: %i, '\
+                    'offset: %i' % (e.CallName, e.bit_len(), r.off))
+            if _reads_bits(e):
+                e.map_ret(r)
             else:
-                if self.__BitStack_len > 0 and self.dbg >= ERR:
-                    log(WNG, '(Layer - %s) some of the Bit elements have not ' \
-                        'been mapped in the "Layer": not byte-aligned' \
-                        % self.__class__)
-                if isinstance(e, (Layer, Element)) and not e.is_transparent():
-                    if len(string) < e.map_len() and self.dbg >= WNG:
-                        log(WNG, '(Layer - %s) String buffer not long ' \
-                            'enough for %s' % (self.__class__, e.CallName))
-                        #if self.safe:
-                        #    return
-                    e.map(string)
-                    string = string[e.map_len():]
-        # delete .map() *internal* attributes
-        del self.__BitStack
-        del self.__BitStack_len
+                # elements with a specific map_ret() get the rest of the 
+                # buffer as a shtr, and return the rest of it
+                r.reset(e.map_ret(r.to_shtr()))
+        return r
     
     def __add_to_bitstack(self, bit_elt):
         # check for Bit() element transparency
@@ -1599,6 +2036,212 @@ class Layer(object):
         # finally return string to parent method .map()
         return string
     
+    def __map_buf(self, buf, off=0, lazy=False):
+        # maps the buffer starting at offset `off', without slicing the rest
+        # of it after each element:
+        # Str and Int elements get only their own part of the buffer,
+        # nested aligned Layers are mapped the same way on the same buffer
+        # and elements with specific map() methods get the rest of the buffer
+        #
+        # Bit() elements are processed intermediary: 
+        # 1st placed into BitStack
+        # and when BitStack is byte-aligned (check against BitStack_len)
+        # the buffer is then mapped to it
+        # Furthermore, it manages only contiguous Bit elements 
+        # for commodity... otherwise, all other elements should be shifted
+        #
+        # in lazy mode, elements only record their offset and length;
+        # returns the length of the Layer's string representation when
+        # mapped lazily, None otherwise
+        #
+        # elements' values are partly set directly in their attributes' dict
+        memo = _local.memo
+        if memo is not None:
+            memo.version += 1
+        start, buflen = off, len(buf)
+        # data ranges of lazy elements must be contiguous for str() to return
+        # the original buffer
+        pos, lazy_elts, clean, state = off, [], lazy, []
+        # data range of each lazy element (or group of Bit elements)
+        units = []
+        BitStack, BitStack_len = [], 0
+        # runs of Int elements are unpacked at once, when not mapped lazily
+        runs, elts = {} if lazy else self.__get_int_runs(), self.elementList
+        i, num = 0, len(elts)
+        while i < num:
+            e = elts[i]
+            i += 1
+            if i-1 in runs:
+                end, types, fmt = runs[i-1]
+                run = elts[i-1:end]
+                st = _int_struct(run, types, fmt)
+                if st is not None and off + st.size <= buflen:
+                    if BitStack_len > 0 and self.dbg >= ERR:
+                        log(WNG, '(Layer - %s) some of the Bit elements have '\
+                            'not been mapped in the "Layer": not byte-aligned' \
+                            % self.__class__)
+                    # values are set directly, as done by Int.map()
+                    for r, val in zip(run, st.unpack_from(buf, off)):
+                        if r._lazy is not None:
+                            del r.__dict__['_lazy']
+                        _VAL.__set__(r, val)
+                    off += st.size
+                    i = end
+                    continue
+            # special processing for Bit() element:
+            if isinstance(e, Bit):
+                trans = e.is_transparent()
+                if lazy:
+                    state.append( (trans, e.bit_len()) )
+                if not trans:
+                    BitStack.append(e)
+                    BitStack_len += e.bit_len()
+                if BitStack_len % 8:
+                    continue
+                # BitStack is byte aligned, map the buffer to it:
+                nbytes = BitStack_len // 8
+                if off + nbytes <= buflen:
+                    boff = off*8
+                    for b in BitStack:
+                        bitlen = b.bit_len()
+                        if not bitlen:
+                            continue
+                        if lazy:
+                            b.set_lazy(buf, boff, bitlen)
+                            lazy_elts.append(b)
+                        else:
+                            b.map_bit( b._decode_lazy(buf, boff, bitlen) )
+                        boff += bitlen
+                    if nbytes:
+                        units.append( (tuple(BitStack), off, off + nbytes) )
+                        clean &= (off == pos)
+                        pos = off + nbytes
+                else:
+                    self.__BitStack = BitStack
+                    self.__BitStack_len = BitStack_len
+                    self.__map_to_bitstack(buf[off:])
+                    del self.__BitStack, self.__BitStack_len
+                    clean = False
+                off += nbytes
+                BitStack, BitStack_len = [], 0
+                continue
+            #
+            # for other elements (Str(), Int(), Layer()), standard processing:
+            if BitStack_len > 0 and self.dbg >= ERR:
+                log(WNG, '(Layer - %s) some of the Bit elements have not ' \
+                    'been mapped in the "Layer": not byte-aligned' \
+                    % self.__class__)
+            trans = e.is_transparent()
+            if lazy:
+                state.append( (trans, None) )
+            if trans:
+                continue
+            if self.dbg >= WNG and buflen-off < e.map_len():
+                log(WNG, '(Layer - %s) String buffer not long ' \
+                    'enough for %s' % (self.__class__, e.CallName))
+            if isinstance(e, Str) and _is_std(e, Str, 'map', 'map_len') \
+            and (e.map_len() is None or e.map_len() >= 0):
+                l = e.map_len()
+                end = buflen if l is None else min(buflen, off+l)
+                if lazy:
+                    e.set_lazy(buf, off, l)
+                    lazy_elts.append(e)
+                    units.append( ((e,), off, max(off, end)) )
+                elif l is None:
+                    e.map(buf[off:])
+                else:
+                    e.map(buf[off:off+l])
+                if end > off:
+                    clean &= (off == pos)
+                    pos = end
+                if l is not None:
+                    off += l
+            elif isinstance(e, Int) and _is_std(e, Int, 'map', 'map_len'):
+                if lazy and off + e.Len <= buflen:
+                    e.set_lazy(buf, off, e.Len)
+                    lazy_elts.append(e)
+                    units.append( ((e,), off, off + e.Len) )
+                    clean &= (off == pos)
+                    pos = off + e.Len
+                else:
+                    e.map(buf[off:off+e.Len])
+                    clean = False
+                off += e.Len
+            elif isinstance(e, Layer) and e._byte_aligned is True \
+            and _is_std(e, Layer, 'map', 'map_len', '__str__'):
+                e.__dict__.pop('_lazy_span', None)
+                l = e.__map_buf(buf, off, lazy or e._lazy_map)
+                if l is not None and e.is_lazy():
+                    lazy_elts.append(e)
+                    units.append( ((e,), off, off + l) )
+                    if l:
+                        clean &= (off == pos)
+                        pos = off + l
+                else:
+                    clean = False
+                    l = e.map_len()
+                off += l
+            else:
+                e.map(buf[off:])
+                clean = False
+                l = e.map_len()
+                if l is not None:
+                    off = off+l if l >= 0 else max(off, buflen+l)
+        #
+        if not lazy:
+            return None
+        if clean and state == self.__lazy_state():
+            self.__dict__['_lazy_span'] = (buf, start, pos, 
+                                           tuple(self.elementList), lazy_elts,
+                                           self.__lazy_state(), units)
+            return pos - start
+        return len(self.__str__())
+    
+    def __lazy_state(self):
+        # transparency of all elements and bit length of Bit elements,
+        # to be checked before returning the buffer of a lazy Layer
+        return [(e.is_transparent(), e.bit_len() if isinstance(e, Bit) \
+                 else None) for e in self]
+    
+    def __lazy_span(self):
+        # returns the lazy span of the Layer, if it has been mapped lazily
+        # and its elements and their transparency are unchanged since,
+        # None otherwise
+        span = self.__dict__.get('_lazy_span')
+        if span is None:
+            return None
+        elts = span[3]
+        if len(elts) != len(self.elementList) \
+        or False in map(lambda x, y: x is y, elts, self.elementList) \
+        or span[5] != self.__lazy_state():
+            return None
+        return span
+    
+    def is_lazy(self):
+        # returns True if the Layer has been mapped lazily and none of its
+        # lazy elements has been assigned since
+        span = self.__lazy_span()
+        if span is None:
+            return False
+        for e in span[4]:
+            if not e.is_lazy():
+                return False
+        return True
+    
+    # map_at() maps a buffer to a Layer from the offset `off', without copying
+    # the rest of the buffer when possible, and returns the length mapped
+    def map_at(self, buf, off=0):
+        if not _is_std(self, Layer, 'map', 'map_len', '__str__') \
+        or self._byte_aligned is not True \
+        or hasattr(self, 'Trans') and self.Trans:
+            self.map(buf[off:])
+            return self.map_len()
+        self.__dict__.pop('_lazy_span', None)
+        l = self.__map_buf(buf, off, self._lazy_map)
+        if l is None:
+            return self.map_len()
+        return l
+    
     # map_ret() maps a buffer to a Layer, the unaligned way,
     # and returns the rest of the buffer that was not mapped
     def map_ret(self, string=''):
@@ -1607,20 +2250,26 @@ class Layer(object):
         # First take care of transparent Layer (e.g. in L3Mobile)
         if hasattr(self, 'Trans') and self.Trans:
             return string
+        self.__dict__.pop('_lazy_span', None)
         if self._byte_aligned is True:
-            self.__map_aligned(string)
-            return string[len(self):]
-        else:
+            if isinstance(string, BitReader):
+                # the BitReader is consumed in place
+                if string.off % 8 == 0 and string.end == len(string.buf)*8:
+                    l = self.__map_buf(string.buf, string.off>>3, 
+                                       self._lazy_map)
+                else:
+                    l = self.__map_buf(string.to_shtr(), 0, self._lazy_map)
+                string.skip(8*(len(self) if l is None else l))
+                return string
+            l = self.__map_buf(string, 0, self._lazy_map)
+            if l is None:
+                return string[len(self):]
+            return string[l:]
+        elif isinstance(string, BitReader):
             # actually, map_ret() is only interesting for unaligned layers
-            s = shtr(string)
-            for e in self:
-                if self.dbg >= DBG:
-                    log(DBG, '(Layer.map_ret) %s, bit length: %i' \
-                        % (e.CallName, e.bit_len()))
-                    log(DBG, '(Layer.map_ret) string: %s' % hexlify(s))
-                # this is beautiful
-                s = e.map_ret(s)
-            return s
+            return self.__map_reader(string)
+        else:
+            return self.__map_reader(BitReader(string)).to_shtr()
     
     # define methods when Layer is in a Block:
     # next, previous, header: return Layer object reference
@@ -1628,13 +2277,9 @@ class Layer(object):
     def get_index(self):
         if self.inBlock is not True: 
             return 0
-        i = 0
-        for l in self.Block:
-            if l == self: return i
-            else:  i += 1
-        # could happen if Layer is placed in several Block()
+        # False could happen if Layer is placed in several Block()
         # and the last Block used is deleted
-        return False
+        return self.Block._nav().pos.get(id(self), False)
     
     def has_next(self):
         if self.inBlock is not True: 
@@ -1661,13 +2306,9 @@ class Layer(object):
         
     def get_header(self):
         if self.has_previous():
-            index = self.get_index()
-            i = index - 1
-            while i >= 0:
-                if self.Block[i].hierarchy == self.hierarchy-1:
-                    return self.Block[i]
-                else:
-                    i -= 1
+            header = self.Block._header(self.get_index(), self.hierarchy)
+            if header is not None:
+                return header
         return RawLayer()
     
     def get_payload(self):
@@ -1676,17 +2317,12 @@ class Layer(object):
         pay = Block('pay')
         if self.has_next():
             index = self.get_index()
-            for l in self.Block[ index+1 : ]:
-                if l.hierarchy > self.hierarchy:
-                    #pay.append( l.clone() )
-                    # not needed to append a clone
-                    # better keep reference to original layer
-                    pay.append( l )
-                else:
-                    break
-            if pay.num() == 0:
-                pay.append( RawLayer() )
-            return pay
+            end = self.Block._payload_end(index, self.hierarchy)
+            if end > index+1:
+                # not needed to append clones:
+                # better keep references to original layers
+                pay.layerList = self.Block.layerList[index+1:end]
+                return pay
         pay.append( RawLayer() )
         return pay
     
@@ -1708,7 +2344,7 @@ class Layer(object):
             return shar()
         bits = []
         for e in self:
-            bits.append( e.to_shar().get_bits() )
+            bits.extend( e.to_shar().get_bits() )
         s = shar()
         s.set_bits( bits )
         return s
@@ -1725,6 +2361,349 @@ class Layer(object):
             e.map_shar(sh)
 
 
+# structural clone of Element, Layer and Block objects, used instead of 
+# deepcopy():
+# all Element, Layer and Block instances reachable from the object are copied
+# once, with the lists, tuples and dicts referring to them and bound methods
+# of them (e.g. Pt=self.get_payload), which are rebound to the copies;
+# anything else (strings, integers, functions, IANA_dict...) is shared, 
+# as well as the attributes that are never modified in place
+_CLONE_SHARED = set(('CallName', 'ReprName', 'Repr', 'Type', 'Dict', 
+                     '_int_runs'))
+
+def _clone(obj, memo):
+    # memo: dict {id(original): copy}
+    t = type(obj)
+    if t is list:
+        c = memo[id(obj)] = []
+        c.extend([_clone(v, memo) if id(v) not in memo else memo[id(v)] \
+                  for v in obj])
+        return c
+    elif t is tuple:
+        return tuple([_clone(v, memo) if id(v) not in memo \
+                      else memo[id(v)] for v in obj])
+    elif t is dict:
+        c = memo[id(obj)] = {}
+        for k, v in obj.iteritems():
+            c[k] = _clone(v, memo) if id(v) not in memo else memo[id(v)]
+        return c
+    elif t is MethodType:
+        if obj.im_self is None:
+            return obj
+        if id(obj.im_self) in memo:
+            s = memo[id(obj.im_self)]
+        else:
+            s = _clone(obj.im_self, memo)
+        if s is obj.im_self:
+            return obj
+        return MethodType(obj.im_func, s, obj.im_class)
+    elif not isinstance(obj, (Element, Layer, Block)):
+        return obj
+    c = memo[id(obj)] = object.__new__(t)
+    if isinstance(obj, Element):
+        items, d = _elt_items(obj), None
+    else:
+        items, d = obj.__dict__.iteritems(), c.__dict__
+    for k, v in items:
+        if k in _CLONE_SHARED:
+            pass
+        elif id(v) in memo:
+            v = memo[id(v)]
+        else:
+            v = _clone(v, memo)
+        if d is None:
+            object.__setattr__(c, k, v)
+        else:
+            d[k] = v
+    return c
+
+# Element slots, for each Element class
+_SLOTS = {}
+
+def _slots(cls):
+    # returns the list of (name, descriptor) for the slots of cls
+    # (the __dict__ one excepted)
+    if cls not in _SLOTS:
+        _SLOTS[cls] = [(n, c.__dict__[n]) for c in reversed(cls.__mro__) \
+                       for n in c.__dict__.get('__slots__', ()) \
+                       if n != '__dict__']
+    return _SLOTS[cls]
+
+def _elt_items(e):
+    # returns the list of (name, value) of the attributes set on element e
+    items = []
+    for k, slot in _slots(type(e)):
+        try:
+            items.append( (k, slot.__get__(e)) )
+        except AttributeError:
+            # value of a lazy element, not decoded yet
+            pass
+    d = e.__dict__
+    if d:
+        items.extend(d.iteritems())
+    else:
+        # do not keep the empty dict allocated when reading e.__dict__
+        del e.__dict__
+    return items
+
+# element copiers, for each Element class
+_COPIERS = {}
+
+def _copier(cls):
+    # returns a function copying an instance of the Element class cls, 
+    # without going through __init__ and __setattr__: its source is generated
+    # with one slot assignment per line, avoiding a loop over the slots
+    if cls not in _COPIERS:
+        env = {'new':object.__new__, 'cls':cls}
+        src = ['def copy(e):', '    c = new(cls)']
+        for i, (k, slot) in enumerate(_slots(cls)):
+            env['set%i' % i] = slot.__set__
+            src.append('    set%i(c, e.%s)' % (i, k))
+        src.extend(['    if e.__dict__:', 
+                    '        c.__dict__.update(e.__dict__)',
+                    '    return c'])
+        exec('\n'.join(src), env)
+        _COPIERS[cls] = env['copy']
+    return _COPIERS[cls]
+
+# check that an element's methods are the ones from the given class
+# (and not overridden by a subclass)
+def _is_std(obj, cls, *names):
+    for name in names:
+        if getattr(type(obj), name).im_func is not cls.__dict__[name]:
+            return False
+    return True
+
+# elements whose show() and __repr__() are the standard ones, 
+# which can be rendered again from the cache of show() (see _show_key())
+_SHOW_STD = {}
+
+def _show_std(e):
+    c = type(e)
+    if c not in _SHOW_STD:
+        _SHOW_STD[c] = False
+        if isinstance(e, Layer):
+            _SHOW_STD[c] = _is_std(e, Layer, 'show', '__repr__', 
+                                   '_show_repr', '_show_entry', 
+                                   '_show_parts', '_show_items', 
+                                   '_show_write')
+        else:
+            for b in (Bit, Int, Str):
+                if isinstance(e, b):
+                    _SHOW_STD[c] = _is_std(e, Element, 'show', 
+                                           'is_transparent') \
+                                   and _is_std(e, b, '__repr__', '__call__',
+                                               '__hex__', '__bin__')
+                    break
+    return _SHOW_STD[c]
+
+# types of the values rendered from the cache of show()
+_SHOW_VAL = (str, int, long, bool)
+
+def _show_key(layer):
+    # state of the rendering of the Layer: its elements, with their values, 
+    # transparency and representation attributes;
+    # None when it cannot be cached: values computed with PtFunc or DictFunc,
+    # or elements with their own show() / __repr__()
+    key = [layer.CallName, layer.ReprName, layer.Trans]
+    for e in layer.__dict__.get('elementList', ()):
+        if isinstance(e, Layer):
+            # inner Layers are rendered with their own cache
+            key.append( (e, e.CallName, e.ReprName, e.is_transparent()) )
+            continue
+        std = _SHOW_STD.get(e.__class__)
+        if std is None:
+            std = _show_std(e)
+        if not std or getattr(e, 'DictFunc', None) is not None:
+            return None
+        val = e.Val
+        if val is None:
+            if e._lazy is not None:
+                val = e._lazy
+            elif e.Pt is None:
+                pass
+            elif e.PtFunc is None and e.Pt.__class__ in _SHOW_VAL:
+                val = ('Pt', e.Pt)
+            else:
+                return None
+        elif val.__class__ not in _SHOW_VAL:
+            return None
+        key.append( (e, e.CallName, e.ReprName, e.Repr, e.is_transparent(), 
+                     val, e.bit_len() if isinstance(e, Bit) else e.Len) )
+    return tuple(key)
+
+# CallNames are not unique within a Layer or Block:
+# the following ones are exported as CallName_1, CallName_2...
+def _export_name(exported, name):
+    i = 1
+    while '%s_%i' % (name, i) in exported:
+        i += 1
+    return '%s_%i' % (name, i)
+
+# elements whose map_ret() is the standard one, which consumes a BitReader
+# in place
+_READS_BITS = {}
+
+def _reads_bits(e):
+    c = type(e)
+    if c not in _READS_BITS:
+        _READS_BITS[c] = False
+        for b in (Bit, Int, Str, Layer):
+            if isinstance(e, b):
+                _READS_BITS[c] = _is_std(e, b, 'map_ret')
+                break
+    return _READS_BITS[c]
+
+# contiguous Int elements with a struct format are packed and unpacked 
+# together, in a single struct call
+_INT_FMT = dict([(t, f) for (t, f) in Int._types.items() if f is not None])
+_INT_STRUCT = {}
+_INT_FUSABLE = {}
+
+def _int_fusable(e):
+    # Int elements whose serialization, mapping and attributes' setting
+    # have not been overridden
+    c = type(e)
+    if c not in _INT_FUSABLE:
+        _INT_FUSABLE[c] = issubclass(c, Int) and _is_std(e, Int, 
+            '__call__', '__str__', '__setattr__', 'map', 'map_len') \
+            and _is_std(e, Element, 'is_transparent')
+    return _INT_FUSABLE[c]
+
+def _int_runs(elementList):
+    # returns a dict {start: (end, types, fmt)} for each run of at least 
+    # 2 fusable Int elements in elementList[start:end], with types their
+    # Type and fmt the corresponding struct format (without endianness)
+    runs, i, num = {}, 0, len(elementList)
+    while i < num:
+        j = i
+        while j < num and _int_fusable(elementList[j]) \
+        and elementList[j].Type in _INT_FMT:
+            j += 1
+        if j - i >= 2:
+            types = tuple([e.Type for e in elementList[i:j]])
+            runs[i] = (j, types, ''.join([_INT_FMT[t] for t in types]))
+        i = j+1
+    return runs
+
+def _int_struct(run, types, fmt):
+    # returns the Struct for packing / unpacking the Int elements in run,
+    # or None if one of them is transparent or has been changed since the
+    # run has been built
+    endian = run[0]._endian
+    for e, t in zip(run, types):
+        if e.Trans or e.TransFunc is not None or e.Type != t \
+        or e._endian != endian:
+            return None
+    fmt = ('<' if endian == 'little' else '>') + fmt
+    if fmt not in _INT_STRUCT:
+        _INT_STRUCT[fmt] = Struct(fmt)
+    return _INT_STRUCT[fmt]
+
+#------------------------------------------------------------------------------#
+# Layer template
+#------------------------------------------------------------------------------#
+# Element classes whose clone() can be replaced with a copy of their attributes
+_ELT_COPIABLE = {}
+for _c in (Str, Int, Bit):
+    _ELT_COPIABLE[_c] = (_c.__init__.im_func, _c.clone.im_func)
+del _c
+
+class LayerTemplate(object):
+    '''
+    compiled description of a Layer's constructorList,
+    built once for each Layer subclass when it is instantiated for the 1st time
+    
+    attributes:
+    constructorList: the list the template was built from;
+    num: number of components in constructorList when compiled;
+    protos: list of (component, copier) to instantiate, copier is the
+            function copying the component's attributes (see _copier())
+            when it is a base Str, Int or Bit element, that can be used 
+            instead of calling clone(), or None;
+    err: CallName of the 1st component using a reserved attribute, or None;
+    BitLen, Len: fixed length of the Layer, or None if it needs to be
+                 computed for each instance (or 'var' if variable);
+    int_runs: runs of contiguous Int elements packed and unpacked together
+              (see _int_runs());
+    '''
+    
+    def __init__(self, layer_class, constructorList):
+        self.constructorList = constructorList
+        self.num = len(constructorList)
+        self.protos = []
+        self.err = None
+        self.BitLen, self.Len = None, None
+        #
+        CallNames = []
+        for e in constructorList:
+            if isinstance(e, (Element, Layer)):
+                if e.CallName in layer_class.Reservd:
+                    self.err = e.CallName
+                    return
+                if e.CallName in CallNames and layer_class.dbg >= WNG:
+                    log(WNG, '(Layer - %s) different elements have ' \
+                        'the same CallName %s' % (layer_class, e.CallName))
+                self.protos.append( (e, self.__get_copier(e)) )
+            CallNames.append(e.CallName)
+        #
+        self.__set_length(layer_class)
+        self.int_runs = _int_runs([e for e, copier in self.protos])
+    
+    def __get_copier(self, e):
+        funcs = _ELT_COPIABLE.get(type(e), None)
+        if funcs is None:
+            funcs = [c for c in type(e).__mro__ if c in _ELT_COPIABLE]
+            if not funcs:
+                return None
+            funcs = _ELT_COPIABLE[funcs[0]]
+        if type(e).__init__.im_func is funcs[0] \
+        and type(e).clone.im_func is funcs[1]:
+            return _copier(type(e))
+        return None
+    
+    def __set_length(self, layer_class):
+        # the length can only be fixed in the template when it does not depend
+        # on automated Bit elements (with BitLenFunc or TransFunc)
+        BitLen = 0
+        for e, copier in self.protos:
+            if isinstance(e, Bit):
+                if e.BitLenFunc is not None or e.TransFunc is not None \
+                or type(e.BitLen) is not int:
+                    return
+                if not e.Trans:
+                    BitLen += e.BitLen
+            elif hasattr(e, 'Len') and type(e.Len) is int:
+                BitLen += e.Len*8
+            else:
+                self.BitLen, self.Len = 'var', 'var'
+                return
+        if BitLen % 8:
+            if layer_class.dbg >= WNG and layer_class._byte_aligned:
+                log(WNG, '(Layer - %s) Elements seem not to be '\
+                    'byte-aligned: hope you expect it!' % layer_class)
+            self.BitLen, self.Len = BitLen, 1 + BitLen//8
+        else:
+            self.BitLen, self.Len = BitLen, BitLen//8
+    
+    def elements(self):
+        '''
+        returns a list of new elements, copied or cloned from the template
+        '''
+        elts = []
+        for e, copier in self.protos:
+            if copier is not None:
+                # direct attributes' copy: 
+                # no need to go again through __init__ and __setattr__ checks
+                elts.append(copier(e))
+            else:
+                # Layer.clone() copies the whole element graph, keeping
+                # dynamic elements inside (i.e. element with PtFunc, 
+                # LenFunc, DictFunc, TransFunc defined)
+                elts.append(e.clone())
+        return elts
+
+
 class RawLayer(Layer):
     constructorList = [
         Str(CallName='s', Pt='', Len=None),
@@ -1737,6 +2716,47 @@ class RawLayer(Layer):
 #------------------------------------------------------------------------------#
 # Block definition
 #------------------------------------------------------------------------------#
+# version of the hierarchies of the Layers within Blocks:
+# incremented each time one of them changes, which invalidates the navigation
+# indexes of all Blocks
+_hier = [0]
+
+class _BlockNav(object):
+    '''
+    navigation index of a Block, for the Layers in its layerList:
+    pos: {id(layer): 1st index}, names: {CallName: 1st layer},
+    end: index of the end of each layer's payload (i.e. of the next layer
+    with a lower or equal hierarchy), None when it goes to the end,
+    header: index of the last layer with hierarchy-1 before each layer
+    
+    it is built for a given layerList and version of the hierarchies, and
+    updated incrementally when layers are appended at the end of the list
+    '''
+    def __init__(self, layers):
+        self.layers, self.version = layers, _hier[0]
+        self.pos, self.names, self.hier, self.end, self.header = \
+            {}, {}, [], [], []
+        # last index of each hierarchy level, 
+        # and stack of indexes whose payload goes to the end
+        self.last, self.open = {}, []
+        for l in layers:
+            self.add(l)
+    
+    def add(self, l):
+        i, h = len(self.hier), l.hierarchy
+        if id(l) not in self.pos:
+            self.pos[id(l)] = i
+        if l.CallName not in self.names:
+            self.names[l.CallName] = l
+        self.hier.append(h)
+        self.header.append(self.last.get(h-1))
+        self.last[h] = i
+        open, end = self.open, self.end
+        while open and self.hier[open[-1]] >= h:
+            end[open.pop()] = i
+        open.append(i)
+        end.append(None)
+
 class Block(object):
     '''
     class to build a block composed of "Layer" objects
@@ -1773,9 +2793,50 @@ class Block(object):
         return self.layerList[num]
     
     def __getattr__(self, attr):
-        for l in self:
-            if attr == l.CallName: return l
-        return object.__getattribute__(self, attr)
+        try:
+            return self._nav().names[attr]
+        except KeyError:
+            return object.__getattribute__(self, attr)
+    
+    # navigation index of the layers, used to look them up by CallName, 
+    # and to get their index, header and payload in constant time
+    def _nav(self):
+        layers = self.__dict__.get('layerList', [])
+        nav = self.__dict__.get('_nav_index')
+        if nav is not None and nav.layers is layers \
+        and nav.version == _hier[0]:
+            if len(nav.hier) == len(layers):
+                return nav
+            elif len(nav.hier) < len(layers):
+                # layers appended
+                for l in layers[len(nav.hier):]:
+                    nav.add(l)
+                return nav
+        nav = self.__dict__['_nav_index'] = _BlockNav(layers)
+        return nav
+    
+    def _payload_end(self, index, hier):
+        # returns the index of the next layer after index, with a 
+        # hierarchy lower or equal to hier
+        nav = self._nav()
+        if 0 <= index < len(nav.hier) and nav.hier[index] == hier:
+            end = nav.end[index]
+            return len(nav.hier) if end is None else end
+        end = index+1
+        while end < len(nav.hier) and nav.hier[end] > hier:
+            end += 1
+        return end
+    
+    def _header(self, index, hier):
+        # returns the last layer before index with hierarchy hier-1, or None
+        nav = self._nav()
+        if 0 <= index < len(nav.hier) and nav.hier[index] == hier:
+            i = nav.header[index]
+        else:
+            i = index-1
+            while i >= 0 and nav.hier[i] != hier-1:
+                i -= 1
+        return None if i is None or i < 0 else self.layerList[i]
     
     def num(self):
         return len(self.layerList)
@@ -1808,6 +2869,7 @@ class Block(object):
             layer.inBlock = True
             layer.Block = self
             self.layerList.insert(index, layer)
+            self.__dict__.pop('_nav_index', None)
     
     def remove(self, start, stop=None):
         if stop is None:
@@ -1815,10 +2877,13 @@ class Block(object):
         else:
             for i in xrange(start, stop):
                 self.layerList.remove( self.layerList[start] )
+        self.__dict__.pop('_nav_index', None)
     
     # method for Block hierarchy setting
     def set_hierarchy(self, hier):
         self.hierarchy = hier
+        if self.__dict__.get('inBlock'):
+            _hier[0] += 1
         for l in self:
             l.set_hierarchy(l.hierarchy + hier)
     
@@ -1860,6 +2925,9 @@ class Block(object):
     
     # standard methods for common management with Layers
     def __str__(self):
+        memo = _local.memo
+        if memo is None:
+            return _build(self.__str__)
         s = []
         for l in self:
             if not hasattr(self, 'Trans') or not l.Trans:
@@ -1880,11 +2948,11 @@ class Block(object):
             return shtr(self).left_val(self.bit_len())
     
     def __repr__(self):
-        s = '[[%s] ' % self.CallName
+        s = ['[[%s] ' % self.CallName]
         for l in self:
-            s += l.__repr__()
-        s = s + ' [%s]]' % self.CallName
-        return s
+            s.append( l.__repr__() )
+        s.append( ' [%s]]' % self.CallName )
+        return ''.join(s)
     
     def map_len(self):
         return len(self)
@@ -1892,29 +2960,114 @@ class Block(object):
     def clone(self):
         clone = self.__class__()
         clone.CallName, clone.layerList = self.CallName, []
+        # Layers are cloned with a common memo, so that references between
+        # them, and to the Block, point to their clones
+        memo = {id(self): clone}
         for l in self:
             if isinstance(l, Layer): 
-                clone.append( l.clone() )
+                clone.append( _clone(l, memo) )
             elif self.dbg >= ERR:
                 log(ERR, '(Block - %s) cloning not implemented for: %s' \
                     % (self.__class__, l))
         return clone
     
-    def show(self, with_trans=False):
-        s = '%s[[[ %s ]]]\n' % (self.hierarchy*'\t', self.CallName)
-        for l in self:
-            s += '\t'*l.hierarchy + l.show(with_trans).replace('\n', '\n'+'\t'*l.hierarchy) + '\n'
-        return s[:-1]
+    def show(self, with_trans=False, depth=None, width=None):
+        # depth and width apply to each Layer (see Layer.show()),
+        # width also to the number of Layers rendered
+        out = ['%s[[[ %s ]]]\n' % (self.hierarchy*'\t', self.CallName)]
+        for i, l in enumerate(self):
+            indent = '\t'*l.hierarchy
+            if width is not None and i >= width:
+                out.extend( (indent, '... (%i more)' % (len(self.layerList)-i), 
+                             '\n') )
+                break
+            if isinstance(l, Layer) and _show_std(l):
+                if with_trans or not l.is_transparent():
+                    l._show_write(out, indent, depth, width)
+                else:
+                    out.extend( (indent, '\n') )
+            else:
+                out.extend( (indent, l.show(with_trans).replace('\n', 
+                             '\n'+indent), '\n') )
+        return ''.join(out)[:-1]
+    
+    def export(self, with_trans=False, names=False):
+        # exports each Layer which is not transparent (and inner Block)
+        # in an OrderedDict by CallName (see Layer.export())
+        ret = OrderedDict()
+        for l in self.layerList:
+            if not with_trans and isinstance(l, Layer) and l.is_transparent():
+                continue
+            name = l.CallName
+            if name in ret:
+                name = _export_name(ret, name)
+            ret[name] = l.export(with_trans, names)
+        return ret
     
     def map(self, string=''):
-        s = string
+        # Layers are mapped at their offset into the string buffer, which is
+        # only sliced for those with a specific parse() method
+        off = 0
         for l in self:
             if not hasattr(l, 'Trans') or not l.Trans:
+                if isinstance(l, Layer) and _is_std(l, Layer, 'parse'):
+                    off += l.map_at(string, off)
+                    continue
                 if hasattr(l, 'parse'):
-                    l.parse(s)
+                    l.parse(string[off:])
                 else:
-                    l.map(s)
-                s = s[l.map_len():]
+                    l.map(string[off:])
+                off += l.map_len()
+    
+    # streaming parsing (see core/stream.py): Blocks made of a sequence of 
+    # records define the length of a record header in _stream_hdr,
+    # and return the length of a record from its header in _stream_len(hdr)
+    # (records can be shorter than _stream_hdr, down to _stream_min bytes)
+    _stream_hdr = None
+    _stream_min = None
+    
+    def _stream_len(self, hdr):
+        return None
+    
+    def parse_stream(self, src, max_len=None, bufsize=BUFSIZE, 
+                     chunked=False):
+        '''
+        generator pulling records from the file-like object or socket `src',
+        and yielding a new Block of the same class, with each record parsed
+        into it, as soon as all of its bytes have been read;
+        records longer than max_len bytes are truncated (see read_records())
+        
+        with chunked, records of any length (e.g. MPEG4 mdat atoms) are read
+        with a bounded memory, and a tuple (Block, RecordChunks) is yielded
+        for each record: 
+        records of at most max_len bytes (bufsize by default) are parsed 
+        whole into the Block, the RecordChunks being empty;
+        for longer ones (or the ones going to the end of the stream), only
+        their header (the first bytes used for getting their length) is 
+        parsed into the Block, the RecordChunks yielding the rest of 
+        the record (see read_records()), which is skipped if not consumed
+        before pulling the next record
+        '''
+        if self._stream_hdr is None:
+            raise AttributeError('%s has no record structure for streaming' \
+                                 % self.__class__.__name__)
+        if not chunked:
+            for buf in read_records(src, self._stream_hdr, self._stream_len,
+                                    max_len, bufsize, self._stream_min):
+                block = self.__class__()
+                block.parse(buf)
+                yield block
+            return
+        if max_len is None:
+            max_len = bufsize
+        for l, rec in read_records(src, self._stream_hdr, self._stream_len,
+                                   None, bufsize, self._stream_min, True):
+            block = self.__class__()
+            if l is not None and l <= max_len:
+                block.parse(rec.read(l))
+            else:
+                block.parse(rec.read(self._stream_hdr))
+            yield (block, rec)
     
     # this is to retrieve full Block's dynamicity from a parsed or mapped one
     def reautomatize(self):
@@ -0,0 +1,184 @@
+# −*− coding: UTF−8 −*−
+
+# Production mode:
+# the "safe" and "dbg" class attributes of Element, Layer and Block are
+# switched off, and the methods of Element classes (Str, Int, Bit and all
+# their subclasses), which run for each field of a Layer, are recompiled 
+# from their source with all the blocks conditioned by the "safe" or "dbg" 
+# class attributes removed (e.g. "if self.safe: assert(...)" or 
+# "if self.dbg >= DBG: log(...)"), so that those checks are not even 
+# evaluated anymore, and installed in place of the original ones.
+#
+# Layer and Block methods are not recompiled: this did not make them
+# faster than with their checks switched off (see utils/perf.py), whereas
+# it does for Element ones.
+#
+# enable() has to be called once all the formats used are imported:
+# Element classes defined afterwards keep their original methods, until 
+# enable() is called again.
+# Subclasses setting their own "dbg" attribute (e.g. CSN1) keep it.
+
+import ast
+import tokenize
+from inspect import getsourcelines, getsourcefile
+from StringIO import StringIO
+from libmich.core import element
+from libmich.core.element import Element, Str, Int, Bit, Layer, Block, \
+     log, WNG
+from libmich.core.profiling import _subclasses
+
+# debugging levels that can be tested in the blocks removed
+_LEVELS = ('ERR', 'WNG', 'DBG')
+
+# original methods: {class: {name: attribute}}
+_orig = {}
+# class attributes "safe" and "dbg" before enabling the production mode
+_flags = {}
+
+def _is_check(test):
+    # returns True when the condition test can only be true in safe mode,
+    # or with debugging enabled:
+    # X.safe, X.dbg >= LEVEL, X.dbg > LEVEL, and combinations of them
+    if isinstance(test, ast.Attribute):
+        return test.attr == 'safe'
+    elif isinstance(test, ast.Compare):
+        return isinstance(test.left, ast.Attribute) \
+           and test.left.attr == 'dbg' and len(test.ops) == 1 \
+           and isinstance(test.ops[0], (ast.Gt, ast.GtE)) \
+           and isinstance(test.comparators[0], ast.Name) \
+           and test.comparators[0].id in _LEVELS
+    elif isinstance(test, ast.BoolOp):
+        if isinstance(test.op, ast.Or):
+            return all(map(_is_check, test.values))
+        # and: the operands evaluated before the check must not call anything
+        for v in test.values:
+            if _is_check(v):
+                return True
+            if any([isinstance(n, ast.Call) for n in ast.walk(v)]):
+                return False
+    return False
+
+def _stmt_starts(src):
+    # returns the (line, column) of the 1st token of each logical line in src
+    starts, new = [], True
+    for tok in tokenize.generate_tokens(StringIO(src).readline):
+        if tok[0] == tokenize.NEWLINE:
+            new = True
+        elif tok[0] in (tokenize.NL, tokenize.COMMENT, tokenize.INDENT,
+                        tokenize.DEDENT, tokenize.ENDMARKER):
+            continue
+        elif new:
+            starts.append(tok[2])
+            new = False
+    return starts
+
+def _strip(src):
+    # returns the source src without the blocks conditioned by a check,
+    # or None if there is none
+    # lines are kept in place, so that tracebacks still point to the file
+    checks = [n.lineno for n in ast.walk(ast.parse(src)) \
+              if isinstance(n, ast.If) and not n.orelse and _is_check(n.test)]
+    if not checks:
+        return None
+    orig, lines = src.splitlines(), src.splitlines(True)
+    starts = _stmt_starts(src)
+    rows = [r for r, c in starts]
+    removed = set()
+    for lineno in sorted(checks):
+        if lineno in removed:
+            # nested in a block already removed
+            continue
+        i = rows.index(lineno)
+        col = starts[i][1]
+        end = len(lines)
+        for r, c in starts[i+1:]:
+            if c <= col:
+                end = r-1
+                break
+        for r in range(lineno, end+1):
+            removed.add(r)
+            lines[r-1] = '\n'
+        if not orig[lineno-1][col:].startswith('elif'):
+            # the block is replaced with a pass statement
+            lines[lineno-1] = '%spass\n' % orig[lineno-1][:col]
+    return ''.join(lines)
+
+def _specialize(cls, name, attr):
+    # returns the attribute name of cls recompiled without its checks,
+    # or None if it has none or its source is not available
+    func = getattr(attr, '__func__', attr)
+    code = getattr(func, 'func_code', None)
+    if code is None or code.co_freevars or ('safe' not in code.co_names \
+    and 'dbg' not in code.co_names):
+        # methods referring to variables of an enclosing function can not
+        # be recompiled alone
+        return None
+    try:
+        lines, lnum = getsourcelines(func)
+        # the method is compiled inside a class with the same name,
+        # for private attributes' names to be mangled the same way
+        src = _strip('%sclass %s(object):\n%s' \
+                     % ((lnum-2)*'\n', cls.__name__, ''.join(lines)))
+        if src is None:
+            return None
+        ns = {}
+        exec compile(src, getsourcefile(func), 'exec') \
+             in func.func_globals, ns
+        return ns[cls.__name__].__dict__[name]
+    except Exception as err:
+        if Layer.dbg >= WNG:
+            log(WNG, '(production) unable to specialize %s.%s: %s' \
+                % (cls.__name__, name, err))
+        return None
+
+def enable():
+    '''
+    switches libmich to production mode:
+    Element.safe and Layer.safe are set to False, debugging is disabled
+    for Element, Layer and Block, and the methods of Element classes are 
+    replaced with specialized ones, without any of their safe and dbg checks
+
+    to be called once all the formats used are imported
+    (or called again after importing new ones)
+    '''
+    for cls in _subclasses(Element):
+        if cls in _orig:
+            continue
+        _orig[cls] = {}
+        for name, attr in cls.__dict__.items():
+            new = _specialize(cls, name, attr)
+            if new is not None:
+                _orig[cls][name] = attr
+                setattr(cls, name, new)
+    _update_elements()
+    if not _flags:
+        for c in (Element, Layer, Block):
+            _flags[c] = (c.__dict__.get('safe'), c.dbg)
+            if 'safe' in c.__dict__:
+                c.safe = False
+            c.dbg = 0
+
+def disable():
+    '''
+    switches libmich back to standard mode,
+    restoring the original methods and safe / dbg attributes
+    '''
+    for cls in _orig:
+        for name, attr in _orig[cls].items():
+            setattr(cls, name, attr)
+    _orig.clear()
+    for c, (safe, dbg) in _flags.items():
+        if safe is not None:
+            c.safe = safe
+        c.dbg = dbg
+    _flags.clear()
+    _update_elements()
+
+def is_enabled():
+    return bool(_flags)
+
+def _update_elements():
+    # Element classes whose attributes can be copied by Layer templates
+    # are identified by their __init__ and clone methods
+    for c in (Str, Int, Bit):
+        element._ELT_COPIABLE[c] = (c.__init__.im_func, c.clone.im_func)
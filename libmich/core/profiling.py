@@ -0,0 +1,291 @@
+# −*− coding: UTF−8 −*−
+
+# Profiling hooks:
+# enable() wraps the map(), parse() and __str__() methods of Layer classes,
+# the map() and parse() methods of Block classes, the PER encoders and 
+# decoders (Layer-building, direct and generated ones), and the parse_L3() 
+# function, so that they record, for each class or ASN.1
+# type, their number of calls, cumulative time and number of bytes processed
+# into the REGISTRY.
+# disable() restores the original methods: when profiling is not enabled,
+# it costs nothing.
+#
+# The time of a call includes the ones of its nested calls (e.g. the map()
+# of a Block includes the map() of its Layers), but not the time spent
+# in the profiling hooks themselves.
+#
+# enable() has to be called once all the formats profiled are imported:
+# PER and parse_L3() are only profiled when libmich.asn1 and
+# libmich.formats.L3Mobile are already imported, the generated PER codecs
+# when they are already loaded (see asn1/processor.py, load_codec()), and
+# parse_L3() when called through its module (not when imported with
+# "from libmich.formats.L3Mobile import parse_L3" before enable()).
+
+import sys
+import json
+from types import FunctionType
+from timeit import default_timer as timer
+from libmich.core.element import Layer, Block
+from libmich.core.shtr import BitReader
+
+# {(name, operation): [calls, cumulative time, bytes]}
+REGISTRY = {}
+
+# original attributes: [(owner, name, attribute)],
+# owner being a class, a module or the dict of the generated PER codecs
+_orig = []
+# calls being profiled: [subject, operation, time spent in nested hooks]
+_stack = []
+# > 0 while the hooks themselves call profiled methods
+_paused = [0]
+
+def _subclasses(*classes):
+    # returns the list of given classes and all their subclasses
+    done, stack = [], list(classes)
+    while stack:
+        c = stack.pop()
+        if c not in done:
+            done.append(c)
+            stack.extend(c.__subclasses__())
+    return done
+
+def _cls_name(obj):
+    # module and class name, e.g. L3Mobile_MM.IDENTITY_REQUEST
+    cls = type(obj)
+    return '%s.%s' % (cls.__module__.split('.')[-1], cls.__name__)
+
+def _profiled(func, op, subject, name, size, start=None):
+    # returns func wrapped to record its calls into the REGISTRY:
+    # subject(args) returns the object processed (e.g. self for methods),
+    # name(obj, ret) and size(obj, args, ret, pre) the name and number of 
+    # bytes recorded for it, pre being returned by start(args) before the 
+    # call (e.g. the length of a buffer consumed in place)
+    def wrapper(*args, **kwargs):
+        obj = subject(args)
+        if _paused[0] or _stack and _stack[-1][0] is obj \
+        and _stack[-1][1] == op:
+            # hooks' own calls, or method calling the one of its parent class
+            return func(*args, **kwargs)
+        pre = None
+        if start is not None:
+            pre = start(args)
+        frame = [obj, op, 0.0]
+        _stack.append(frame)
+        ret = None
+        t0 = timer()
+        try:
+            ret = func(*args, **kwargs)
+            return ret
+        finally:
+            t1 = timer()
+            _stack.pop()
+            _paused[0] += 1
+            try:
+                key, nbytes = (name(obj, ret), op), size(obj, args, ret, pre)
+            except:
+                key, nbytes = (_cls_name(obj), op), 0
+            _paused[0] -= 1
+            rec = REGISTRY.get(key)
+            if rec is None:
+                rec = REGISTRY[key] = [0, 0.0, 0]
+            rec[0] += 1
+            rec[1] += t1 - t0 - frame[2]
+            rec[2] += nbytes
+            if _stack:
+                _stack[-1][2] += frame[2] + timer() - t1
+    wrapper.__name__, wrapper.__doc__ = func.__name__, func.__doc__
+    return wrapper
+
+def _hook(owner, attr, op, subject, name, size, start=None):
+    # replaces the function attr of the class or module owner with its
+    # profiled version
+    func = owner.__dict__.get(attr)
+    if isinstance(func, FunctionType):
+        _orig.append( (owner, attr, func) )
+        setattr(owner, attr, _profiled(func, op, subject, name, size, start))
+
+def _hook_gen(gen):
+    # replaces the functions of the generated PER codecs registered in 
+    # the dict gen {id(obj): (obj, variant, decoder, encoder)} with their
+    # profiled versions
+    for key, (obj, variant, dec, enc) in gen.items():
+        _orig.append( (gen, key, gen[key]) )
+        subject = lambda args, obj=obj: obj
+        gen[key] = (obj, variant,
+                    _profiled(dec, 'PER.dec_gen', subject, _per_name,
+                              _per_len_r, _per_r_start),
+                    _profiled(enc, 'PER.enc_gen', subject, _per_name,
+                              _per_len_w, _per_w_start))
+
+def _self(args):
+    return args[0]
+
+def _name(obj, ret):
+    return _cls_name(obj)
+
+def _buf_bits(buf):
+    # number of bits of a buffer to be mapped or decoded
+    if isinstance(buf, BitReader):
+        return buf.bit_len()
+    return len(buf)*8
+
+def _map_start(args):
+    if len(args) > 1:
+        return _buf_bits(args[1])
+    return 0
+
+def _len_map(obj, args, ret, pre):
+    # bytes of the buffer consumed by map() / parse(), which is not
+    # itself consumed: its length, or the length of the bits mapped onto
+    # the Layers when they do not take all of it (without serializing them)
+    if isinstance(obj, Block):
+        bitlen = sum([l.bit_len() for l in obj])
+    else:
+        bitlen = obj.bit_len()
+    return (min(pre, bitlen) + 7) // 8
+
+def _len_str(obj, args, ret, pre):
+    return len(ret)
+
+# PER codec methods: encode(self, obj), encode_buf(self, obj), 
+# decode(self, obj, buf), decode_val(self, obj, buf);
+# the sizes are taken from the buffers, as the libmich message structure
+# of an ASN1Obj is only built when needed with the direct codec
+def _per_obj(args):
+    return args[1]
+
+def _per_name(obj, ret):
+    return 'ASN.1 %s' % obj.get_typename()
+
+def _per_len_msg(obj, args, ret, pre):
+    # the Layer-building encoder sets obj._msg
+    msg = obj.__dict__.get('_msg')
+    if msg is None:
+        return 0
+    return (msg.bit_len() + 7) // 8
+
+def _per_len_buf(obj, args, ret, pre):
+    return len(ret)
+
+def _per_buf_start(args):
+    return _buf_bits(args[2])
+
+def _per_len_dec(obj, args, ret, pre):
+    # decode() returns the BitReader after the value decoded
+    return (pre - ret.bit_len() + 7) // 8
+
+def _per_len_dec_val(obj, args, ret, pre):
+    # decode_val() consumes the codec's BitReader
+    return (pre - args[0]._r.bit_len() + 7) // 8
+
+# generated PER functions: decoder(codec), encoder(codec, val)
+def _per_r_start(args):
+    return args[0]._r.bit_len()
+
+def _per_len_r(obj, args, ret, pre):
+    return (pre - args[0]._r.bit_len() + 7) // 8
+
+def _per_w_start(args):
+    return args[0]._w.bit_len()
+
+def _per_len_w(obj, args, ret, pre):
+    return (args[0]._w.bit_len() - pre + 7) // 8
+
+def _l3_name(buf, ret):
+    return _cls_name(ret)
+
+def _l3_len(buf, args, ret, pre):
+    return len(buf)
+
+def enable():
+    '''
+    enables the profiling hooks, recording calls into the REGISTRY
+
+    to be called once all the formats to be profiled are imported
+    '''
+    if _orig:
+        return
+    for cls in _subclasses(Layer):
+        _hook(cls, 'map', 'map', _self, _name, _len_map, _map_start)
+        _hook(cls, 'parse', 'parse', _self, _name, _len_map, _map_start)
+        _hook(cls, '__str__', '__str__', _self, _name, _len_str)
+    for cls in _subclasses(Block):
+        _hook(cls, 'map', 'map', _self, _name, _len_map, _map_start)
+        _hook(cls, 'parse', 'parse', _self, _name, _len_map, _map_start)
+    if 'libmich.asn1.PER' in sys.modules:
+        PER = sys.modules['libmich.asn1.PER'].PER
+        _hook(PER, 'encode', 'PER.encode', _per_obj, _per_name, 
+              _per_len_msg)
+        _hook(PER, 'decode', 'PER.decode', _per_obj, _per_name, 
+              _per_len_dec, _per_buf_start)
+        _hook(PER, 'encode_buf', 'PER.enc_buf', _per_obj, _per_name,
+              _per_len_buf)
+        _hook(PER, 'decode_val', 'PER.dec_val', _per_obj, _per_name,
+              _per_len_dec_val, _per_buf_start)
+        _hook_gen(PER._GEN)
+    if 'libmich.formats.L3Mobile' in sys.modules:
+        _hook(sys.modules['libmich.formats.L3Mobile'], 'parse_L3', 
+              'parse_L3', _self, _l3_name, _l3_len)
+
+def disable():
+    '''
+    disables the profiling hooks, restoring the original methods
+    (the REGISTRY is kept)
+    '''
+    while _orig:
+        owner, attr, func = _orig.pop()
+        if isinstance(owner, dict):
+            # unless the generated codec was unloaded in the meantime
+            if attr in owner and owner[attr][0] is func[0]:
+                owner[attr] = func
+        else:
+            setattr(owner, attr, func)
+    del _stack[:]
+
+def is_enabled():
+    return bool(_orig)
+
+def reset():
+    '''
+    clears the REGISTRY
+    '''
+    REGISTRY.clear()
+
+def stats(sort='time'):
+    '''
+    returns the list of records from the REGISTRY, as dicts with name, op,
+    calls, time (cumulative, in sec.) and bytes,
+    sorted by decreasing `sort' value (or by name)
+    '''
+    recs = [{'name': name, 'op': op, 'calls': rec[0], 'time': rec[1], 
+             'bytes': rec[2]} for (name, op), rec in REGISTRY.items()]
+    if sort == 'name':
+        recs.sort(key=lambda r: (r['name'], r['op']))
+    else:
+        recs.sort(key=lambda r: r[sort], reverse=True)
+    return recs
+
+def dump(sort='time', limit=None):
+    '''
+    returns the REGISTRY as a table, sorted by decreasing `sort' value
+    (time, calls or bytes) or by name, limited to its `limit' 1st lines
+    '''
+    lines = ['%-44s %-11s %8s %10s %10s %10s' \
+             % ('name', 'op', 'calls', 'time (s)', 'us / call', 'bytes')]
+    for r in stats(sort)[:limit]:
+        lines.append('%-44s %-11s %8i %10.4f %10.1f %10i' \
+                     % (r['name'][:44], r['op'], r['calls'], r['time'], 
+                        1e6*r['time']/r['calls'], r['bytes']))
+    return '\n'.join(lines)
+
+def to_json(path=None):
+    '''
+    returns the REGISTRY records as a JSON string,
+    and writes it into the file `path' if provided
+    '''
+    s = json.dumps(stats('name'), indent=1, sort_keys=True)
+    if path:
+        fd = open(path, 'w')
+        fd.write(s)
+        fd.close()
+    return s
@@ -0,0 +1,263 @@
+# −*− coding: UTF−8 −*−
+
+# Serialization of exported values:
+# the export() methods of Element, Layer, Block and ASN1Obj return values 
+# made of native python objects only: None, bool, int / long, float,
+# str (byte strings), unicode (text, e.g. names resolved from a Dict),
+# list / tuple, and dict / OrderedDict (with str keys)
+#
+# to_json() serializes them to a JSON line, byte strings being converted to
+# hexadecimal text, and pack() / unpack() to / from the MessagePack format,
+# byte strings being kept as binary values;
+# integers which do not fit in 64 bits are packed as MessagePack extension
+# values of type EXT_BIGINT, holding their big endian two's complement bytes
+
+import json
+from struct import Struct
+from binascii import hexlify, unhexlify
+from collections import OrderedDict
+
+# MessagePack extension type for integers larger than 64 bits
+EXT_BIGINT = 1
+
+#------------------------------------------------------------------------------#
+# JSON lines
+#------------------------------------------------------------------------------#
+def _json_val(val):
+    c = val.__class__
+    if c is str:
+        return hexlify(val)
+    elif c in (dict, OrderedDict):
+        return OrderedDict([(k, _json_val(v)) for (k, v) in val.items()])
+    elif c in (list, tuple):
+        return map(_json_val, val)
+    return val
+
+def to_json(val):
+    '''
+    returns the exported value `val' as a single line of JSON
+    '''
+    return json.dumps(_json_val(val), separators=(',', ':'))
+
+def write_jsonl(fd, vals):
+    '''
+    writes each exported value from `vals' as a JSON line into the 
+    file-like object `fd'
+    '''
+    for val in vals:
+        fd.write( to_json(val) )
+        fd.write( '\n' )
+
+#------------------------------------------------------------------------------#
+# MessagePack
+#------------------------------------------------------------------------------#
+_B = Struct('>B')
+_BB = Struct('>BB')
+_BH = Struct('>BH')
+_BI = Struct('>BI')
+_BQ = Struct('>BQ')
+_Bb = Struct('>Bb')
+_Bh = Struct('>Bh')
+_Bi = Struct('>Bi')
+_Bq = Struct('>Bq')
+_Bd = Struct('>Bd')
+
+def _pack_len(n, fix, fix_max, b8, b16, b32, out):
+    # appends the header of a value of length n
+    if n < fix_max:
+        out.append( chr(fix | n) )
+    elif b8 is not None and n < 0x100:
+        out.append( _BB.pack(b8, n) )
+    elif n < 0x10000:
+        out.append( _BH.pack(b16, n) )
+    else:
+        out.append( _BI.pack(b32, n) )
+
+def _pack_int(val, out):
+    if 0 <= val < 0x80:
+        out.append( chr(val) )
+    elif -0x20 <= val < 0:
+        out.append( chr(val & 0xff) )
+    elif 0 <= val < 0x100:
+        out.append( _BB.pack(0xcc, val) )
+    elif 0 <= val < 0x10000:
+        out.append( _BH.pack(0xcd, val) )
+    elif 0 <= val < 0x100000000:
+        out.append( _BI.pack(0xce, val) )
+    elif 0 <= val < 0x10000000000000000:
+        out.append( _BQ.pack(0xcf, val) )
+    elif -0x80 <= val < 0:
+        out.append( _Bb.pack(0xd0, val) )
+    elif -0x8000 <= val < 0:
+        out.append( _Bh.pack(0xd1, val) )
+    elif -0x80000000 <= val < 0:
+        out.append( _Bi.pack(0xd2, val) )
+    elif -0x8000000000000000 <= val < 0:
+        out.append( _Bq.pack(0xd3, val) )
+    else:
+        # big endian two's complement
+        n = (val.bit_length() + 8) // 8
+        buf = unhexlify( '%0*x' % (2*n, val % (1 << (8*n))) )
+        if n < 0x100:
+            out.append( _BB.pack(0xc7, n) )
+        elif n < 0x10000:
+            out.append( _BH.pack(0xc8, n) )
+        else:
+            out.append( _BI.pack(0xc9, n) )
+        out.append( chr(EXT_BIGINT) )
+        out.append( buf )
+
+def _pack_text(val, out):
+    # val is the UTF-8 encoding of the text
+    _pack_len(len(val), 0xa0, 0x20, 0xd9, 0xda, 0xdb, out)
+    out.append( val )
+
+def _pack(val, out):
+    c = val.__class__
+    if c is str:
+        _pack_len(len(val), 0xc4, 0, 0xc4, 0xc5, 0xc6, out)
+        out.append( val )
+    elif c is bool:
+        out.append( '\xc3' if val else '\xc2' )
+    elif c in (int, long):
+        _pack_int(val, out)
+    elif c in (dict, OrderedDict):
+        _pack_len(len(val), 0x80, 0x10, None, 0xde, 0xdf, out)
+        for (k, v) in val.items():
+            if k.__class__ is str:
+                # keys are names: packed as text
+                _pack_text(k, out)
+            else:
+                _pack(k, out)
+            _pack(v, out)
+    elif c in (list, tuple):
+        _pack_len(len(val), 0x90, 0x10, None, 0xdc, 0xdd, out)
+        for v in val:
+            _pack(v, out)
+    elif val is None:
+        out.append( '\xc0' )
+    elif c is unicode:
+        _pack_text(val.encode('utf-8'), out)
+    elif c is float:
+        out.append( _Bd.pack(0xcb, val) )
+    elif isinstance(val, dict):
+        _pack(OrderedDict(val), out)
+    elif isinstance(val, (list, tuple)):
+        _pack(list(val), out)
+    else:
+        raise(TypeError('%s: value not serializable' % type(val).__name__))
+
+def pack(val):
+    '''
+    returns the exported value `val' packed in the MessagePack format
+    '''
+    out = []
+    _pack(val, out)
+    return ''.join(out)
+
+def write_packed(fd, vals):
+    '''
+    writes each exported value from `vals' packed in the MessagePack format 
+    into the file-like object `fd'
+    '''
+    for val in vals:
+        fd.write( pack(val) )
+
+# MessagePack single byte values, and formats with a fixed length field:
+# (struct, length of the header, type: 'bin', 'str', 'ext', 'array', 'map',
+#  or None for integers and floats)
+_FORMATS = {
+    0xc4: (_BB, 2, 'bin'), 0xc5: (_BH, 3, 'bin'), 0xc6: (_BI, 5, 'bin'),
+    0xc7: (_BB, 2, 'ext'), 0xc8: (_BH, 3, 'ext'), 0xc9: (_BI, 5, 'ext'),
+    0xca: (Struct('>Bf'), 5, None), 0xcb: (_Bd, 9, None),
+    0xcc: (_BB, 2, None), 0xcd: (_BH, 3, None), 0xce: (_BI, 5, None),
+    0xcf: (_BQ, 9, None), 0xd0: (_Bb, 2, None), 0xd1: (_Bh, 3, None),
+    0xd2: (_Bi, 5, None), 0xd3: (_Bq, 9, None),
+    0xd9: (_BB, 2, 'str'), 0xda: (_BH, 3, 'str'), 0xdb: (_BI, 5, 'str'),
+    0xdc: (_BH, 3, 'array'), 0xdd: (_BI, 5, 'array'),
+    0xde: (_BH, 3, 'map'), 0xdf: (_BI, 5, 'map')
+    }
+_CONST = {0xc0: None, 0xc2: False, 0xc3: True}
+
+def _unpack(buf, off):
+    # returns the value at offset off in buf, and the offset following it
+    b = ord(buf[off])
+    if b < 0x80:
+        return b, off+1
+    elif b >= 0xe0:
+        return b-0x100, off+1
+    elif b < 0x90:
+        return _unpack_map(buf, off+1, b & 0xf)
+    elif b < 0xa0:
+        return _unpack_array(buf, off+1, b & 0xf)
+    elif b < 0xc0:
+        n = b & 0x1f
+        return buf[off+1:off+1+n].decode('utf-8'), off+1+n
+    elif b in _CONST:
+        return _CONST[b], off+1
+    elif b in _FORMATS:
+        st, hl, t = _FORMATS[b]
+        n = st.unpack_from(buf, off)[1]
+        off += hl
+        if t is None:
+            return n, off
+        elif t == 'bin':
+            return buf[off:off+n], off+n
+        elif t == 'str':
+            return buf[off:off+n].decode('utf-8'), off+n
+        elif t == 'array':
+            return _unpack_array(buf, off, n)
+        elif t == 'map':
+            return _unpack_map(buf, off, n)
+        else:
+            return _unpack_ext(buf[off], buf[off+1:off+1+n]), off+1+n
+    elif 0xd4 <= b <= 0xd8:
+        # fixext
+        n = 1 << (b-0xd4)
+        return _unpack_ext(buf[off+1], buf[off+2:off+2+n]), off+2+n
+    raise(ValueError('0x%.2x: invalid MessagePack format' % b))
+
+def _unpack_ext(typ, data):
+    if ord(typ) == EXT_BIGINT and data:
+        val = int(hexlify(data), 16)
+        if ord(data[0]) & 0x80:
+            val -= 1 << (8*len(data))
+        return val
+    # other extension values are returned as (type, data)
+    return (ord(typ), data)
+
+def _unpack_array(buf, off, n):
+    val = []
+    for i in xrange(n):
+        v, off = _unpack(buf, off)
+        val.append(v)
+    return val, off
+
+def _unpack_map(buf, off, n):
+    val = OrderedDict()
+    for i in xrange(n):
+        k, off = _unpack(buf, off)
+        if k.__class__ is unicode:
+            # keys are names, as exported
+            k = k.encode('utf-8')
+        v, off = _unpack(buf, off)
+        val[k] = v
+    return val, off
+
+def unpack(buf):
+    '''
+    returns the value packed in the MessagePack format in `buf'
+    (byte strings as str, text as unicode, arrays as lists, 
+    maps as OrderedDict with str keys)
+    '''
+    return _unpack(buf, 0)[0]
+
+def iter_unpack(buf):
+    '''
+    generator returning each value from the sequence of values packed 
+    in the MessagePack format in `buf'
+    '''
+    off = 0
+    while off < len(buf):
+        val, off = _unpack(buf, off)
+        yield val
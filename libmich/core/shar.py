@@ -26,24 +26,33 @@
 # *--------------------------------------------------------
 #*/
 
-# if you want to make use of numpy (3 to 5 times faster),
-# make it True
+# shar backends:
+# - 'int': the bit-stream is kept in a single string buffer with a cursor in
+#   bits, values being extracted with integer shifts and masks (default)
+# - 'numpy': the bit-stream is kept in numpy arrays of bytes and bits
+# - 'array': the bit-stream is kept in Python stdlib arrays of bytes and bits
+# test() with int: 8ms
 # test() with numpy: 23ms
 # test() with Python stdlib array: 129ms
+_BACKEND = 'int'
+
+# if you want to make use of numpy (for the numpy backend, and for bits 
+# conversions in the int backend), make it True
 _WITH_NUMPY = True
 
 from functools import reduce
 from math import ceil
+from array import array
+from binascii import hexlify, unhexlify
+from string import maketrans
 #
 if _WITH_NUMPY:
     try:
         import numpy as np
         _with_numpy = True
     except ImportError:
-        from array import array
         _with_numpy = False
 else:
-    from array import array
     _with_numpy = False
 
 
@@ -54,7 +63,7 @@ if _with_numpy:
     _BYTE_TO_BIT = lambda byteval: [byteval >> i & 1 for i in _BIT_INDEX]
     _BIT_TO_BYTE = lambda bitvec: reduce(lambda x,y:(x<<1)+y, bitvec[:8])
     
-    def byte_to_bit(ar_byte):
+    def _np_byte_to_bit(ar_byte):
         '''
         convert a byte array (ubyte) to a a bit array (ubyte)
         
@@ -73,7 +82,7 @@ if _with_numpy:
                 dtype=np.int)
             )
     
-    def bit_to_byte(ar_bit):
+    def _np_bit_to_byte(ar_bit):
         '''
         convert a bit array (ubyte) to a byte array (ubyte)
         
@@ -108,60 +117,65 @@ if _with_numpy:
 
 
 # Python stdlib array version
-else:
+_AR_BIT_INDEX = array('B', [7, 6, 5, 4, 3, 2, 1, 0])
+_AR_BYTE_TO_BIT = lambda byteval, BI=_AR_BIT_INDEX: \
+                  [byteval >> i & 1 for i in BI]
+_AR_BIT_TO_BYTE = lambda bitvec: reduce(lambda x,y:(x<<1)+y, bitvec[:8])
+
+def _ar_byte_to_bit(ar_byte):
+    '''
+    convert a byte array (uchar) to a a bit array (uchar)
     
-    _BIT_INDEX = array('B', [7, 6, 5, 4, 3, 2, 1, 0])
-    _BYTE_TO_BIT = lambda byteval, BI=_BIT_INDEX: [byteval >> i & 1 for i in BI]
-    _BIT_TO_BYTE = lambda bitvec: reduce(lambda x,y:(x<<1)+y, bitvec[:8])
+    Parameters
+    ----------
+    ar_byte : 1d-array, uchar (from 0 to 255)
     
-    def byte_to_bit(ar_byte):
-        '''
-        convert a byte array (uchar) to a a bit array (uchar)
-        
-        Parameters
-        ----------
-        ar_byte : 1d-array, uchar (from 0 to 255)
-        
-        Returns
-        -------
-        ar_bit : 1d-array, uchar (only 0 and 1)
-        '''
-        ar_bit = array('B')
-        for B in ar_byte:
-            ar_bit.extend(_BYTE_TO_BIT(B))
-        return ar_bit
+    Returns
+    -------
+    ar_bit : 1d-array, uchar (only 0 and 1)
+    '''
+    ar_bit = array('B')
+    for B in ar_byte:
+        ar_bit.extend(_AR_BYTE_TO_BIT(B))
+    return ar_bit
+
+def _ar_bit_to_byte(ar_bit):
+    '''
+    convert a bit array (uchar) to a byte array (uchar)
     
-    def bit_to_byte(ar_bit):
-        '''
-        convert a bit array (uchar) to a byte array (uchar)
-        
-        Parameters
-        ----------
-        ar_bit : 1d-array, uchar (only 0 and 1)
-        
-        Returns
-        -------
-        ar_byte : 1d-array, uchar (from 0 to 255)
-            If ar_bit is not an 8-bit multiple, ar_byte is left-aligned
-            and LSB of the last byte are zero padded
-        '''
-        # in case ar_bit is not an 8-bit multiple, take of copy of it
-        # with zero-padding left-appended
-        # TODO: making a copy of the whole ar_bit is a bit overkill...
-        len_extra = len(ar_bit) % 8
-        if len_extra:
-            ar_bit = ar_bit[:]
-            ar_bit.extend([0] * (8-len_extra))
-        ar_byte = array('B')
-        ar_byte.extend( [_BIT_TO_BYTE(ar_bit[i:i+8]) \
-                            for i in range(0, len(ar_bit), 8)] )
-        return ar_byte
+    Parameters
+    ----------
+    ar_bit : 1d-array, uchar (only 0 and 1)
+    
+    Returns
+    -------
+    ar_byte : 1d-array, uchar (from 0 to 255)
+        If ar_bit is not an 8-bit multiple, ar_byte is left-aligned
+        and LSB of the last byte are zero padded
+    '''
+    # in case ar_bit is not an 8-bit multiple, take of copy of it
+    # with zero-padding left-appended
+    # TODO: making a copy of the whole ar_bit is a bit overkill...
+    len_extra = len(ar_bit) % 8
+    if len_extra:
+        ar_bit = ar_bit[:]
+        ar_bit.extend([0] * (8-len_extra))
+    ar_byte = array('B')
+    ar_byte.extend( [_AR_BIT_TO_BYTE(ar_bit[i:i+8]) \
+                        for i in range(0, len(ar_bit), 8)] )
+    return ar_byte
+
+
+if _with_numpy:
+    byte_to_bit, bit_to_byte = _np_byte_to_bit, _np_bit_to_byte
+else:
+    byte_to_bit, bit_to_byte = _ar_byte_to_bit, _ar_bit_to_byte
 
 
 # numpy version
 if _with_numpy:
     
-    class shar(object):
+    class shar_numpy(object):
         '''
         shar object is an optimized bit-stream handler
         
@@ -207,10 +221,10 @@ if _with_numpy:
                     # if only 0 and 1 in arg, consider it as a bit array
                     if np.all( (tmp==0)|(tmp==1) ):
                         self._ar_bit = tmp
-                        self._ar_byte = bit_to_byte(self._ar_bit)
+                        self._ar_byte = _np_bit_to_byte(self._ar_bit)
                     else:
                         self._ar_byte = tmp
-                        self._ar_bit = byte_to_bit(self._ar_byte)
+                        self._ar_bit = _np_byte_to_bit(self._ar_byte)
                     self._buf = self._ar_byte.tostring()
                     self._len_bit = len(self._ar_bit)
                     self._cur = 0
@@ -337,7 +351,7 @@ if _with_numpy:
             '''
             self._buf = buf
             self._ar_byte = np.frombuffer(buf, np.ubyte)
-            self._ar_bit = byte_to_bit(self._ar_byte)
+            self._ar_bit = _np_byte_to_bit(self._ar_byte)
             self._len_bit = len(self._ar_bit)
             self._cur = 0
         
@@ -365,7 +379,7 @@ if _with_numpy:
                 return self._buf[off_byte:off_byte+len_byte]
             else:
                 # unaligned access
-                return bit_to_byte(self._ar_bit[self._cur:self._cur+bitlen])\
+                return _np_bit_to_byte(self._ar_bit[self._cur:self._cur+bitlen])\
                        .tobytes()
         
         def get_buf(self, bitlen=None):
@@ -397,7 +411,7 @@ if _with_numpy:
                 # unaligned access
                 cur = self._cur
                 self._cur += bitlen
-                return bit_to_byte(self._ar_bit[cur:cur+bitlen]).tostring()
+                return _np_bit_to_byte(self._ar_bit[cur:cur+bitlen]).tostring()
         
         def set_bytes(self, bytes=[]):
             '''
@@ -416,7 +430,7 @@ if _with_numpy:
                 self._ar_byte = np.copy(bytes)
             else:
                 self._ar_byte = np.array(bytes, np.ubyte)
-            self._ar_bit = byte_to_bit(self._ar_byte)
+            self._ar_bit = _np_byte_to_bit(self._ar_byte)
             self._buf = self._ar_byte.tobytes()
             self._len_bit = len(self._ar_bit)
             self._cur = 0
@@ -445,7 +459,7 @@ if _with_numpy:
                 return self._ar_byte[off_byte:off_byte+len_byte]
             else:
                 # unaligned access
-                return bit_to_byte(self._ar_bit[self._cur:self._cur+bitlen])
+                return _np_bit_to_byte(self._ar_bit[self._cur:self._cur+bitlen])
         
         def get_bytes(self, bitlen=None):
             '''
@@ -476,7 +490,7 @@ if _with_numpy:
                 # unaligned access
                 cur = self._cur
                 self._cur += bitlen
-                return bit_to_byte(self._ar_bit[cur:cur+bitlen])
+                return _np_bit_to_byte(self._ar_bit[cur:cur+bitlen])
         
         def set_bits(self, bits=[]):
             '''
@@ -495,7 +509,7 @@ if _with_numpy:
                 self._ar_bit = np.copy(bits)
             else:
                 self._ar_bit = np.array(bits, np.ubyte)
-            self._ar_byte = bit_to_byte(self._ar_bit)
+            self._ar_byte = _np_bit_to_byte(self._ar_bit)
             self._buf = self._ar_byte.tobytes()
             self._len_bit = len(self._ar_bit)
             self._cur = 0
@@ -565,14 +579,14 @@ if _with_numpy:
             val = bin(val)[2:]
             if bitlen is None:
                 self._ar_bit = np.fromiter(val, np.ubyte)
-            elif bitlen > len(val):
+            elif bitlen >= len(val):
                 # padding val
                 self._ar_bit = np.array( (0,)*(bitlen-len(val)) + tuple(val),
                                          np.ubyte)
             else:
                 # majoring to maximum bitlen value
                 self._ar_bit = np.array( (1,)*bitlen, np.ubyte )
-            self._ar_byte = bit_to_byte(self._ar_bit)
+            self._ar_byte = _np_bit_to_byte(self._ar_bit)
             self._buf = self._ar_byte.tobytes()
             self._len_bit = len(self._ar_bit)
             self._cur = 0
@@ -669,7 +683,7 @@ if _with_numpy:
                 else:
                     # majoring to maximum bitlen value
                     self._ar_bit = np.array( (0,) + (1,)*bitlen-1, np.ubyte )
-            self._ar_byte = bit_to_byte(self._ar_bit)
+            self._ar_byte = _np_bit_to_byte(self._ar_bit)
             self._buf = self._ar_byte.tobytes()
             self._len_bit = len(self._ar_bit)
             self._cur = 0
@@ -738,582 +752,1145 @@ if _with_numpy:
 
 
 # Python stdlib array version
-else:
+class shar_array(object):
+    '''
+    shar object is an optimized bit-stream handler
     
-    class shar(object):
-        '''
-        shar object is an optimized bit-stream handler
-        
-        It has ways to work over aligned byte-stream or unaligned bit-stream,
-        exposing methods to:
-        - convert it to buffer, byte-array, bit-array, unsigned integer, 
-          signed integer
-        - consume it by buffer, byte-array, bit-array, unsigned integer, 
-          signed integer, for a given length in bits
+    It has ways to work over aligned byte-stream or unaligned bit-stream,
+    exposing methods to:
+    - convert it to buffer, byte-array, bit-array, unsigned integer, 
+      signed integer
+    - consume it by buffer, byte-array, bit-array, unsigned integer, 
+      signed integer, for a given length in bits
+    '''
+    
+    _REPR_POS = ('buf', 'bytes', 'bits', 'uint', 'int', 'hex', 'bin')
+    _REPR = 'buf'
+    _REPR_MAX = 512
+    
+    
+    def __init__(self, *args):
         '''
+        Initialize the shar object
         
-        _REPR_POS = ('buf', 'bytes', 'bits', 'uint', 'int', 'hex', 'bin')
-        _REPR = 'buf'
-        _REPR_MAX = 512
-        
+        Parameters
+        ----------
+        no arg: an empty shar object is initialized
+        single string arg: a shar object is initialized by setting a string 
+            buffer
+        single list arg: a shar object is initialized by setting a list of 
+            bytes, or bits if values in the list are only 0 or 1
+        double uint arg: a shar object is initialiazed by setting an 
+            unsigned integer with a given length in bits
         
-        def __init__(self, *args):
-            '''
-            Initialize the shar object
-            
-            Parameters
-            ----------
-            no arg: an empty shar object is initialized
-            single string arg: a shar object is initialized by setting a string 
-                buffer
-            single list arg: a shar object is initialized by setting a list of 
-                bytes, or bits if values in the list are only 0 or 1
-            double uint arg: a shar object is initialiazed by setting an 
-                unsigned integer with a given length in bits
-            
-            Returns
-            -------
-            None
-            '''
-            if len(args):
-                if isinstance(args[0], (str, bytes)):
-                    self.set_buf(args[0])
-                elif isinstance(args[0], (tuple, list)):
-                    tmp = array('B', args[0])
-                    # if only 0 and 1 in arg, consider it as a bit array
-                    if all(map(lambda i: i in (0,1), tmp)):
-                        self._ar_bit = tmp
-                        self._ar_byte = bit_to_byte(self._ar_bit)
-                    else:
-                        self._ar_byte = tmp
-                        self._ar_bit = byte_to_bit(self._ar_byte)
-                    self._buf = self._ar_byte.tostring()
-                    self._len_bit = len(self._ar_bit)
-                    self._cur = 0
-                elif len(args) == 2 and isinstance(args[0], (int, long)) \
-                and args[0] >= 0 and isinstance(args[1], (int, long)) \
-                and args[1] >= 0:
-                    self.set_uint(args[0], args[1])
+        Returns
+        -------
+        None
+        '''
+        if len(args):
+            if isinstance(args[0], (str, bytes)):
+                self.set_buf(args[0])
+            elif isinstance(args[0], (tuple, list)):
+                tmp = array('B', args[0])
+                # if only 0 and 1 in arg, consider it as a bit array
+                if all(map(lambda i: i in (0,1), tmp)):
+                    self._ar_bit = tmp
+                    self._ar_byte = _ar_bit_to_byte(self._ar_bit)
                 else:
-                    raise(TypeError('%s: argument type cannot be inferred' \
-                                    % list(args)))
-            else:
-                self._ar_bit = array('B', [])
-                self._ar_byte = array('B', [])
-                self._buf = b''
-                self._len_bit = 0
+                    self._ar_byte = tmp
+                    self._ar_bit = _ar_byte_to_bit(self._ar_byte)
+                self._buf = self._ar_byte.tostring()
+                self._len_bit = len(self._ar_bit)
                 self._cur = 0
+            elif len(args) == 2 and isinstance(args[0], (int, long)) \
+            and args[0] >= 0 and isinstance(args[1], (int, long)) \
+            and args[1] >= 0:
+                self.set_uint(args[0], args[1])
+            else:
+                raise(TypeError('%s: argument type cannot be inferred' \
+                                % list(args)))
+        else:
+            self._ar_bit = array('B', [])
+            self._ar_byte = array('B', [])
+            self._buf = b''
+            self._len_bit = 0
+            self._cur = 0
+    
+    def __len__(self):
+        '''
+        length in bits
+        '''
+        return self._len_bit - self._cur
+    
+    def __bin__(self):
+        '''
+        binary representation
+        '''
+        return ''.join(map(lambda i: chr(i+0x30), self._ar_bit[self._cur:]))
+    
+    def __hex__(self):
+        '''
+        hexadecimal representation
+        '''
+        return ''.join(map(lambda i: hex(i)[2:], self.to_bytes()))
+    
+    def __str__(self):
+        '''
+        human-readable representation
+        '''
+        return self.to_buf()
+    
+    def __repr__(self):
+        '''
+        Python object printable representation
+        '''
+        if self._REPR not in self._REPR_POS or self._REPR == 'buf':
+            r = repr(self.to_buf())
+            if len(r) > self._REPR_MAX:
+                return 'shar(%s...%s)' % (r[0:self._REPR_MAX], r[-2:])
+            else:
+                return 'shar(%s)' % r
+        elif self._REPR == 'bytes':
+            r = self.to_bytes()
+            if len(r) > self._REPR_MAX:
+                return 'shar([%s, ..., %s])' \
+                       % (str(list(r[0:self._REPR_MAX]))[1:-1], r[-1])
+            else:
+                return 'shar(%s)' % list(r)
+        elif self._REPR == 'bits':
+            r = self.to_bits()
+            if len(r) > self._REPR_MAX:
+                return 'shar([%s, ..., %s])' \
+                       % (str(list(r[0:self._REPR_MAX]))[1:-1], r[-1])
+            else:
+                return 'shar(%s)' % list(r)
+        elif self._REPR == 'uint':
+            r = str(self.to_uint())
+            if r[-1] == 'L':
+                r = r[:-1]
+            if len(r) > self._REPR_MAX:
+                return 'shar(%s...%s)' % (r[0:self._REPR_MAX], r[-1])
+            else:
+                return 'shar(%s)' % r
+        elif self._REPR == 'int':
+            r = repr(self.to_int())
+            if r[-1] == 'L':
+                r = r[:-1]
+            if len(r) > self._REPR_MAX:
+                return 'shar(%s...%s)' % (r[0:self._REPR_MAX], r[-1])
+            else:
+                return 'shar(%s)' % r
+        elif self._REPR == 'bin':
+            r = ''.join(('0b', self.__bin__()))
+            if len(r) > self._REPR_MAX:
+                return 'shar(%s...%s)' % (r[0:self._REPR_MAX], r[-1])
+            else:
+                return 'shar(%s)' % r
+        elif self._REPR == 'hex':
+            r = ''.join(('0x', self.__hex__()))
+            if len(r) > self._REPR_MAX:
+                return 'shar(%s...%s)' % (r[0:self._REPR_MAX], r[-1])
+            else:
+                return 'shar(%s)' % r
+    
+    def rewind(self, bitlen=None):
+        '''
+        rewind the shar object's cursor
         
-        def __len__(self):
-            '''
-            length in bits
-            '''
-            return self._len_bit - self._cur
+        Parameters
+        ----------
+        bitlen : None or unsigned integer
         
-        def __bin__(self):
-            '''
-            binary representation
-            '''
-            return ''.join(map(lambda i: chr(i+0x30), self._ar_bit[self._cur:]))
+        Returns
+        -------
+        None
+        '''
+        if bitlen is None or bitlen > self._cur:
+            self._cur = 0
+        elif bitlen > 0:
+            self._cur = self._cur - bitlen
+    
+    def set_buf(self, buf=b''):
+        '''
+        reinitialize the shar object and its cursor by setting a Python 
+        string buffer into it
         
-        def __hex__(self):
-            '''
-            hexadecimal representation
-            '''
-            return ''.join(map(lambda i: hex(i)[2:], self.to_bytes()))
+        Parameters
+        ----------
+        buf : string buffer
         
-        def __str__(self):
-            '''
-            human-readable representation
-            '''
-            return self.to_buf()
+        Returns
+        -------
+        None
+        '''
+        self._buf = buf
+        self._ar_byte = array('B')
+        self._ar_byte.fromstring(buf)
+        self._ar_bit = _ar_byte_to_bit(self._ar_byte)
+        self._len_bit = len(self._ar_bit)
+        self._cur = 0
+    
+    def to_buf(self, bitlen=None):
+        '''
+        return the Python string buffer of the shar object, starting at the
+        cursor position and ending after the given bitlen
         
-        def __repr__(self):
-            '''
-            Python object printable representation
-            '''
-            if self._REPR not in self._REPR_POS or self._REPR == 'buf':
-                r = repr(self.to_buf())
-                if len(r) > self._REPR_MAX:
-                    return 'shar(%s...%s)' % (r[0:self._REPR_MAX], r[-2:])
-                else:
-                    return 'shar(%s)' % r
-            elif self._REPR == 'bytes':
-                r = self.to_bytes()
-                if len(r) > self._REPR_MAX:
-                    return 'shar([%s, ..., %s])' \
-                           % (str(list(r[0:self._REPR_MAX]))[1:-1], r[-1])
-                else:
-                    return 'shar(%s)' % list(r)
-            elif self._REPR == 'bits':
-                r = self.to_bits()
-                if len(r) > self._REPR_MAX:
-                    return 'shar([%s, ..., %s])' \
-                           % (str(list(r[0:self._REPR_MAX]))[1:-1], r[-1])
-                else:
-                    return 'shar(%s)' % list(r)
-            elif self._REPR == 'uint':
-                r = str(self.to_uint())
-                if r[-1] == 'L':
-                    r = r[:-1]
-                if len(r) > self._REPR_MAX:
-                    return 'shar(%s...%s)' % (r[0:self._REPR_MAX], r[-1])
-                else:
-                    return 'shar(%s)' % r
-            elif self._REPR == 'int':
-                r = repr(self.to_int())
-                if r[-1] == 'L':
-                    r = r[:-1]
-                if len(r) > self._REPR_MAX:
-                    return 'shar(%s...%s)' % (r[0:self._REPR_MAX], r[-1])
-                else:
-                    return 'shar(%s)' % r
-            elif self._REPR == 'bin':
-                r = ''.join(('0b', self.__bin__()))
-                if len(r) > self._REPR_MAX:
-                    return 'shar(%s...%s)' % (r[0:self._REPR_MAX], r[-1])
-                else:
-                    return 'shar(%s)' % r
-            elif self._REPR == 'hex':
-                r = ''.join(('0x', self.__hex__()))
-                if len(r) > self._REPR_MAX:
-                    return 'shar(%s...%s)' % (r[0:self._REPR_MAX], r[-1])
-                else:
-                    return 'shar(%s)' % r
+        Parameters
+        ----------
+        bitlen : length in bits for the requested string buffer
         
-        def rewind(self, bitlen=None):
-            '''
-            rewind the shar object's cursor
-            
-            Parameters
-            ----------
-            bitlen : None or unsigned integer
-            
-            Returns
-            -------
-            None
-            '''
-            if bitlen is None or bitlen > self._cur:
-                self._cur = 0
-            elif bitlen > 0:
-                self._cur = self._cur - bitlen
+        Returns
+        -------
+        A Python string
+        '''
+        if bitlen is None:
+            bitlen = self._len_bit - self._cur
+        elif self._cur + bitlen > self._len_bit:
+            bitlen = self._len_bit - self._cur
+        off_byte, off_bit = self._cur // 8, self._cur % 8
+        len_byte, len_bit = bitlen // 8, bitlen % 8
+        if off_bit == 0 and len_bit == 0:
+            # aligned access
+            return self._buf[off_byte:off_byte+len_byte]
+        else:
+            # unaligned access
+            return _ar_bit_to_byte(self._ar_bit[self._cur:self._cur+bitlen])\
+                   .tostring()
+    
+    def get_buf(self, bitlen=None):
+        '''
+        return the Python string buffer of the shar object, starting at the
+        cursor position and ending after the given bitlen
         
-        def set_buf(self, buf=b''):
-            '''
-            reinitialize the shar object and its cursor by setting a Python 
-            string buffer into it
-            
-            Parameters
-            ----------
-            buf : string buffer
-            
-            Returns
-            -------
-            None
-            '''
-            self._buf = buf
-            self._ar_byte = array('B')
-            self._ar_byte.fromstring(buf)
-            self._ar_bit = byte_to_bit(self._ar_byte)
-            self._len_bit = len(self._ar_bit)
-            self._cur = 0
+        the shar object's cursor is incremented according to bitlen
         
-        def to_buf(self, bitlen=None):
-            '''
-            return the Python string buffer of the shar object, starting at the
-            cursor position and ending after the given bitlen
-            
-            Parameters
-            ----------
-            bitlen : length in bits for the requested string buffer
-            
-            Returns
-            -------
-            A Python string
-            '''
-            if bitlen is None:
-                bitlen = self._len_bit - self._cur
-            elif self._cur + bitlen > self._len_bit:
-                bitlen = self._len_bit - self._cur
-            off_byte, off_bit = self._cur // 8, self._cur % 8
-            len_byte, len_bit = bitlen // 8, bitlen % 8
-            if off_bit == 0 and len_bit == 0:
-                # aligned access
-                return self._buf[off_byte:off_byte+len_byte]
-            else:
-                # unaligned access
-                return bit_to_byte(self._ar_bit[self._cur:]).tostring()
+        Parameters
+        ----------
+        bitlen : length in bits for the requested string buffer
         
-        def get_buf(self, bitlen=None):
-            '''
-            return the Python string buffer of the shar object, starting at the
-            cursor position and ending after the given bitlen
-            
-            the shar object's cursor is incremented according to bitlen
-            
-            Parameters
-            ----------
-            bitlen : length in bits for the requested string buffer
-            
-            Returns
-            -------
-            A Python string buffer, zero-padded at the end if required
-            '''
-            if bitlen is None:
-                bitlen = self._len_bit - self._cur
-            elif self._cur + bitlen > self._len_bit:
-                bitlen = self._len_bit - self._cur
-            off_byte, off_bit = self._cur // 8, self._cur % 8
-            len_byte, len_bit = bitlen // 8, bitlen % 8
-            if off_bit == 0 and len_bit == 0:
-                # aligned access
-                self._cur += bitlen
-                return self._buf[off_byte:off_byte+len_byte]
-            else:
-                # unaligned access
-                cur = self._cur
-                self._cur += bitlen
-                return bit_to_byte(self._ar_bit[cur:cur+bitlen]).tostring()
+        Returns
+        -------
+        A Python string buffer, zero-padded at the end if required
+        '''
+        if bitlen is None:
+            bitlen = self._len_bit - self._cur
+        elif self._cur + bitlen > self._len_bit:
+            bitlen = self._len_bit - self._cur
+        off_byte, off_bit = self._cur // 8, self._cur % 8
+        len_byte, len_bit = bitlen // 8, bitlen % 8
+        if off_bit == 0 and len_bit == 0:
+            # aligned access
+            self._cur += bitlen
+            return self._buf[off_byte:off_byte+len_byte]
+        else:
+            # unaligned access
+            cur = self._cur
+            self._cur += bitlen
+            return _ar_bit_to_byte(self._ar_bit[cur:cur+bitlen]).tostring()
+    
+    def set_bytes(self, bytes=[]):
+        '''
+        reinitialize the shar object and its cursor by setting a Python list 
+        of uint8 integral value into it
         
-        def set_bytes(self, bytes=[]):
-            '''
-            reinitialize the shar object and its cursor by setting a Python list 
-            of uint8 integral value into it
-            
-            Parameters
-            ----------
-            bytes : list or tuple or array of uint8 values
-            
-            Returns
-            -------
-            None
-            '''
-            if isinstance(bytes, array):
-                self._ar_byte = bytes[:]
-            else:
-                if isinstance(bytes, tuple):
-                    bytes = list(bytes)
-                self._ar_byte = array('B')
-                self._ar_byte.fromlist(bytes)
-            self._ar_bit = byte_to_bit(self._ar_byte)
-            self._buf = self._ar_byte.tostring()
-            self._len_bit = len(self._ar_bit)
-            self._cur = 0
+        Parameters
+        ----------
+        bytes : list or tuple or array of uint8 values
         
-        def to_bytes(self, bitlen=None):
-            '''
-            return the byte array of the shar object, starting at the cursor 
-            position and ending after the given bitlen
-            
-            Parameters
-            ----------
-            bitlen : length in bits for the requested byte array
-            
-            Returns
-            -------
-            An array of type uchar, zero-padded at the end if required
-            '''
-            if bitlen is None:
-                bitlen = self._len_bit - self._cur
-            elif self._cur + bitlen > self._len_bit:
-                bitlen = self._len_bit - self._cur
-            off_byte, off_bit = self._cur // 8, self._cur % 8
-            len_byte, len_bit = bitlen // 8, bitlen % 8
-            if off_bit == 0 and len_bit == 0:
-                # aligned access
-                return self._ar_byte[off_byte:off_byte+len_byte]
-            else:
-                # unaligned access
-                return bit_to_byte(self._ar_bit[self._cur:self._cur+bitlen])
+        Returns
+        -------
+        None
+        '''
+        if isinstance(bytes, array):
+            self._ar_byte = bytes[:]
+        else:
+            if isinstance(bytes, tuple):
+                bytes = list(bytes)
+            self._ar_byte = array('B')
+            self._ar_byte.fromlist(bytes)
+        self._ar_bit = _ar_byte_to_bit(self._ar_byte)
+        self._buf = self._ar_byte.tostring()
+        self._len_bit = len(self._ar_bit)
+        self._cur = 0
+    
+    def to_bytes(self, bitlen=None):
+        '''
+        return the byte array of the shar object, starting at the cursor 
+        position and ending after the given bitlen
         
-        def get_bytes(self, bitlen=None):
-            '''
-            return the byte array of the shar object, starting at the cursor 
-            position and ending after the given bitlen
-            
-            the shar object's cursor is incremented according to bitlen
-            
-            Parameters
-            ----------
-            bitlen : length in bits for the requested byte array
-            
-            Returns
-            -------
-            An array of type uchar, zero-padded at the end if required
-            '''
-            if bitlen is None:
-                bitlen = self._len_bit - self._cur
-            elif self._cur + bitlen > self._len_bit:
-                bitlen = self._len_bit - self._cur
-            off_byte, off_bit = self._cur // 8, self._cur % 8
-            len_byte, len_bit = bitlen // 8, bitlen % 8
-            if off_bit == 0 and len_bit == 0:
-                # aligned access
-                self._cur += bitlen
-                return self._ar_byte[off_byte:off_byte+len_byte]
-            else:
-                # unaligned access
-                cur = self._cur
-                self._cur += bitlen
-                return bit_to_byte(self._ar_bit[cur:cur+bitlen])
+        Parameters
+        ----------
+        bitlen : length in bits for the requested byte array
         
-        def set_bits(self, bits=[]):
-            '''
-            reinitialize the shar object and its cursor by setting a Python list 
-            of 0 or 1 integral value into it
-            
-            Parameters
-            ----------
-            bits : list or tuple or array of 0 or 1 values
-            
-            Returns
-            -------
-            None
-            '''
-            if isinstance(bits, array):
-                self._ar_bit = bits[:]
-            else:
-                if isinstance(bits, tuple):
-                    bits = list(bits)
-                self._ar_bit = array('B')
-                self._ar_bit.fromlist(bits)
-            self._ar_byte = bit_to_byte(self._ar_bit)
-            self._buf = self._ar_byte.tostring()
-            self._len_bit = len(self._ar_bit)
-            self._cur = 0
+        Returns
+        -------
+        An array of type uchar, zero-padded at the end if required
+        '''
+        if bitlen is None:
+            bitlen = self._len_bit - self._cur
+        elif self._cur + bitlen > self._len_bit:
+            bitlen = self._len_bit - self._cur
+        off_byte, off_bit = self._cur // 8, self._cur % 8
+        len_byte, len_bit = bitlen // 8, bitlen % 8
+        if off_bit == 0 and len_bit == 0:
+            # aligned access
+            return self._ar_byte[off_byte:off_byte+len_byte]
+        else:
+            # unaligned access
+            return _ar_bit_to_byte(self._ar_bit[self._cur:self._cur+bitlen])
+    
+    def get_bytes(self, bitlen=None):
+        '''
+        return the byte array of the shar object, starting at the cursor 
+        position and ending after the given bitlen
         
-        def to_bits(self, bitlen=None):
-            '''
-            return the bit array of the shar object, starting at the cursor 
-            position and ending after the given bitlen
-            
-            Parameters
-            ----------
-            bitlen : length in bits for the requested bit array
-            
-            Returns
-            -------
-            An array of type uchar, with only 0 and 1 values
-            '''
-            if bitlen is None:
-                bitlen = self._len_bit - self._cur
-            elif self._cur + bitlen > self._len_bit:
-                bitlen = self._len_bit - self._cur
-            return self._ar_bit[self._cur:self._cur+bitlen]
+        the shar object's cursor is incremented according to bitlen
         
-        def get_bits(self, bitlen=None):
-            '''
-            return the bit array of the shar object, starting at the cursor 
-            position and ending after the given bitlen
-            
-            the shar object's cursor is incremented according to bitlen
-            
-            Parameters
-            ----------
-            bitlen : length in bits for the requested bit array
-            
-            Returns
-            -------
-            An array of type uchar, with only 0 and 1 values
-            '''
-            if bitlen is None:
-                bitlen = self._len_bit - self._cur
-            elif self._cur + bitlen > self._len_bit:
-                bitlen = self._len_bit - self._cur
+        Parameters
+        ----------
+        bitlen : length in bits for the requested byte array
+        
+        Returns
+        -------
+        An array of type uchar, zero-padded at the end if required
+        '''
+        if bitlen is None:
+            bitlen = self._len_bit - self._cur
+        elif self._cur + bitlen > self._len_bit:
+            bitlen = self._len_bit - self._cur
+        off_byte, off_bit = self._cur // 8, self._cur % 8
+        len_byte, len_bit = bitlen // 8, bitlen % 8
+        if off_bit == 0 and len_bit == 0:
+            # aligned access
+            self._cur += bitlen
+            return self._ar_byte[off_byte:off_byte+len_byte]
+        else:
+            # unaligned access
             cur = self._cur
             self._cur += bitlen
-            return self._ar_bit[cur:cur+bitlen]
+            return _ar_bit_to_byte(self._ar_bit[cur:cur+bitlen])
+    
+    def set_bits(self, bits=[]):
+        '''
+        reinitialize the shar object and its cursor by setting a Python list 
+        of 0 or 1 integral value into it
         
-        def set_uint(self, val=0, bitlen=None):
-            '''
-            reinitialize the shar object and its cursor by setting an arbitrary 
-            unsigned integral value into it
-            
-            big endian representation is used (MSB on the most left, LSB on the 
-            most right)
-            
-            Parameters
-            ----------
-            val : unsigned integer (can be long)
-            bitlen : number of bits to be used to store the value; if less than 
-                required by the value, value is majored to the maximum value 
-                according to bitlen; if bitlen is None, encoding is done in the
-                minimum number of bits
-            
-            Returns
-            -------
-            None
-            '''
-            val = list(map(int, bin(val)[2:]))
-            if bitlen is None:
-                self._ar_bit = array('B', val)
-            elif bitlen > len(val):
-                # padding val
-                self._ar_bit = array('B', [0]*(bitlen-len(val)) + val)
-            else:
-                # majoring to maximum bitlen value
-                self._ar_bit = array('B', (1,)*bitlen )
-            self._ar_byte = bit_to_byte(self._ar_bit)
-            self._buf = self._ar_byte.tostring()
-            self._len_bit = len(self._ar_bit)
-            self._cur = 0
+        Parameters
+        ----------
+        bits : list or tuple or array of 0 or 1 values
         
-        def to_uint(self, bitlen=None):
-            '''
-            return the unsigned integral value of the shar object, starting at 
-            the cursor position and ending after the given bitlen
-            
-            Parameters
-            ----------
-            bitlen : length in bits for the requested unsigned integer
-            
-            Returns
-            -------
-            An unsigned integral value
-            '''
-            if bitlen is None:
-                bitlen = self._len_bit - self._cur
-            elif self._cur + bitlen > self._len_bit:
-                bitlen = self._len_bit - self._cur
-            if self._cur == self._len_bit or bitlen == 0:
-                return None
-            return int(''.join(map(lambda i: chr(i+0x30), 
-                               self._ar_bit[self._cur:self._cur+bitlen])), 2)
+        Returns
+        -------
+        None
+        '''
+        if isinstance(bits, array):
+            self._ar_bit = bits[:]
+        else:
+            if isinstance(bits, tuple):
+                bits = list(bits)
+            self._ar_bit = array('B')
+            self._ar_bit.fromlist(bits)
+        self._ar_byte = _ar_bit_to_byte(self._ar_bit)
+        self._buf = self._ar_byte.tostring()
+        self._len_bit = len(self._ar_bit)
+        self._cur = 0
+    
+    def to_bits(self, bitlen=None):
+        '''
+        return the bit array of the shar object, starting at the cursor 
+        position and ending after the given bitlen
         
-        def get_uint(self, bitlen=None):
-            '''
-            return the unsigned integral value of the shar object, starting at 
-            the cursor position and ending after the given bitlen
-            
-            the shar object's cursor is incremented according to bitlen
-            
-            Parameters
-            ----------
-            bitlen : length in bits for the requested unsigned integer
-            
-            Returns
-            -------
-            An unsigned integral value
-            '''
-            if self._cur == self._len_bit:
-                return None
-            if self._cur + bitlen > self._len_bit:
-                bitlen = self._len_bit - self._cur
-            cur = self._cur
+        Parameters
+        ----------
+        bitlen : length in bits for the requested bit array
+        
+        Returns
+        -------
+        An array of type uchar, with only 0 and 1 values
+        '''
+        if bitlen is None:
+            bitlen = self._len_bit - self._cur
+        elif self._cur + bitlen > self._len_bit:
+            bitlen = self._len_bit - self._cur
+        return self._ar_bit[self._cur:self._cur+bitlen]
+    
+    def get_bits(self, bitlen=None):
+        '''
+        return the bit array of the shar object, starting at the cursor 
+        position and ending after the given bitlen
+        
+        the shar object's cursor is incremented according to bitlen
+        
+        Parameters
+        ----------
+        bitlen : length in bits for the requested bit array
+        
+        Returns
+        -------
+        An array of type uchar, with only 0 and 1 values
+        '''
+        if bitlen is None:
+            bitlen = self._len_bit - self._cur
+        elif self._cur + bitlen > self._len_bit:
+            bitlen = self._len_bit - self._cur
+        cur = self._cur
+        self._cur += bitlen
+        return self._ar_bit[cur:cur+bitlen]
+    
+    def set_uint(self, val=0, bitlen=None):
+        '''
+        reinitialize the shar object and its cursor by setting an arbitrary 
+        unsigned integral value into it
+        
+        big endian representation is used (MSB on the most left, LSB on the 
+        most right)
+        
+        Parameters
+        ----------
+        val : unsigned integer (can be long)
+        bitlen : number of bits to be used to store the value; if less than 
+            required by the value, value is majored to the maximum value 
+            according to bitlen; if bitlen is None, encoding is done in the
+            minimum number of bits
+        
+        Returns
+        -------
+        None
+        '''
+        val = list(map(int, bin(val)[2:]))
+        if bitlen is None:
+            self._ar_bit = array('B', val)
+        elif bitlen >= len(val):
+            # padding val
+            self._ar_bit = array('B', [0]*(bitlen-len(val)) + val)
+        else:
+            # majoring to maximum bitlen value
+            self._ar_bit = array('B', (1,)*bitlen )
+        self._ar_byte = _ar_bit_to_byte(self._ar_bit)
+        self._buf = self._ar_byte.tostring()
+        self._len_bit = len(self._ar_bit)
+        self._cur = 0
+    
+    def to_uint(self, bitlen=None):
+        '''
+        return the unsigned integral value of the shar object, starting at 
+        the cursor position and ending after the given bitlen
+        
+        Parameters
+        ----------
+        bitlen : length in bits for the requested unsigned integer
+        
+        Returns
+        -------
+        An unsigned integral value
+        '''
+        if bitlen is None:
+            bitlen = self._len_bit - self._cur
+        elif self._cur + bitlen > self._len_bit:
+            bitlen = self._len_bit - self._cur
+        if self._cur == self._len_bit or bitlen == 0:
+            return None
+        return int(''.join(map(lambda i: chr(i+0x30), 
+                           self._ar_bit[self._cur:self._cur+bitlen])), 2)
+    
+    def get_uint(self, bitlen=None):
+        '''
+        return the unsigned integral value of the shar object, starting at 
+        the cursor position and ending after the given bitlen
+        
+        the shar object's cursor is incremented according to bitlen
+        
+        Parameters
+        ----------
+        bitlen : length in bits for the requested unsigned integer
+        
+        Returns
+        -------
+        An unsigned integral value
+        '''
+        if bitlen is None:
+            bitlen = self._len_bit - self._cur
+        elif self._cur + bitlen > self._len_bit:
+            bitlen = self._len_bit - self._cur
+        if self._cur == self._len_bit or bitlen == 0:
+            return None
+        cur = self._cur
+        self._cur += bitlen
+        return int(''.join(map(lambda i: chr(i+0x30), 
+                           self._ar_bit[cur:cur+bitlen])), 2)
+    
+    def set_int(self, val=0, bitlen=32):
+        '''
+        reinitialize the shar object and its cursor by setting an arbitrary 
+        signed integral value into it (2's complement representation is 
+        used)
+        
+        big endian representation is used (MSB on the most left, LSB on the 
+        most right)
+        
+        Parameters
+        ----------
+        val : signed integer (can be long)
+        bitlen : number of bits to be used to store the value (minus 1 bit
+            to store the sign); if less than required by the value, absolute 
+            value is majored by the max value according to bitlen
+        
+        Returns
+        -------
+        None
+        '''
+        if val < 0:
+            val = abs(val)
+            valmax = pow(2, bitlen-1)
+            if val < valmax:
+                # padding val
+                val = list(map(int, bin(valmax-val)[2:]))
+                self._ar_bit = array('B', [1] \
+                                        + [0]*(bitlen-1-len(val)) \
+                                        + val)
+            else:
+                # majoring to maximum bitlen value
+                self._ar_bit = array('B', (1,) + (0,)*(bitlen-1))
+        else:
+            valmax = pow(2, bitlen-1) - 1
+            if val <= valmax:
+                # padding val
+                val_bin = list(map(int, bin(val)[2:]))
+                self._ar_bit = array('B', [0]*(bitlen-len(val_bin)) \
+                                        + val_bin)
+            else:
+                # majoring to maximum bitlen value
+                self._ar_bit = array('B', (0,) + (1,)*(bitlen-1))
+        self._ar_byte = _ar_bit_to_byte(self._ar_bit)
+        self._buf = self._ar_byte.tostring()
+        self._len_bit = len(self._ar_bit)
+        self._cur = 0
+    
+    def to_int(self, bitlen=None):
+        '''
+        return the signed integral value of the shar object, starting at the
+        cursor position and ending after the given bitlen
+        
+        Parameters
+        ----------
+        bitlen : length in bits for the requested signed integer
+        
+        Returns
+        -------
+        A signed integral value
+        '''
+        if bitlen is None:
+            bitlen = self._len_bit - self._cur
+        elif self._cur + bitlen > self._len_bit:
+            bitlen = self._len_bit - self._cur
+        if self._cur >= self._len_bit-1 or bitlen <= 1:
+            return None
+        val = int(''.join(map(lambda i: chr(i+0x30), 
+                          self._ar_bit[self._cur+1:self._cur+bitlen])), 2)
+        if self._ar_bit[self._cur] == 1:
+            # negative integer
+            valmax = pow(2, bitlen-1)
+            return val - valmax
+        else:
+            # positive integer
+            return val
+    
+    def get_int(self, bitlen=None):
+        '''
+        return the signed integral value of the shar object, starting at the
+        cursor position and ending after the given bitlen
+        
+        The shar object's cursor is incremented according to bitlen
+        
+        Parameters
+        ----------
+        bitlen : length in bits for the requested signed integer
+        
+        Returns
+        -------
+        A signed integral value
+        '''
+        if bitlen is None:
+            bitlen = self._len_bit - self._cur
+        elif self._cur + bitlen > self._len_bit:
+            bitlen = self._len_bit - self._cur
+        if self._cur >= self._len_bit-1 or bitlen <= 1:
+            return None
+        val = int(''.join(map(lambda i: chr(i+0x30), 
+                          self._ar_bit[self._cur+1:self._cur+bitlen])), 2)
+        if self._ar_bit[self._cur] == 1:
+            # negative integer
+            self._cur +=  bitlen
+            valmax = pow(2, bitlen-1)
+            return val - valmax
+        else:
+            # positive integer
             self._cur += bitlen
-            return int(''.join(map(lambda i: chr(i+0x30), 
-                               self._ar_bit[cur:cur+bitlen])), 2)
+            return val
+
+
+# integer version
+# conversions between bit arrays and strings of '0' and '1' characters
+_BITS_TO_BIN = maketrans('\x00\x01', '01')
+_BIN_TO_BITS = maketrans('01', '\x00\x01')
+
+def _to_bytes(buf):
+    # byte array from a string buffer
+    if _with_numpy:
+        return np.fromstring(buf, np.ubyte)
+    else:
+        return array('B', buf)
+
+class shar_int(object):
+    '''
+    shar object is an optimized bit-stream handler
+    
+    This version keeps the bit-stream in a single string buffer, together with
+    a cursor in bits: values are extracted from the buffer with integer shifts
+    and masks, without converting the whole bit-stream into arrays of bits
+    
+    It has ways to work over aligned byte-stream or unaligned bit-stream,
+    exposing methods to:
+    - convert it to buffer, byte-array, bit-array, unsigned integer, 
+      signed integer
+    - consume it by buffer, byte-array, bit-array, unsigned integer, 
+      signed integer, for a given length in bits
+    '''
+    
+    _REPR_POS = ('buf', 'bytes', 'bits', 'uint', 'int', 'hex', 'bin')
+    _REPR = 'buf'
+    _REPR_MAX = 512
+    
+    
+    def __init__(self, *args):
+        '''
+        Initialize the shar object
         
-        def set_int(self, val=0, bitlen=32):
-            '''
-            reinitialize the shar object and its cursor by setting an arbitrary 
-            signed integral value into it (2's complement representation is 
-            used)
-            
-            big endian representation is used (MSB on the most left, LSB on the 
-            most right)
-            
-            Parameters
-            ----------
-            val : signed integer (can be long)
-            bitlen : number of bits to be used to store the value (minus 1 bit
-                to store the sign); if less than required by the value, absolute 
-                value is majored by the max value according to bitlen
-            
-            Returns
-            -------
-            None
-            '''
-            if val < 0:
-                val = abs(val)
-                valmax = pow(2, bitlen-1)
-                if val < valmax:
-                    # padding val
-                    val = list(map(int, bin(valmax-val)[2:]))
-                    self._ar_bit = array('B', [1] \
-                                            + [0]*(bitlen-1-len(val)) \
-                                            + val)
+        Parameters
+        ----------
+        no arg: an empty shar object is initialized
+        single string arg: a shar object is initialized by setting a string 
+            buffer
+        single list arg: a shar object is initialized by setting a list of 
+            bytes, or bits if values in the list are only 0 or 1
+        double uint arg: a shar object is initialiazed by setting an 
+            unsigned integer with a given length in bits
+        
+        Returns
+        -------
+        None
+        '''
+        if len(args):
+            if isinstance(args[0], (str, bytes)):
+                self.set_buf(args[0])
+            elif isinstance(args[0], (tuple, list, array)) \
+            or _with_numpy and isinstance(args[0], np.ndarray):
+                # if only 0 and 1 in arg, consider it as a bit array
+                if all([i in (0, 1) for i in args[0]]):
+                    self.set_bits(args[0])
                 else:
-                    # majoring to maximum bitlen value
-                    self._ar_bit = array('B', (1,) + (0,)*(bitlen-1))
+                    self.set_bytes(args[0])
+            elif len(args) == 2 and isinstance(args[0], (int, long)) \
+            and args[0] >= 0 and isinstance(args[1], (int, long)) \
+            and args[1] >= 0:
+                self.set_uint(args[0], args[1])
             else:
-                valmax = pow(2, bitlen-1) - 1
-                if val <= valmax:
-                    # padding val
-                    val_bin = list(map(int, bin(val)[2:]))
-                    self._ar_bit = array('B', [0]*(bitlen-len(val_bin)) \
-                                            + val_bin)
-                else:
-                    # majoring to maximum bitlen value
-                    self._ar_bit = array('B', (0,) + (1,)*(bitlen-1))
-            self._ar_byte = bit_to_byte(self._ar_bit)
-            self._buf = self._ar_byte.tostring()
-            self._len_bit = len(self._ar_bit)
+                raise(TypeError('%s: argument type cannot be inferred' \
+                                % list(args)))
+        else:
+            self._buf = b''
+            self._len_bit = 0
             self._cur = 0
-        
-        def to_int(self, bitlen=None):
-            '''
-            return the signed integral value of the shar object, starting at the
-            cursor position and ending after the given bitlen
-            
-            Parameters
-            ----------
-            bitlen : length in bits for the requested signed integer
-            
-            Returns
-            -------
-            A signed integral value
-            '''
-            if bitlen is None:
-                bitlen = self._len_bit - self._cur
-            elif self._cur + bitlen > self._len_bit:
-                bitlen = self._len_bit - self._cur
-            if self._cur >= self._len_bit-1 or bitlen <= 1:
-                return None
-            val = int(''.join(map(lambda i: chr(i+0x30), 
-                              self._ar_bit[self._cur+1:self._cur+bitlen])), 2)
-            if self._ar_bit[self._cur] == 1:
-                # negative integer
-                valmax = pow(2, bitlen-1)
-                return val - valmax
+    
+    def __len__(self):
+        '''
+        length in bits
+        '''
+        return self._len_bit - self._cur
+    
+    def __bin__(self):
+        '''
+        binary representation
+        '''
+        bitlen = self._len_bit - self._cur
+        if bitlen == 0:
+            return ''
+        return bin(self.__uint(self._cur, bitlen))[2:].zfill(bitlen)
+    
+    def __hex__(self):
+        '''
+        hexadecimal representation
+        '''
+        return ''.join(map(lambda i: hex(i)[2:], self.to_bytes()))
+    
+    def __str__(self):
+        '''
+        human-readable representation
+        '''
+        return self.to_buf()
+    
+    def __repr__(self):
+        '''
+        Python object printable representation
+        '''
+        if self._REPR not in self._REPR_POS or self._REPR == 'buf':
+            r = repr(self.to_buf())
+            if len(r) > self._REPR_MAX:
+                return 'shar(%s...%s)' % (r[0:self._REPR_MAX], r[-2:])
             else:
-                # positive integer
-                return val
+                return 'shar(%s)' % r
+        elif self._REPR == 'bytes':
+            r = self.to_bytes()
+            if len(r) > self._REPR_MAX:
+                return 'shar([%s, ..., %s])' \
+                       % (str(list(r[0:self._REPR_MAX]))[1:-1], r[-1])
+            else:
+                return 'shar(%s)' % list(r)
+        elif self._REPR == 'bits':
+            r = self.to_bits()
+            if len(r) > self._REPR_MAX:
+                return 'shar([%s, ..., %s])' \
+                       % (str(list(r[0:self._REPR_MAX]))[1:-1], r[-1])
+            else:
+                return 'shar(%s)' % list(r)
+        elif self._REPR == 'uint':
+            r = str(self.to_uint())
+            if r[-1] == 'L':
+                r = r[:-1]
+            if len(r) > self._REPR_MAX:
+                return 'shar(%s...%s)' % (r[0:self._REPR_MAX], r[-1])
+            else:
+                return 'shar(%s)' % r
+        elif self._REPR == 'int':
+            r = repr(self.to_int())
+            if r[-1] == 'L':
+                r = r[:-1]
+            if len(r) > self._REPR_MAX:
+                return 'shar(%s...%s)' % (r[0:self._REPR_MAX], r[-1])
+            else:
+                return 'shar(%s)' % r
+        elif self._REPR == 'bin':
+            r = ''.join(('0b', self.__bin__()))
+            if len(r) > self._REPR_MAX:
+                return 'shar(%s...%s)' % (r[0:self._REPR_MAX], r[-1])
+            else:
+                return 'shar(%s)' % r
+        elif self._REPR == 'hex':
+            r = ''.join(('0x', self.__hex__()))
+            if len(r) > self._REPR_MAX:
+                return 'shar(%s...%s)' % (r[0:self._REPR_MAX], r[-1])
+            else:
+                return 'shar(%s)' % r
+    
+    def rewind(self, bitlen=None):
+        '''
+        rewind the shar object's cursor
         
-        def get_int(self, bitlen=None):
-            '''
-            return the signed integral value of the shar object, starting at the
-            cursor position and ending after the given bitlen
-            
-            The shar object's cursor is incremented according to bitlen
-            
-            Parameters
-            ----------
-            bitlen : length in bits for the requested signed integer
-            
-            Returns
-            -------
-            A signed integral value
-            '''
-            if bitlen is None:
-                bitlen = self._len_bit - self._cur
-            elif self._cur + bitlen > self._len_bit:
-                bitlen = self._len_bit - self._cur
-            if self._cur >= self._len_bit-1 or bitlen <= 1:
-                return None
-            val = int(''.join(map(lambda i: chr(i+0x30), 
-                              self._ar_bit[self._cur+1:self._cur+bitlen])), 2)
-            if self._ar_bit[self._cur] == 1:
-                # negative integer
-                self._cur +=  bitlen
-                valmax = pow(2, bitlen-1)
-                return val - valmax
+        Parameters
+        ----------
+        bitlen : None or unsigned integer
+        
+        Returns
+        -------
+        None
+        '''
+        if bitlen is None or bitlen > self._cur:
+            self._cur = 0
+        elif bitlen > 0:
+            self._cur = self._cur - bitlen
+    
+    def __set_uint(self, val, bitlen):
+        # set the stream to the unsigned val, on bitlen bits
+        # (val is left-aligned in the buffer, its last byte being zero-padded)
+        if bitlen:
+            self._buf = unhexlify('%0*x' % ((bitlen+7)>>3<<1, val<<(-bitlen%8)))
+        else:
+            self._buf = b''
+        self._len_bit = bitlen
+        self._cur = 0
+    
+    def __uint(self, cur, bitlen):
+        # unsigned value of the bitlen bits at offset cur, bitlen > 0
+        off, end = cur >> 3, cur + bitlen
+        last = (end + 7) >> 3
+        if last - off == 1:
+            val = ord(self._buf[off])
+        else:
+            val = int(hexlify(self._buf[off:last]), 16)
+        return (val >> (-end % 8)) & ((1 << bitlen) - 1)
+    
+    def __buf(self, cur, bitlen):
+        # string buffer of the bitlen bits at offset cur, zero-padded at the end
+        if cur % 8 == 0:
+            buf = self._buf[cur>>3:(cur+bitlen+7)>>3]
+            if bitlen % 8:
+                # clearing the bits of the last byte after bitlen
+                return buf[:-1] \
+                       + chr(ord(buf[-1]) & (0xff00 >> bitlen % 8) & 0xff)
+            return buf
+        elif bitlen == 0:
+            return b''
+        return unhexlify('%0*x' % ((bitlen+7)>>3<<1, 
+                                   self.__uint(cur, bitlen)<<(-bitlen%8)))
+    
+    def __bits(self, cur, bitlen):
+        # bit array of the bitlen bits at offset cur
+        if _with_numpy:
+            off = cur % 8
+            ar_byte = np.frombuffer(self._buf[cur>>3:(cur+bitlen+7)>>3],
+                                    np.ubyte)
+            return np.unpackbits(ar_byte)[off:off+bitlen]
+        elif bitlen == 0:
+            return array('B')
+        return array('B', bin(self.__uint(cur, bitlen))[2:].zfill(bitlen)\
+                          .translate(_BIN_TO_BITS))
+    
+    def set_buf(self, buf=b''):
+        '''
+        reinitialize the shar object and its cursor by setting a Python 
+        string buffer into it
+        
+        Parameters
+        ----------
+        buf : string buffer
+        
+        Returns
+        -------
+        None
+        '''
+        self._buf = buf
+        self._len_bit = len(buf) << 3
+        self._cur = 0
+    
+    def to_buf(self, bitlen=None):
+        '''
+        return the Python string buffer of the shar object, starting at the
+        cursor position and ending after the given bitlen
+        
+        Parameters
+        ----------
+        bitlen : length in bits for the requested string buffer
+        
+        Returns
+        -------
+        A Python string
+        '''
+        if bitlen is None or self._cur + bitlen > self._len_bit:
+            bitlen = self._len_bit - self._cur
+        return self.__buf(self._cur, bitlen)
+    
+    def get_buf(self, bitlen=None):
+        '''
+        return the Python string buffer of the shar object, starting at the
+        cursor position and ending after the given bitlen
+        
+        the shar object's cursor is incremented according to bitlen
+        
+        Parameters
+        ----------
+        bitlen : length in bits for the requested string buffer
+        
+        Returns
+        -------
+        A Python string buffer, zero-padded at the end if required
+        '''
+        if bitlen is None or self._cur + bitlen > self._len_bit:
+            bitlen = self._len_bit - self._cur
+        cur = self._cur
+        self._cur += bitlen
+        return self.__buf(cur, bitlen)
+    
+    def set_bytes(self, bytes=[]):
+        '''
+        reinitialize the shar object and its cursor by setting a Python list 
+        of uint8 integral value into it
+        
+        Parameters
+        ----------
+        bytes : list or tuple or array of uint8 values
+        
+        Returns
+        -------
+        None
+        '''
+        if _with_numpy and isinstance(bytes, np.ndarray):
+            self._buf = bytes.astype(np.ubyte).tostring()
+        else:
+            self._buf = array('B', bytes).tostring()
+        self._len_bit = len(self._buf) << 3
+        self._cur = 0
+    
+    def to_bytes(self, bitlen=None):
+        '''
+        return the byte array of the shar object, starting at the cursor 
+        position and ending after the given bitlen
+        
+        Parameters
+        ----------
+        bitlen : length in bits for the requested byte array
+        
+        Returns
+        -------
+        An array of type uchar, zero-padded at the end if required
+        '''
+        if bitlen is None or self._cur + bitlen > self._len_bit:
+            bitlen = self._len_bit - self._cur
+        return _to_bytes(self.__buf(self._cur, bitlen))
+    
+    def get_bytes(self, bitlen=None):
+        '''
+        return the byte array of the shar object, starting at the cursor 
+        position and ending after the given bitlen
+        
+        the shar object's cursor is incremented according to bitlen
+        
+        Parameters
+        ----------
+        bitlen : length in bits for the requested byte array
+        
+        Returns
+        -------
+        An array of type uchar, zero-padded at the end if required
+        '''
+        if bitlen is None or self._cur + bitlen > self._len_bit:
+            bitlen = self._len_bit - self._cur
+        cur = self._cur
+        self._cur += bitlen
+        return _to_bytes(self.__buf(cur, bitlen))
+    
+    def set_bits(self, bits=[]):
+        '''
+        reinitialize the shar object and its cursor by setting a Python list 
+        of 0 or 1 integral value into it
+        
+        Parameters
+        ----------
+        bits : list or tuple or array of 0 or 1 values
+        
+        Returns
+        -------
+        None
+        '''
+        if _with_numpy:
+            bits = np.asarray(bits, np.ubyte)
+            self._buf = np.packbits(bits).tostring()
+            self._len_bit = len(bits)
+        else:
+            # bits are converted to a string of '0' and '1' characters
+            bits = array('B', bits).tostring().translate(_BITS_TO_BIN)
+            self._len_bit = len(bits)
+            if bits:
+                self.__set_uint(int(bits, 2), self._len_bit)
             else:
-                # positive integer
-                self._cur += bitlen
-                return val
+                self._buf = b''
+        self._cur = 0
+    
+    def to_bits(self, bitlen=None):
+        '''
+        return the bit array of the shar object, starting at the cursor 
+        position and ending after the given bitlen
+        
+        Parameters
+        ----------
+        bitlen : length in bits for the requested bit array
+        
+        Returns
+        -------
+        An array of type uchar, with only 0 and 1 values
+        '''
+        if bitlen is None or self._cur + bitlen > self._len_bit:
+            bitlen = self._len_bit - self._cur
+        return self.__bits(self._cur, bitlen)
+    
+    def get_bits(self, bitlen=None):
+        '''
+        return the bit array of the shar object, starting at the cursor 
+        position and ending after the given bitlen
+        
+        the shar object's cursor is incremented according to bitlen
+        
+        Parameters
+        ----------
+        bitlen : length in bits for the requested bit array
+        
+        Returns
+        -------
+        An array of type uchar, with only 0 and 1 values
+        '''
+        if bitlen is None or self._cur + bitlen > self._len_bit:
+            bitlen = self._len_bit - self._cur
+        cur = self._cur
+        self._cur += bitlen
+        return self.__bits(cur, bitlen)
+    
+    def set_uint(self, val=0, bitlen=None):
+        '''
+        reinitialize the shar object and its cursor by setting an arbitrary 
+        unsigned integral value into it
+        
+        big endian representation is used (MSB on the most left, LSB on the 
+        most right)
+        
+        Parameters
+        ----------
+        val : unsigned integer (can be long)
+        bitlen : number of bits to be used to store the value; if less than 
+            required by the value, value is majored to the maximum value 
+            according to bitlen; if bitlen is None, encoding is done in the
+            minimum number of bits
+        
+        Returns
+        -------
+        None
+        '''
+        if bitlen is None:
+            bitlen = len(bin(val)) - 2
+        elif val >> bitlen:
+            # majoring to maximum bitlen value
+            val = (1 << bitlen) - 1
+        self.__set_uint(val, bitlen)
+    
+    def to_uint(self, bitlen=None):
+        '''
+        return the unsigned integral value of the shar object, starting at 
+        the cursor position and ending after the given bitlen
+        
+        Parameters
+        ----------
+        bitlen : length in bits for the requested unsigned integer
+        
+        Returns
+        -------
+        An unsigned integral value
+        '''
+        if bitlen is None or self._cur + bitlen > self._len_bit:
+            bitlen = self._len_bit - self._cur
+        if self._cur == self._len_bit or bitlen == 0:
+            return None
+        return self.__uint(self._cur, bitlen)
+    
+    def get_uint(self, bitlen=None):
+        '''
+        return the unsigned integral value of the shar object, starting at 
+        the cursor position and ending after the given bitlen
+        
+        the shar object's cursor is incremented according to bitlen
+        
+        Parameters
+        ----------
+        bitlen : length in bits for the requested unsigned integer
+        
+        Returns
+        -------
+        An unsigned integral value
+        '''
+        if bitlen is None or self._cur + bitlen > self._len_bit:
+            bitlen = self._len_bit - self._cur
+        if self._cur == self._len_bit or bitlen == 0:
+            return None
+        cur = self._cur
+        self._cur += bitlen
+        return self.__uint(cur, bitlen)
+    
+    def set_int(self, val=0, bitlen=32):
+        '''
+        reinitialize the shar object and its cursor by setting an arbitrary 
+        signed integral value into it (2's complement representation is 
+        used)
+        
+        big endian representation is used (MSB on the most left, LSB on the 
+        most right)
+        
+        Parameters
+        ----------
+        val : signed integer (can be long)
+        bitlen : number of bits to be used to store the value (minus 1 bit
+            to store the sign); if less than required by the value, absolute 
+            value is majored by the max value according to bitlen
+        
+        Returns
+        -------
+        None
+        '''
+        valmax = 1 << (bitlen-1)
+        if val < 0:
+            if val < -valmax:
+                # majoring to maximum bitlen value
+                val = -valmax
+            # 2's complement
+            val += valmax << 1
+        elif val >= valmax:
+            # majoring to maximum bitlen value
+            val = valmax - 1
+        self.__set_uint(val, bitlen)
+    
+    def to_int(self, bitlen=None):
+        '''
+        return the signed integral value of the shar object, starting at the
+        cursor position and ending after the given bitlen
+        
+        Parameters
+        ----------
+        bitlen : length in bits for the requested signed integer
+        
+        Returns
+        -------
+        A signed integral value
+        '''
+        if bitlen is None or self._cur + bitlen > self._len_bit:
+            bitlen = self._len_bit - self._cur
+        if self._cur >= self._len_bit-1 or bitlen <= 1:
+            return None
+        val = self.__uint(self._cur, bitlen)
+        if val >> (bitlen-1):
+            # negative integer
+            return val - (1 << bitlen)
+        return val
+    
+    def get_int(self, bitlen=None):
+        '''
+        return the signed integral value of the shar object, starting at the
+        cursor position and ending after the given bitlen
+        
+        The shar object's cursor is incremented according to bitlen
+        
+        Parameters
+        ----------
+        bitlen : length in bits for the requested signed integer
+        
+        Returns
+        -------
+        A signed integral value
+        '''
+        if bitlen is None or self._cur + bitlen > self._len_bit:
+            bitlen = self._len_bit - self._cur
+        if self._cur >= self._len_bit-1 or bitlen <= 1:
+            return None
+        val = self.__uint(self._cur, bitlen)
+        self._cur += bitlen
+        if val >> (bitlen-1):
+            # negative integer
+            return val - (1 << bitlen)
+        return val
+
+
+# shar backends available
+BACKENDS = {'int': shar_int, 'array': shar_array}
+if _with_numpy:
+    BACKENDS['numpy'] = shar_numpy
+
+if _BACKEND in BACKENDS:
+    shar = BACKENDS[_BACKEND]
+else:
+    shar = shar_array
 
-def test():
+def test(backend=None):
+    # tests a given backend, or all the ones available
+    if backend is None:
+        for backend in BACKENDS:
+            test(backend)
+        return
+    shar = BACKENDS[backend]
     err = 0
     buf = b'\xC0aAbBcC1234\x81\x92\xB3\xF4' * 300
     A = shar(buf)
@@ -1361,5 +1938,15 @@ def test():
     if B.to_int() != -2147483648: raise(Exception)
     B.set_int(-1241654647632135435045046350463410, 1024)
     if B.to_int() != -1241654647632135435045046350463410: raise(Exception)
+    # boundaries
+    B.set_uint(5, 3)
+    if B.to_uint() != 5: raise(Exception)
+    B.set_uint(0x1234, 16)
+    if B.get_uint(4) != 1: raise(Exception)
+    if B.get_uint() != 0x234: raise(Exception)
+    if B.get_uint() is not None or B.get_uint(0) is not None: raise(Exception)
+    B.set_buf(b'\xC0a')
+    B.get_bits(3)
+    if B.to_buf(7) != b'\x02' or B.get_buf(7) != b'\x02': raise(Exception)
 #
 #
\ No newline at end of file
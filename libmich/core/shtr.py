@@ -28,13 +28,15 @@
 #*/ 
 
 from struct import pack, unpack
+from binascii import hexlify, unhexlify
 
 # export filter
-__all__ = ['decomposer', 'decompose', 'shtr']
+__all__ = ['decomposer', 'decompose', 'shtr', 'BitReader', 'BitWriter']
 
 # Utility classes to :
 # decompose and recompose integers
 # and manipulate str like integers (shifting them)
+# or read and write them bit per bit, without shifting them
 
 class decomposer(object):
     '''
@@ -220,5 +222,195 @@ class shtr(str):
         ret = shtr(''.join(map(chr, strlist)))
         ret._bitlen = self._bitlen + val
         return ret
+
+class BitReader(object):
+    '''
+    BitReader reads a string buffer from left to right, keeping track of 
+    its bit offset into it: the buffer is never shifted nor copied,
+    values are extracted from the few bytes at the offset only.
+    
+    It can be built from a str, a shtr (taking its bit length into account)
+    or another BitReader (starting at its current offset).
+    
+    Methods .left_val(X) and .left_buf(X) returns the integer value and the 
+    string buffer corresponding to the X bits at the offset,
+    .get_val(X) and .get_buf(X) do the same and move the offset forward
+    (bits after the end of the buffer are read as zero, but the offset 
+    never goes beyond it).
+    As for shtr, len() returns the length in bytes of the remaining buffer.
+    '''
+    __slots__ = ('buf', 'off', 'end')
+    
+    def __init__(self, buf='', off=0, end=None):
+        self.reset(buf, off, end)
+    
+    def reset(self, buf='', off=0, end=None):
+        '''
+        sets the buffer `buf' to be read from the bit offset `off' 
+        to the bit offset `end'
+        '''
+        if isinstance(buf, BitReader):
+            off, end, buf = buf.off + off, buf.end if end is None else end, \
+                            buf.buf
+        elif end is None:
+            end = len(buf)*8
+            if isinstance(buf, shtr):
+                end = min(end, buf._bitlen)
+        self.buf, self.off, self.end = buf, min(off, end), end
+    
+    def __len__(self):
+        return (self.end - self.off + 7) >> 3
+    
+    def __repr__(self):
+        return 'BitReader(%s, %i, %i)' % (repr(self.buf[:32]), self.off, 
+                                          self.end)
+    
+    def bit_len(self):
+        '''
+        returns the number of bits remaining
+        '''
+        return self.end - self.off
+    
+    def left_val(self, bitlen, off=0):
+        '''
+        returns big endian integer value from the `bitlen' bits at the offset
+        (plus `off' bits), the buffer being zero-padded after its end
+        '''
+        start = self.off + off
+        end = start + bitlen
+        if bitlen <= 0 or start >= self.end:
+            return 0
+        elif end > self.end:
+            # bits after the end of the buffer are read as zero
+            pad = end - self.end
+            return self.left_val(bitlen - pad, off) << pad
+        first, last = start >> 3, (end + 7) >> 3
+        if last - first == 1:
+            val = ord(self.buf[first])
+        else:
+            val = int(hexlify(self.buf[first:last]), 16)
+        return (val >> (-end % 8)) & ((1 << bitlen) - 1)
+    
+    def get_val(self, bitlen):
+        '''
+        returns big endian integer value from the `bitlen' bits at the offset
+        and moves the offset after them
+        '''
+        val = self.left_val(bitlen)
+        self.off = min(self.off + bitlen, self.end)
+        return val
+    
+    def left_buf(self, bitlen=None):
+        '''
+        returns the string buffer of the `bitlen' bits at the offset 
+        (or all the remaining ones), its last byte being zero-padded
+        '''
+        if bitlen is None or self.off + bitlen > self.end:
+            bitlen = self.end - self.off
+        if bitlen <= 0:
+            return ''
+        if self.off % 8 == 0:
+            first = self.off >> 3
+            buf = self.buf[first:first + ((bitlen + 7) >> 3)]
+            if bitlen % 8:
+                return ''.join((buf[:-1], 
+                                chr(ord(buf[-1]) & (0xff00 >> bitlen%8) & 0xff)))
+            return buf
+        return _int_to_buf(self.left_val(bitlen) << (-bitlen % 8), 
+                           (bitlen + 7) >> 3)
+    
+    def get_buf(self, bitlen=None):
+        '''
+        returns the string buffer of the `bitlen' bits at the offset 
+        (or all the remaining ones) and moves the offset after them
+        '''
+        buf = self.left_buf(bitlen)
+        if bitlen is None:
+            self.off = self.end
+        else:
+            self.off = min(self.off + bitlen, self.end)
+        return buf
+    
+    def skip(self, bitlen):
+        '''
+        moves the offset `bitlen' bits forward
+        '''
+        self.off = min(self.off + bitlen, self.end)
+    
+    def to_shtr(self):
+        '''
+        returns the remaining bits as a shtr
+        '''
+        ret = shtr(self.left_buf())
+        ret._bitlen = self.end - self.off
+        return ret
+
+class BitWriter(object):
+    '''
+    BitWriter builds a string buffer from left to right, from integer values
+    and string buffers of any bit length: complete bytes are stacked as soon
+    as they are available, only the last incomplete one is kept in an 
+    integer accumulator, so what has been written is never shifted again.
+    '''
+    __slots__ = ('_bufs', '_acc', '_acc_len', '_len')
+    
+    def __init__(self):
+        self._bufs, self._acc, self._acc_len, self._len = [], 0, 0, 0
+    
+    def bit_len(self):
+        '''
+        returns the number of bits written
+        '''
+        return self._len
+    
+    def put_val(self, val, bitlen):
+        '''
+        appends the `bitlen' bits big endian value `val'
+        '''
+        if bitlen <= 0:
+            return
+        self._len += bitlen
+        acc_len = self._acc_len + bitlen
+        acc = (self._acc << bitlen) + (val & ((1 << bitlen) - 1))
+        if acc_len >= 8:
+            rest = acc_len % 8
+            self._bufs.append( _int_to_buf(acc >> rest, acc_len >> 3) )
+            acc &= (1 << rest) - 1
+            acc_len = rest
+        self._acc, self._acc_len = acc, acc_len
+    
+    def put_buf(self, buf, bitlen=None):
+        '''
+        appends the `bitlen' first bits of the string buffer `buf'
+        (or all of them)
+        '''
+        if bitlen is None or bitlen > len(buf)*8:
+            bitlen = len(buf)*8
+        if bitlen <= 0:
+            return
+        if self._acc_len == 0:
+            # aligned: full bytes are stacked as is
+            nbytes, rest = bitlen >> 3, bitlen % 8
+            if nbytes:
+                self._bufs.append( buf[:nbytes] )
+                self._len += nbytes*8
+            if rest:
+                self.put_val(ord(buf[nbytes]) >> (8-rest), rest)
+        else:
+            last = (bitlen + 7) >> 3
+            self.put_val(int(hexlify(buf[:last]), 16) >> (-bitlen % 8), 
+                         bitlen)
+    
+    def get_buf(self):
+        '''
+        returns the string buffer written, its last byte being zero-padded
+        '''
+        if self._acc_len:
+            return ''.join(self._bufs) + chr(self._acc << (8-self._acc_len))
+        return ''.join(self._bufs)
+
+def _int_to_buf(val, length):
+    # big endian string buffer of `length' bytes for the integer `val'
+    return unhexlify('%0*x' % (2*length, val))
 #
 #
\ No newline at end of file
@@ -0,0 +1,198 @@
+# −*− coding: UTF−8 −*−
+
+# Streaming parsing:
+# a StreamReader pulls bytes from a file-like object or a socket into
+# a buffer holding at most one record (and one read-ahead chunk), 
+# read_records() yields the buffer of each record once all of it has been 
+# read, and Block.parse_stream() parses each of them into a new Block
+#
+# the Blocks made of a sequence of records (e.g. MPEG4 atoms, TLS records,
+# BGP4 messages) define the length of a record header in _stream_hdr,
+# and the length of a record from its header in _stream_len(hdr)
+# (and the minimum length of a record in _stream_min, when records can be
+# shorter than the header read for getting their length)
+
+# default size of the chunks read from the stream
+BUFSIZE = 65536
+
+class StreamReader(object):
+    '''
+    buffered reader over a file-like object (with a read() method) 
+    or a socket (with a recv() method)
+    
+    attributes:
+    src: the file-like object or socket;
+    pos: offset in the stream of the next byte to be read;
+    eof: True once the end of the stream has been reached
+    
+    methods:
+    peek(n): returns the next n bytes, without consuming them;
+    read(n): returns the next n bytes;
+    skip(n): consumes the next n bytes without buffering them;
+    less bytes are returned at the end of the stream
+    '''
+    
+    def __init__(self, src, bufsize=BUFSIZE):
+        self.src = src
+        if hasattr(src, 'read'):
+            self._read = src.read
+        else:
+            self._read = src.recv
+        self.bufsize = bufsize
+        self.pos, self.eof = 0, False
+        # buffered bytes not consumed yet are self._buf[self._off:]
+        self._buf, self._off = '', 0
+    
+    def _fill(self, n):
+        # buffers at least n bytes, when available
+        avail = len(self._buf) - self._off
+        if avail >= n or self.eof:
+            return
+        chunks = [self._buf[self._off:]]
+        while avail < n:
+            # sockets may return less than requested
+            chunk = self._read(max(n - avail, self.bufsize))
+            if not chunk:
+                self.eof = True
+                break
+            chunks.append(chunk)
+            avail += len(chunk)
+        self._buf, self._off = ''.join(chunks), 0
+    
+    def peek(self, n):
+        self._fill(n)
+        return self._buf[self._off:self._off+n]
+    
+    def read(self, n):
+        self._fill(n)
+        buf = self._buf[self._off:self._off+n]
+        self._off += len(buf)
+        self.pos += len(buf)
+        return buf
+    
+    def skip(self, n):
+        # consumes the buffered bytes first, 
+        # then seeks in the stream when possible, or reads it chunk by chunk
+        buf = self.read(min(n, len(self._buf) - self._off))
+        n -= len(buf)
+        if n <= 0:
+            return
+        self._buf, self._off = '', 0
+        try:
+            self.src.seek(n, 1)
+        except (AttributeError, IOError):
+            pass
+        else:
+            self.pos += n
+            return
+        while n > 0:
+            chunk = self._read(min(n, self.bufsize))
+            if not chunk:
+                self.eof = True
+                return
+            n -= len(chunk)
+            self.pos += len(chunk)
+
+class RecordChunks(object):
+    '''
+    iterator over the bytes of a record pulled from a StreamReader,
+    in chunks of at most bufsize bytes (see read_records())
+    
+    attributes:
+    left: number of bytes of the record not read yet, 
+          None when the record goes to the end of the stream
+    
+    methods:
+    read(n): returns the next n bytes of the record;
+    skip(): consumes the bytes of the record not read yet
+    '''
+    
+    def __init__(self, r, left):
+        self._r, self.left = r, left
+    
+    def __iter__(self):
+        return self
+    
+    def next(self):
+        buf = self.read(self._r.bufsize)
+        if not buf:
+            raise StopIteration()
+        return buf
+    
+    def read(self, n):
+        if self.left is None:
+            return self._r.read(n)
+        buf = self._r.read(min(self.left, n))
+        self.left -= len(buf)
+        return buf
+    
+    def skip(self):
+        r = self._r
+        if self.left is None:
+            # the end of the stream can only be detected by reading it
+            while r.read(r.bufsize):
+                pass
+        elif self.left:
+            r.skip(self.left)
+        self.left = 0
+
+def read_records(src, hdr_len, rec_len, max_len=None, bufsize=BUFSIZE,
+                 min_len=None, chunked=False):
+    '''
+    generator pulling records from the file-like object, socket 
+    or StreamReader `src':
+    rec_len(hdr) returns the length of a record (including its header)
+    from its first hdr_len bytes, or None when it goes to the end of 
+    the stream; a record is at least min_len bytes long (hdr_len by default);
+    yields the buffer of each record, once all of it has been read;
+    records longer than max_len bytes are truncated to max_len bytes
+    (the rest of the record being skipped), the last one is truncated
+    to the end of the stream
+    
+    with chunked, yields instead a tuple (length, RecordChunks) for each 
+    record, the length being None when the record goes to the end of the
+    stream, and the RecordChunks iterator yielding the bytes of the record 
+    (starting with its header) in chunks of at most bufsize bytes;
+    the chunks not consumed when pulling the next record are skipped,
+    so that records of any length are read with a bounded memory
+    (max_len is then ignored)
+    '''
+    if isinstance(src, StreamReader):
+        r = src
+    else:
+        r = StreamReader(src, bufsize)
+    if min_len is None:
+        min_len = hdr_len
+    while True:
+        hdr = r.peek(hdr_len)
+        if not hdr:
+            return
+        l = None
+        if len(hdr) == hdr_len:
+            l = rec_len(hdr)
+        if l is not None:
+            # a record cannot be shorter than min_len
+            l = max(l, min_len)
+        if chunked:
+            rec = RecordChunks(r, l)
+            yield (l, rec)
+            rec.skip()
+            if l is None:
+                return
+        elif l is None:
+            # record going to the end of the stream
+            if max_len is None:
+                chunks = [r.read(r.bufsize)]
+                while not r.eof:
+                    chunks.append( r.read(r.bufsize) )
+                yield ''.join(chunks)
+            else:
+                yield r.read(max_len)
+                RecordChunks(r, None).skip()
+            return
+        elif max_len is not None and l > max_len:
+            buf = r.read(max_len)
+            r.skip(l - max_len)
+            yield buf
+        else:
+            yield r.read(l)
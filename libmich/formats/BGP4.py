@@ -34,6 +34,7 @@
 from libmich.core.element import Str, Int, Bit, \
      Layer, Block, RawLayer, show, debug
 from binascii import hexlify, unhexlify
+from struct import unpack
 
 # local BGP identifier
 # corresponds to IPv4 address in use
@@ -153,6 +154,12 @@ PA_dict = {
 # Global BGP4 block definition and parsing facility
 class BGP4(Block):
     
+    # streaming parsing: messages, with a 19 bytes header
+    _stream_hdr = 19
+    
+    def _stream_len(self, hdr):
+        return unpack('>H', hdr[16:18])[0]
+    
     def __init__(self):
         Block.__init__(self, Name='BGP4')
         self.append(HEADER())
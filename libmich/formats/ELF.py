@@ -291,12 +291,12 @@ class ELF(Block):
             print('check ._ph for program header, ._sh for section header')
             return None
         
-    def show(self, with_trans=False):
+    def show(self, with_trans=False, depth=None, width=None):
         elf_full = self.get_all()
         if elf_full:
-            return elf_full.show(with_trans)
+            return elf_full.show(with_trans, depth, width)
         else:
-            return Block.show(self, with_trans)
+            return Block.show(self, with_trans, depth, width)
 
         
 # this is for program content
@@ -754,9 +754,9 @@ class Trans(Layer):
         self.tID.Dict = TransformID[int(self.type)]
         return Layer.__repr__(self)
     
-    def show(self, with_trans=False):
+    def show(self, with_trans=False, depth=None, width=None):
         self.tID.Dict = TransformID[int(self.type)]
-        return Layer.show(self, with_trans)
+        return Layer.show(self, with_trans, depth, width)
     
     def map(self, string=''):
         Layer.map(self, string)
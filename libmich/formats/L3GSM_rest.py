@@ -39,7 +39,7 @@ __all__ = ['RestOctets',
 from binascii import unhexlify as unh
 #
 from libmich.core.element import Bit, Layer, show, log, DBG, WNG, ERR
-from libmich.core.shtr import decomposer, shtr
+from libmich.core.shtr import decomposer, BitReader
 from libmich.core.CSN1 import CSN1, LHFlag, BREAK, BREAK_LOOP
 from libmich.formats.L3Mobile_IE import AccessTechnoType_dict
 
@@ -70,7 +70,7 @@ class RestOctets(CSN1):
         # check how many bits already mapped, and how many remaining
         done = self.bit_len()
         rem = len(string)*8 - done
-        s = shtr(string) << done
+        s = BitReader(string, done)
         # append the padding element
         self.append(Bit('%s' % self.rest_name, BitLen=rem, Repr='hex'))
         self[-1].map(s)
@@ -124,21 +124,23 @@ class RFLNumberList(CSN1):
     #def __init__(self, **kwargs):
     #    CSN1.__init__(self, **kwargs)
     def map(self, string='', byte_offset=0):
-        # work with shtr
-        s, l = shtr(string), len(string)*8
+        # work with a BitReader
+        s, l = BitReader(string), len(string)*8
         # initialize values
         CSN1.map(self, s, byte_offset)
-        s, l = s<<5, l-5
+        s.skip(5)
+        l -= 5
         # while we got more==1, stack new structure
-        while self[-1]() and l>0:
+        while len(self.elementList) and self[-1]() and l>0:
             num = Bit('RFL_NUMBER', BitLen=4)
             num.map(s)
             self.append(num)
-            s = s<<4
+            s.skip(4)
             m = Bit('more', BitLen=1)
             m.map(s)
             self.append(m)
-            s, l = s<<1, l-5
+            s.skip(1)
+            l -= 5
 
 class ARFCNIndexList(CSN1):
     csn1List = [
@@ -148,21 +150,23 @@ class ARFCNIndexList(CSN1):
     #def __init__(self, **kwargs):
     #    CSN1.__init__(self, **kwargs)
     def map(self, string='', byte_offset=0):
-        # work with shtr
-        s, l = shtr(string), len(string)*8
+        # work with a BitReader
+        s, l = BitReader(string), len(string)*8
         # initialize values
         CSN1.map(self, s, byte_offset)
-        s, l = s<<7, l-7
+        s.skip(7)
+        l -= 7
         # while we got more==1, stack new structure
-        while self[-1]() and l>0:
+        while len(self.elementList) and self[-1]() and l>0:
             ind = Bit('ARFCN_INDEX', BitLen=6)
             ind.map(s)
             self.append(ind)
-            s = s<<6
+            s.skip(6)
             m = Bit('more', BitLen=1)
             m.map(s)
             self.append(m)
-            s, l = s<<1, l-7
+            s.skip(1)
+            l -= 7
 class GPRSMobileAllocation(CSN1):
     csn1List = [
         Bit('HSN', BitLen=6, Repr='hum'),
@@ -424,22 +428,24 @@ class AccessTechnologiesRequest(CSN1):
         Bit('more', BitLen=1)
         ]
     def map(self, string='', byte_offset=0):
-        # work with shtr
-        s, l = shtr(string), len(string)*8
+        # work with a BitReader
+        s, l = BitReader(string), len(string)*8
         # initialize values
         CSN1.map(self, s, byte_offset)
-        s, l = s<<5, l-5
+        s.skip(5)
+        l -= 5
         # while we got more==1, stack new structure to decode
-        while self[-1]() and l>0:
+        while len(self.elementList) and self[-1]() and l>0:
             att = Bit('AccessTechnologyType', BitLen=4, \
                       Dict=AccessTechnoType_dict, Repr='hum')
             att.map(s)
             self.append(att)
-            s = s << 4
+            s.skip(4)
             m = Bit('more', BitLen=1)
             m.map(s)
             self.append(m)
-            s, l = s<<1, l-5
+            s.skip(1)
+            l -= 5
 
 # TS 44.060, section 12.10d
 class EGPRSPacketUplinkAssignment(CSN1):
@@ -850,17 +856,22 @@ class GPRS_BSIC(CSN1):
         Bit('Remaining_BSIC', BitLen=7, Repr='hum'),
         ]
     def map(self, string='', byte_offset=0):
-        # work with shtr
-        s, l = shtr(string), len(string)*8
+        # work with a BitReader
+        s, l = BitReader(string), len(string)*8
         CSN1.map(self, s, byte_offset)
         bitlen = self.bit_len()
-        s, l = s<<bitlen, l-bitlen
+        s.skip(bitlen)
+        l -= bitlen
+        if not hasattr(self, 'Remaining_BSIC'):
+            # buffer too short
+            return
         for i in range(self.Remaining_BSIC()):
             bsic = R_BSIC()
             bsic.map(s)
             self.append(bsic)
             bitlen = bsic.bit_len()
-            s, l = s<<bitlen, l-bitlen
+            s.skip(bitlen)
+            l -= bitlen
 
 class GPRS_REPORT_PRIORITY(CSN1):
     csn1List = [
@@ -1192,19 +1203,21 @@ class LSAIDInfo_(CSN1):
         ]
 class LSAIDInformation(CSN1):
     def map(self, string='', byte_offset=0):
-        # work with shtr
-        s, l = shtr(string), len(string)*8
+        # work with a BitReader
+        s, l = BitReader(string), len(string)*8
         m = 1
         while m and l>0:
             inf = LSAIDInfo_()
             inf.map(s)
             self.append(inf)
             bitlen = inf.bit_len()
-            s, l = s<<bitlen, l-bitlen
+            s.skip(bitlen)
+            l -= bitlen
             mor = Bit('more', BitLen=1)
             mor.map(s)
             self.append(mor)
-            s, l = s<<1, l-1
+            s.skip(1)
+            l -= 1
             m = mor()
 class LSAParameters(CSN1):
     csn1List = [
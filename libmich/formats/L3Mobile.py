@@ -446,6 +446,7 @@ def test_regr(print_infos=True):
     '''
     L3GSM_RR and L3Mobile_* regression testing:
     checking all signalling messages from the L3Call dictionnary
+    and CSN.1 rest octets on short buffers
     '''
     # libmich settings
     e_safe = Element.safe
@@ -491,6 +492,24 @@ def test_regr(print_infos=True):
                         e += 1
         return e
     #
+    def test_rest():
+        # CSN.1 rest octets with iterated lists, on buffers too short
+        # for their last iteration
+        from L3GSM_rest import DirectEncoding1, MBMSChannelParameters, \
+            SI13RestOctets
+        e = 0
+        for cl, buf in ((DirectEncoding1, '\xe2\n='),
+                        (MBMSChannelParameters, '\xe2\n='),
+                        (SI13RestOctets, '\xeb\xda\xda\r')):
+            try:
+                cl().map(buf)
+            except:
+                log(ERR, 'rest octets %s test returns error: map()' \
+                         % repr(cl))
+                e += 1
+        return e
+    #
+    glob_errors += test_rest()
     Layer3._initiator = 'Net'
     if print_infos:
         log(DBG, 'testing with Net initiator')
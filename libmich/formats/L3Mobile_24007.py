@@ -657,7 +657,8 @@ class Layer3(Layer):
             string = string[opt.map_len():]
         return string
     
-    def show(self, with_trans=False):
+    def show(self, with_trans=False, depth=None, width=None):
+        # depth and width as in Layer.show()
         re, tr = '', ''
         if self.ReprName != '':
             re = '%s ' % self.ReprName
@@ -669,8 +670,9 @@ class Layer3(Layer):
         # Layer content
         #str_lst = [e.show().replace('\n', '\n ') for e in self]
         str_lst = []
+        sub = None if depth is None else depth-1
         for e in self:
-            if e.is_transparent():
+            if e.is_transparent() or depth is not None and depth <= 0:
                 pass
             elif e.CallName in self._IE_no_show:
                 pass
@@ -678,12 +680,18 @@ class Layer3(Layer):
                 if e.CallName not in self._IE_with_repr \
                 and isinstance(e, Str) and isinstance(e.Pt, Layer) \
                 and e.Val is None:
-                    str_lst.append(e.Pt.show(with_trans).replace('\n', '\n '))
+                    str_lst.append(e.Pt.show(with_trans, sub, width)\
+                                   .replace('\n', '\n '))
+                elif isinstance(e, Layer):
+                    str_lst.append(e.show(with_trans, sub, width)\
+                                   .replace('\n', '\n '))
                 else:
                     str_lst.append(e.show(with_trans).replace('\n', '\n '))
         #
         # insert spaces for nested layers and filter out empty content
         str_lst = [' %s\n' % s for s in str_lst if s]
+        if width is not None and len(str_lst) > width:
+            str_lst[width:] = [' ... (%i more)\n' % (len(str_lst)-width)]
         # insert layer's title
         str_lst.insert(0, '### %s[%s]%s ###\n' % (re, self.CallName, tr))
         # return full inline string without last CR
@@ -28,29 +28,42 @@
 
 #!/usr/bin/env python
 
+from struct import unpack
 from libmich.core.element import Str, Int, Bit, \
      Layer, Block, RawLayer, show, debug
 #from libmich.core.IANA_dict import IANA_dict
 
 # from ISO_IEC_14496-12_2008.pdf (free ISO spec)
 # does not implement 64-bit size field for atom / box
+# (except for framing the top-level atoms in parse_stream())
 # does not implement specific atoms with extended header
 
 class MPEG4(Block):
     
+    # streaming parsing: top-level atoms, 
+    # a size of 0 means the atom goes to the end of the file,
+    # a size of 1 that the 64-bit size follows the atom type
+    _stream_hdr = 16
+    _stream_min = 8
+    
+    def _stream_len(self, hdr):
+        size = unpack('>I', hdr[:4])[0]
+        if size == 1:
+            return unpack('>Q', hdr[8:16])[0]
+        return size if size else None
+    
     def __init__(self):
         Block.__init__(self, Name='MPEG4')
         self.append(atom())
     
     def parse(self, s='', recursive=True):
-        self[0].map(s)
+        # atoms are mapped at their offset in the buffer, without slicing it
+        off = self[0].map_at(s)
         self[0].atomic = False
-        s=s[len(self[0]):]
-        while len(s) > 0:
+        while off < len(s):
             self.append(atom())
-            self[-1].map(s)
+            off += self[-1].map_at(s, off)
             self[-1].atomic = False
-            s=s[len(self[-1]):]
         if not recursive:
             return
         while not self.__all_atomic():
@@ -89,12 +102,11 @@ class MPEG4(Block):
         if int(p_atom.size) <= 8:
             return []
         s = str(p_atom.data)
-        child_atoms = []
-        while len(s) > 0:
+        child_atoms, off = [], 0
+        while off < len(s):
             child_atoms.append(atom())
-            child_atoms[-1].map(s)
+            off += child_atoms[-1].map_at(s, off)
             debug(self.dbg, 3, '(MPEG4) child_atoms:\n%s\n' % child_atoms)
-            s=s[len(child_atoms[-1]):] 
         if sum([int(c_atom.size) for c_atom in child_atoms]) == \
            int(p_atom.size)-8:
             return child_atoms
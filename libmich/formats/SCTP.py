@@ -218,16 +218,17 @@ class SCTP(Block):
         
     def parse(self, s):
         # 1st: map SCTP header
-        self[0].map(s)
-        s = s[ len(self[0]) : ]
+        # (chunks are then mapped at their offset in the buffer, without 
+        # slicing it)
+        off = self[0].map_at(s)
         # Then iteratively, map each SCTP chunk
-        while len(s) > 0:
-            nc = unpack('!B', s[0])[0]
+        while off < len(s):
+            nc = unpack('!B', s[off])[0]
             
             # If chunk type is recognized:
             if nc in chunkCall.keys():
                 self < chunkCall[nc]()
-                self[-1].map( s )
+                self[-1].map_at( s, off )
                 cklen = int( self[-1].len )
                 ckhier = self[-1].hierarchy
                 
@@ -235,7 +236,7 @@ class SCTP(Block):
                 if nc in (6, 9) : 
                     # for ABORT and ERROR chunks
                     # must parse error codes
-                    error_s = s[ 4 : cklen ]
+                    error_s = s[ off+4 : off+cklen ]
                     while len(error_s) > 0:
                         self.append( SCTP_error() )
                         self[-1].hierarchy = ckhier + 1
@@ -245,7 +246,7 @@ class SCTP(Block):
                 elif nc == 3:
                     # for SACK chunk
                     # must parse GapAckBlock and DuplicateTSN Layers
-                    nums = s[ 16 : cklen ]
+                    nums = s[ off+16 : off+cklen ]
                     numgap = int(self[-1].numgap)
                     while numgap > 0:
                         self.append( GapAckBlock() )
@@ -261,7 +262,7 @@ class SCTP(Block):
                     
                 elif nc == 0xC0:
                     # for Forward TSN chunk
-                    ssq_s = s[ 8 : cklen ]
+                    ssq_s = s[ off+8 : off+cklen ]
                     while len(ssq_s) > 0:
                         self.append( StreamSeq() )
                         self[-1].hierarchy = ckhier + 1
@@ -270,7 +271,7 @@ class SCTP(Block):
                     
                 else:
                     # for other types of chunk
-                    param_s = s[ len(self[-1]) : cklen ]
+                    param_s = s[ off+len(self[-1]) : off+cklen ]
                     while len(param_s) > 0:
                         # if the chunk header has some remaining unmapped string: 
                         # parse with SCTP parameter 
@@ -281,15 +282,15 @@ class SCTP(Block):
                         
                 # rest of the string to map for following chunks
                 # TODO: need to take padding into account
-                s = s[ cklen : ]
+                off += cklen
             
             # if chunk type is not recognized:
             else:
                 self < SCTP_chunk()
-                self[-1].map(s)
+                self[-1].map_at(s, off)
                 self << RawLayer()
-                self[-1].map( s[ 4 : len(self[-2]) ] )
-                s = s[ len(self[-2]) : ]
+                self[-1].map( s[ off+4 : off+len(self[-2]) ] )
+                off += len(self[-2])
                 
         # after parsing the whole string,
         # in case of AUTH chunk, need to increment the hierarchy of all following layers
@@ -30,6 +30,7 @@
 
 import time
 from random import _urandom as urandom
+from struct import unpack
 #
 from libmich.core.element import Str, Int, Bit, Layer, RawLayer, Block, show
 from libmich.core.IANA_dict import IANA_dict
@@ -44,6 +45,12 @@ from libmich.core.IANA_dict import IANA_dict
 
 class TLS(Block):
     
+    # streaming parsing: records, with a 5 bytes header
+    _stream_hdr = 5
+    
+    def _stream_len(self, hdr):
+        return 5 + unpack('>H', hdr[3:5])[0]
+    
     def __init__(self):
         Block.__init__(self, Name='TLS')
         self.append( RecordLayer() )
@@ -51,24 +58,26 @@ class TLS(Block):
     def parse(self, s=''):
         self.__init__()
         self.remove( 0 )
-        while len(s) >= 5:
-            self.parse_record(s)
+        # records are parsed at their offset in the buffer, without slicing it
+        off = 0
+        while len(s) - off >= 5:
+            self.parse_record(s, off)
             if isinstance(self[-1], RecordLayer):
                 l = self[-1].length()
             elif isinstance(self[-2], RecordLayer):
                 l = self[-2].length()
             else:
                 break
-            s = s[5+l:]
+            off += 5+l
     
-    def parse_record(self, s=''):
+    def parse_record(self, s='', off=0):
         #self.__init__()
         self.append( RecordLayer() )
         self[-1].set_hierarchy(0)
-        self[-1].map(s)
+        self[-1].map_at(s, off)
         #
         t = self[-1].type()
-        s = s[5:5+self[-1].length()]
+        s = s[off+5:off+5+self[-1].length()]
         while len(s) >= 1:
             if t == 20:
                 self.append( ChangeCipherSpec() )
@@ -29,7 +29,9 @@
 #!/usr/bin/env python
 
 # generic imports
-from libmich.core.element import Bit, Str, Int, Layer, Block, show
+from struct import unpack
+from libmich.core.element import Bit, Str, Int, Layer, RawLayer, Block, show
+from libmich.core.stream import StreamReader, read_records, BUFSIZE
 
 ###
 # pcap headers format
@@ -56,6 +58,40 @@ class Record(Layer):
         Int('incl_len', Pt=0, Type='uint32', Repr='hum'),
         Int('orig_len', Pt=0, Type='uint32', Repr='hum')]
 
+def _set_endian(layer, endian):
+    for e in layer:
+        e._endian = endian
+    return layer
+
+# streaming parsing of a pcap file (see core/stream.py)
+def parse_stream(src, glob=None, max_len=None, bufsize=BUFSIZE):
+    '''
+    generator pulling a pcap file from the file-like object or socket `src':
+    the global header is mapped into `glob', when a Global() is given;
+    yields a Block with the Record() header and the packet data in a
+    RawLayer() payload for each record, as soon as all of it has been read;
+    records longer than max_len bytes (with their header) are truncated
+    '''
+    r = StreamReader(src, bufsize)
+    hdr = r.read(24)
+    # the magic number is written with the byte order of the whole file
+    # (microsecond or nanosecond resolution)
+    if hdr[:4] in ('\xd4\xc3\xb2\xa1', '\x4d\x3c\xb2\xa1'):
+        endian, fmt = 'little', '<I'
+    else:
+        endian, fmt = 'big', '>I'
+    if glob is not None:
+        _set_endian(glob, endian)
+        glob.map(hdr)
+    for buf in read_records(r, 16, lambda h: 16 + unpack(fmt, h[8:12])[0],
+                            max_len):
+        block = Block('pcap')
+        block.append( _set_endian(Record(), endian) )
+        block[0].map(buf)
+        block << RawLayer()
+        block[1].map(buf[16:])
+        yield block
+
 ###
 # gsmtap header format
 # http://bb.osmocom.org/trac/wiki/GSMTAP
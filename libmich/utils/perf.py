@@ -26,130 +26,706 @@
 # *--------------------------------------------------------
 #*/
 
-import time
+# Benchmark suite:
+# each benchmark times a single operation (e.g. parsing a BMP file),
+# after some warmup rounds, and reports its latency per call (percentiles),
+# calls per second, and the net number of objects allocated per call
+# (those tracked by the garbage collector: Python 2 has no way to count
+# all allocations).
+# Results can be saved as a JSON baseline, and a later run compared with it:
+# main() returns 1 when a benchmark's median latency has regressed beyond
+# the threshold.
+#
+# All inputs are local fixtures (files in utils/, buffers in the formats
+# and asn1 modules), so that the suite runs offline.
+#
+# from the command line:
+# python -m libmich.utils.perf -s base.json          # run all, save baseline
+# python -m libmich.utils.perf -b base.json bmp rrc3g # compare some of them
+
+import os
+import sys
+import gc
+import json
+from StringIO import StringIO
+from math import ceil
+from optparse import OptionParser
+from timeit import default_timer as timer
 from libmich.core.element import Element, Str, Bit, Int, Layer, \
-    testTLV
+    RawLayer, Block, testTLV
 from libmich.core.element import test as test_tlv
+from libmich.core import production
+from libmich.core import profiling
+from libmich.core import shar
+from libmich.core import serial
 from libmich.formats.BMP import BMP
 from libmich.formats.BGP4 import BGP4, testbuf
-from libmich.formats.L3Mobile import test_regr
+from libmich.formats.pcap import Global, Record, gsmtap, parse_stream
+from libmich.formats.IP import IPv4, UDP
+from libmich.formats.L3Mobile import Layer3, L3Call, parse_L3, test_regr
+_ALIGNED = Layer._byte_aligned
+from libmich.asn1 import processor
+from libmich.asn1.ASN1 import ASN1Obj
+from libmich.asn1.PER import PER
+from libmich.asn1.processor import GLOBAL, MODULE_NAMES, compile, \
+     generate_modules, get_asn_dir, get_modules_dir, load_codec
 from libmich.asn1.test import test_all as test_asn1
-from libmich.asn1.test import _test_rrc3g_prep, _test_rrc3g, \
-    _test_s1ap_prep, _test_s1ap
+from libmich.asn1.test import _test_rrc3g_prep, _test_s1ap_prep
+# libmich.asn1 sets all Layers unaligned when imported:
+# this is restored for the non-ASN.1 benchmarks
+Layer._byte_aligned = _ALIGNED
 
-import libmich as _lm
-bmp_fd = open(_lm.__path__[0] + '/utils/test.bmp', 'rb')
-bmp_file = bmp_fd.read()
-del _lm, bmp_fd
+FIXTURES_DIR = os.path.dirname(os.path.abspath(__file__)) + os.path.sep
+BMP_PATH = FIXTURES_DIR + 'test.bmp'
+# gsmtap-encapsulated L3 mobile messages, generated by make_pcap()
+PCAP_PATH = FIXTURES_DIR + 'test.pcap'
 
 Element.safe = False
 Element.dbg = 0
 Layer.safe = False
 Layer.dbg = 0
 
-RND_T1 = 300000
-RND_T2 = 20000
-RND_T3 = 1000
-RND_T4 = 1000
-RND_T5 = 200
-RND_T6 = 3
-RND_T7 = 12
-RND_T8 = 5
-RND_T9 = 20
-
-def texec(procedure):
-    t0=time.time()
-    procedure()
-    return time.time()-t0
-
-def t1():
+# default number of timed rounds, and of untimed warmup rounds
+ROUNDS = 50
+WARMUP = 3
+# a benchmark stops after MAX_TIME sec., once it has run MIN_ROUNDS rounds
+MIN_ROUNDS = 5
+MAX_TIME = 3.0
+# each round lasts at least MIN_ROUND_TIME sec., by calling the operation
+# several times (when the benchmark's number of calls is not fixed)
+MIN_ROUND_TIME = 0.005
+# maximum median latency increase accepted when comparing with a baseline
+THRESHOLD = 0.25
+
+# set to True to run the benchmarks in production mode
+# (see core/production.py)
+PRODUCTION = False
+
+class Bench(object):
+    '''
+    benchmark named `name', timing calls to op(*setup()):
+    setup() is called once before the warmup rounds, and returns the tuple of
+    arguments to be passed to op();
+    each round times `number' calls to op() (calibrated if None)
+    '''
+    def __init__(self, name, op, setup=None, rounds=ROUNDS, warmup=WARMUP,
+                 number=None, desc=''):
+        self.name = name
+        self.op = op
+        self.setup = setup
+        self.rounds = rounds
+        self.warmup = warmup
+        self.number = number
+        self.desc = desc
+    
+    def __repr__(self):
+        return '<Bench %s: %s>' % (self.name, self.desc)
+
+def _calibrate(op, args):
+    # returns the number of calls to op() for a round to last at least
+    # MIN_ROUND_TIME
+    number = 1
+    while True:
+        t0 = timer()
+        for i in range(number):
+            op(*args)
+        if timer()-t0 >= MIN_ROUND_TIME:
+            return number
+        number *= 2
+
+def _percentile(times, p):
+    # nearest-rank percentile of the sorted list times
+    return times[max(0, int(ceil(p*len(times)/100.0))-1)]
+
+def run(bench, rounds=None):
+    '''
+    runs the benchmark and returns its statistics as a dict:
+    rounds, number (of calls per round),
+    min, p50, p90, p99, max, mean, stddev (latencies per call, in sec.),
+    ops (calls per sec.), objs (net number of objects tracked by the garbage
+    collector allocated per call)
+    '''
+    if rounds is None:
+        rounds = bench.rounds
+    # benchmarks can change those attributes in their setup or operation
+    # (e.g. asn1.test sets ASN1Obj._RET_STRUCT, and the *_gen benchmarks
+    # register the generated PER codec)
+    aligned, endian, asn1_log = Layer._byte_aligned, Int._endian, \
+                                processor.log
+    asn1_flags, per_gen = (ASN1Obj._RET_STRUCT, ASN1Obj._SAFE), \
+                          dict(PER._GEN)
+    gc_enabled = gc.isenabled()
+    try:
+        args = bench.setup() if bench.setup else ()
+        op = bench.op
+        for i in range(bench.warmup):
+            op(*args)
+        number = bench.number or _calibrate(op, args)
+        calls = range(number)
+        times = []
+        gc.collect()
+        gc.disable()
+        objs = len(gc.get_objects())
+        T0 = timer()
+        for i in range(rounds):
+            t0 = timer()
+            for j in calls:
+                op(*args)
+            times.append((timer()-t0)/number)
+            if i+1 >= MIN_ROUNDS and timer()-T0 > MAX_TIME:
+                break
+        objs = len(gc.get_objects()) - objs
+    finally:
+        if gc_enabled:
+            gc.enable()
+        Layer._byte_aligned, Int._endian, processor.log = aligned, endian, \
+                                                          asn1_log
+        ASN1Obj._RET_STRUCT, ASN1Obj._SAFE = asn1_flags
+        PER._GEN.clear()
+        PER._GEN.update(per_gen)
+    times.sort()
+    mean = sum(times) / len(times)
+    return {'rounds': len(times),
+            'number': number,
+            'min': times[0],
+            'p50': _percentile(times, 50),
+            'p90': _percentile(times, 90),
+            'p99': _percentile(times, 99),
+            'max': times[-1],
+            'mean': mean,
+            'stddev': (sum([(t-mean)**2 for t in times])/len(times))**0.5,
+            'ops': 1.0/mean if mean else 0.0,
+            'objs': round(float(objs)/(len(times)*number), 1) or 0.0}
+
+def save_baseline(results, path):
+    '''
+    saves the results {benchmark name: statistics} in the JSON file `path'
+    '''
+    fd = open(path, 'w')
+    json.dump({'python': sys.version.split()[0],
+               'production': production.is_enabled(),
+               'benchmarks': results}, fd, indent=1, sort_keys=True)
+    fd.close()
+
+def load_baseline(path):
+    '''
+    returns the results {benchmark name: statistics} saved in the JSON file
+    `path'
+    '''
+    fd = open(path, 'r')
+    base = json.load(fd)
+    fd.close()
+    return base['benchmarks']
+
+def compare(results, baseline, threshold=THRESHOLD):
+    '''
+    returns the list of (name, baseline median, median) for the benchmarks
+    whose median latency exceeds the baseline's one by more than `threshold'
+    '''
+    reg = []
+    for name in sorted(results):
+        if name in baseline:
+            base, new = baseline[name]['p50'], results[name]['p50']
+            if new > base * (1+threshold):
+                reg.append((name, base, new))
+    return reg
+
+def _fmt(t):
+    # human-readable duration
+    if t >= 1:
+        return '%.3f s' % t
+    elif t >= 1e-3:
+        return '%.3f ms' % (t*1e3)
+    return '%.3f us' % (t*1e6)
+
+def report(name, st, base=None):
+    '''
+    prints the statistics `st' of benchmark `name',
+    and its median latency ratio to the `base' statistics when provided
+    '''
+    line = '%-22s %11s %11s %11s %11s %11.1f %8.1f' \
+           % (name, _fmt(st['min']), _fmt(st['p50']), _fmt(st['p90']),
+              _fmt(st['p99']), st['ops'], st['objs'])
+    if base is not None:
+        line += '   x%.2f' % (st['p50'] / base['p50'])
+    print(line)
+
+def select(names=None, benchs=None):
+    '''
+    returns the benchmarks whose name are in `names' (or start with one of
+    them, followed with a dot), or all of them
+    '''
+    if benchs is None:
+        benchs = BENCHMARKS
+    if not names:
+        return list(benchs)
+    return [b for b in benchs if any([b.name == n or \
+            b.name.startswith(n + '.') for n in names])]
+
+def main(args=None):
+    '''
+    runs the benchmarks given by the command line arguments `args'
+    (see main(['-h'])),
+    returns 1 if a regression is found when comparing with a baseline, 0 else
+    '''
+    parser = OptionParser(usage='%prog [options] [benchmark names]')
+    parser.add_option('-l', '--list', action='store_true', default=False,
+                      help='list the benchmarks and exit')
+    parser.add_option('-s', '--save', metavar='FILE',
+                      help='save the results as a JSON baseline')
+    parser.add_option('-b', '--baseline', metavar='FILE',
+                      help='compare the results with a JSON baseline, and '\
+                      'fail on regressions')
+    parser.add_option('-t', '--threshold', type='float', default=THRESHOLD,
+                      help='maximum median latency increase accepted '\
+                      '[default: %default]')
+    parser.add_option('-r', '--rounds', type='int',
+                      help='number of rounds for each benchmark')
+    parser.add_option('-p', '--production', action='store_true',
+                      default=PRODUCTION, help='run in production mode')
+    parser.add_option('-P', '--profile', action='store_true', default=False,
+                      help='print the classes and ASN.1 types which took the '\
+                      'most time (see core/profiling.py), latencies then '\
+                      'include the profiling overhead')
+    opts, names = parser.parse_args(sys.argv[1:] if args is None else args)
+    benchs = select(names)
+    if opts.list:
+        for b in benchs:
+            print('%-22s %s' % (b.name, b.desc))
+        return 0
+    if opts.production:
+        production.enable()
+    if opts.profile:
+        profiling.reset()
+        profiling.enable()
+    baseline = load_baseline(opts.baseline) if opts.baseline else {}
+    print('%-22s %11s %11s %11s %11s %11s %8s' \
+          % ('benchmark', 'min', 'p50', 'p90', 'p99', 'ops/s', 'objs'))
+    results = {}
+    for b in benchs:
+        results[b.name] = run(b, opts.rounds)
+        report(b.name, results[b.name], baseline.get(b.name))
+    if opts.profile:
+        profiling.disable()
+        print('')
+        print(profiling.dump(limit=30))
+    if opts.save:
+        save_baseline(results, opts.save)
+    if opts.baseline:
+        reg = compare(results, baseline, opts.threshold)
+        for name, base, new in reg:
+            print('REGRESSION %s: %s -> %s (x%.2f)' \
+                  % (name, _fmt(base), _fmt(new), new/base))
+        if reg:
+            return 1
+    return 0
+
+#------------------------------------------------------------------------------#
+# benchmarks
+#------------------------------------------------------------------------------#
+
+def _little(layer):
+    # pcap headers are little endian
+    for e in layer:
+        e._endian = 'little'
+    return layer
+
+def _str_assign():
+    a = Str('test', Pt='azertyuiopqsdfghjjklmwxcvbn', Repr='bin')
+    a < a()
+    a < None
+    return a
+
+class WideLayer(Layer):
+    constructorList = [Int('f%i' % i, ReprName='Field %i' % i, Pt=i,
+                           Type='uint16') for i in range(32)]
+
+def _fields_setup():
+    return (WideLayer(), )
+
+def _fields(w):
+    w.f0, w.f15, w.f31
+    w.f31 = 0x1234
+    w.f0.Pt = w.f31
+
+def _tlv_build():
+    t = testTLV(V=100*'t')
+    return str(t)
+
+def _tlv_parse_setup():
     Int._endian = 'big'
-    print('test 1: assigning Str() %i times' % RND_T1)
-    for i in range(RND_T1):
-        a=Str('test', Pt='azertyuiopqsdfghjjklmwxcvbn', Repr='bin')
-        a < a()
-        b = a
-        a < None
-        a, b
-        del a, b
-
-def t2():
+    return (testTLV(), str(testTLV(V=100*'t')))
+
+def _tlv_parse(t, buf):
+    t.map(buf)
+
+def _layer_test():
+    test_tlv()
+
+def _bmp_setup():
+    Int._endian = 'little'
+    fd = open(BMP_PATH, 'rb')
+    buf = fd.read()
+    fd.close()
+    return (buf, )
+
+def _bgp4_setup():
     Int._endian = 'big'
-    print('test 2: assigning testTLV() %i times' % RND_T2)
-    for i in range(RND_T2):
-        t = testTLV(V=(i%901)*'t')
-        t.F1(), t.F2(), t.V(), t.L()
-        t.F1, t.F2
-        del t
-
-def t3():
+    return (testbuf, )
+
+def _parse(cls, buf):
+    b = cls()
+    b.parse(buf)
+    return b
+
+def _l3mobile_regr():
+    test_regr(False)
+
+def make_pcap(path=PCAP_PATH):
+    '''
+    writes in `path' the pcap file with all the L3 mobile messages from the
+    L3Call dictionnary that can be built and parsed back, encapsulated in
+    gsmtap headers
+    '''
+    Layer3._initiator = 'Net'
+    g = _little(Global())
+    g.magic > 0xa1b2c3d4
+    g.vers_maj > 2
+    g.vers_min > 4
+    g.snaplen > 0xffff
+    # DLT_USER0, for the gsmtap header to be the 1st one
+    g.link_type > 147
+    fd = open(path, 'wb')
+    fd.write(str(g))
+    num = 0
+    for pd in sorted(L3Call):
+        for t in sorted(L3Call[pd]):
+            try:
+                m = L3Call[pd][t](with_options=True)
+                buf = str(m)
+                m2 = parse_L3(buf)
+                if m2.__class__ is not m.__class__ or str(m2) != buf:
+                    continue
+            except:
+                continue
+            gt = gsmtap()
+            gt.frame_number > num
+            buf = str(gt) + buf
+            rec = _little(Record())
+            rec.ts_sec > 1400000000 + num
+            rec.incl_len > len(buf)
+            rec.orig_len > len(buf)
+            fd.write(str(rec) + buf)
+            num += 1
+    fd.close()
+
+def _pcap_setup():
     Int._endian = 'big'
-    print('test 3: building / parsing aligned and unaligned layers %i times'\
-          % RND_T3)
-    for i in range(RND_T3):
-        test_tlv()
+    Layer3._initiator = 'Net'
+    fd = open(PCAP_PATH, 'rb')
+    buf = fd.read()
+    fd.close()
+    return (buf, )
 
-def t4(bmp=bmp_file):
-    Int._endian = 'little'
-    print('test 4: parsing BMP file of %.3f kB %i times'\
-          % (len(bmp)/1024.0, RND_T4))
-    for i in range(RND_T4):
-        b=BMP()
-        b.parse(bmp)
-        del b
-
-def t5(bgp=testbuf):
+def _pcap_ingest(buf):
+    g = _little(Global())
+    g.map(buf)
+    off, msgs = len(g), []
+    while off < len(buf):
+        rec = _little(Record())
+        rec.map(buf[off:])
+        off += len(rec)
+        end = off + rec.incl_len()
+        gt = gsmtap()
+        gt.map(buf[off:end])
+        msgs.append( parse_L3(buf[off+len(gt):end]) )
+        off = end
+    return msgs
+
+def _pcap_stream(buf):
+    # the file is pulled 4096 bytes at a time
+    msgs = []
+    for rec in parse_stream(StringIO(buf), bufsize=4096):
+        data = rec[1].s()
+        gt = gsmtap()
+        gt.map(data)
+        msgs.append( parse_L3(data[len(gt):]) )
+    return msgs
+
+def _l3mobile_export_setup():
+    return (_pcap_ingest(*_pcap_setup()), )
+
+def _export(objs):
+    # exports the values with their names, and packs them
+    for obj in objs:
+        serial.pack( obj.export(names=True) )
+
+def _pcap_headers_setup():
     Int._endian = 'big'
-    print('test 5: parsing BGP4 packet of %i Bytes %i times'\
-          % (len(bgp), RND_T5))
-    for i in range(RND_T5):
-        b=BGP4()
-        b.parse(bgp)
-        del b
-
-def t6():
+    return (Record(), gsmtap())
+
+def _pcap_headers(rec, gt):
+    rec.ts_sec < 1400000000
+    rec.incl_len < 16
+    gt.frame_number < 1234
+    buf = str(rec) + str(gt)
+    rec.map(buf)
+    gt.map(buf[16:])
+
+def _ip_setup():
     Int._endian = 'big'
-    print('test 6: building / parsing all L3 mobile packets defined in '\
-          'formats/L3Mobile.py, %i times' % RND_T6)
-    for i in range(RND_T6):
-        void = test_regr(False)
+    pkt = Block('pkt')
+    pkt.append( IPv4() )
+    pkt << UDP(with_cs=True)
+    pay = RawLayer()
+    pay.append( Str('data', Pt=100*'A') )
+    pkt << pay
+    return (pkt, )
 
-def t7():
+def _ip_build(pkt):
+    pkt[0].id > 1234
+    return str(pkt)
+
+def _ip_rewrite_setup():
+    # IPv4 / UDP / payload Block, mapped lazily
     Int._endian = 'big'
-    print('test 7: compiling / assigning / encoding / decoding ASN.1 PER '\
-          'structures %i times' % RND_T7)
-    for i in range(RND_T7):
-        test_asn1()
+    pkt = Block('pkt')
+    pkt.append( IPv4() )
+    pkt << UDP(with_cs=True)
+    pkt << RawLayer(1000*'A')
+    buf = str(pkt)
+    for l in pkt:
+        l._lazy_map = True
+    pkt.map(buf)
+    return (pkt, )
+
+def _ip_rewrite(pkt):
+    pkt[0].ttl.Val = pkt[0].ttl() ^ 1
+    pkt[0].cs.reautomatize()
+    return str(pkt)
 
-def t8():
+def _bgp4_clone_setup():
     Int._endian = 'big'
-    print('test 8: loading rrc3g module and encoding / decoding UMTS RRC ASN.1 '\
-          'PER unaligned structures %i times' % RND_T8)
-    pkts, pkts_nc = _test_rrc3g_prep()
-    if pkts is None:
-        print('unable to load rrc3g ASN.1 module')
-    for i in range(RND_T8):
-        _test_rrc3g(pkts, pkts_nc)
+    return (_parse(BGP4, testbuf), )
+
+def _clone(obj):
+    return obj.clone()
 
-def t9():
+def _shar_setup(name):
+    return (shar.BACKENDS[name], 10*testbuf)
+
+def _shar(backend, buf):
+    s = backend(buf)
+    while len(s) >= 72:
+        s.get_bits(3)
+        s.get_uint(13)
+        s.get_int(9)
+        s.get_uint(1)
+        s.get_buf(24)
+        s.get_uint(22)
+    s.rewind()
+    s.set_uint(s.to_uint(), len(s))
+    s.set_bits(s.to_bits())
+
+def _asn1_setup():
     Int._endian = 'big'
-    print('test 9: loading s1ap module and encoding / decoding LTE S1AP ASN.1 '\
-          'PER aligned structures %i times' % RND_T9)
+    Layer._byte_aligned = False
+    # mute the ASN.1 modules compilation and loading
+    processor.log = lambda msg: None
+    return ()
+
+def _asn1_compile_setup(name):
+    _asn1_setup()
+    fd = open(get_asn_dir() + name, 'r')
+    text = fd.read()
+    fd.close()
+    return (text, )
+
+def _asn1_compile(text):
+    GLOBAL.clear()
+    return compile(text)
+
+def _asn1_module_setup(name):
+    # compiles the ASN.1 module from asn1/asn/ when it has not been pickled
+    # yet in asn1/modules/ (e.g. on a fresh checkout)
+    _asn1_setup()
+    if not os.path.exists('%s%s.pck' % (get_modules_dir(), name)):
+        generate_modules([m for m in MODULE_NAMES if m[1] == name])
+
+def _s1ap_decode_setup():
+    _asn1_module_setup('s1ap')
     pkts = _test_s1ap_prep()
-    if pkts is None:
-        print('unable to load s1ap ASN.1 module')
-    for i in range(RND_T9):
-        _test_s1ap(pkts)
+    pdu = GLOBAL.TYPE['S1AP-PDU']
+    return ([(pdu, buf) for buf in pkts], )
 
-TESTS = [t1, t2, t3, t4, t5, t6, t7, t8, t9]
-#TESTS = [t3]
+def _rrc3g_decode_setup():
+    _asn1_module_setup('rrc3g')
+    pkts, pkts_nc = _test_rrc3g_prep()
+    pcch = GLOBAL.TYPE['PCCH-Message']
+    dldcch = GLOBAL.TYPE['DL-DCCH-Message']
+    uldcch = GLOBAL.TYPE['UL-DCCH-Message']
+    return ([(pcch, buf) for buf in pkts[0:3]] + \
+            [(dldcch, buf) for buf in pkts[3:14] + pkts_nc[:3]] + \
+            [(uldcch, buf) for buf in pkts[14:] + pkts_nc[3:]], )
 
-def main(tests=TESTS):
-    T0 = time.time()
-    for T in tests:
-        print('duration: %.4f sec.' % texec(T))
-    print('total duration: %.4f sec.' % (time.time()-T0))
+def _codec_setup(setup, name):
+    # with the PER codec generated for the module
+    args = setup()
+    load_codec(name)
+    return args
 
-if __name__ == '__main__':
-    main()
+def _decode(msgs):
+    for pdu, buf in msgs:
+        pdu.decode(buf)
+
+def _decode_msg(msgs):
+    # also builds the libmich structure of the messages
+    for pdu, buf in msgs:
+        pdu.decode(buf)
+        pdu._msg
+
+def _show_setup(decode_setup):
+    # Layers of the messages decoded
+    msgs, = decode_setup()
+    layers = []
+    for pdu, buf in msgs:
+        pdu.decode(buf)
+        layers.append( pdu._msg )
+    return (layers, )
 
+def _show(layers):
+    for l in layers:
+        l.show()
+        repr(l)
+
+def _export_setup(decode_setup):
+    # values decoded, with the object to export them
+    msgs, = decode_setup()
+    vals = []
+    for pdu, buf in msgs:
+        pdu.decode(buf)
+        vals.append( (pdu, pdu()) )
+    return (vals, )
+
+def _asn1_export(vals):
+    for pdu, val in vals:
+        pdu._val = val
+        serial.pack( pdu.export(names=True) )
+
+def _encode_setup(decode_setup):
+    # encodes back the values decoded from the buffers
+    # (only those which are encoded in a canonical way)
+    msgs, = decode_setup()
+    vals = []
+    for pdu, buf in msgs:
+        pdu.decode(buf)
+        val = pdu()
+        try:
+            pdu.encode(val)
+        except:
+            continue
+        if str(pdu) == buf:
+            vals.append( (pdu, val) )
+    return (vals, )
+
+def _encode(vals):
+    for pdu, val in vals:
+        pdu.encode(val)
+
+BENCHMARKS = [
+    Bench('element.assign', _str_assign,
+          desc='assigning Str() values'),
+    Bench('element.fields', _fields, _fields_setup,
+          desc='getting / setting fields of a 32-element Layer'),
+    Bench('tlv.build', _tlv_build,
+          desc='building testTLV() with a 100 bytes value'),
+    Bench('tlv.parse', _tlv_parse, _tlv_parse_setup,
+          desc='parsing testTLV() with a 100 bytes value'),
+    Bench('layer.test', _layer_test,
+          desc='building / parsing aligned and unaligned layers (core '\
+               'element test)'),
+    Bench('bmp.parse', lambda buf: _parse(BMP, buf), _bmp_setup,
+          desc='parsing utils/test.bmp'),
+    Bench('bgp4.parse', lambda buf: _parse(BGP4, buf), _bgp4_setup,
+          desc='parsing BGP4 testbuf'),
+    Bench('bgp4.clone', _clone, _bgp4_clone_setup,
+          desc='cloning BGP4 parsed from testbuf'),
+    Bench('l3mobile.regr', _l3mobile_regr, rounds=5, warmup=1, number=1,
+          desc='building / parsing all L3 mobile messages (L3Mobile '\
+               'regression test)'),
+    Bench('pcap.ingest', _pcap_ingest, _pcap_setup, rounds=20,
+          desc='parsing the pcap, gsmtap and L3 mobile headers of '\
+               'utils/test.pcap'),
+    Bench('pcap.stream', _pcap_stream, _pcap_setup, rounds=20,
+          desc='streaming the records of utils/test.pcap, and parsing their '\
+               'gsmtap and L3 mobile headers'),
+    Bench('l3mobile.export', _export, _l3mobile_export_setup, rounds=20,
+          desc='exporting and packing the L3 mobile messages parsed from '\
+               'utils/test.pcap'),
+    Bench('pcap.headers', _pcap_headers, _pcap_headers_setup,
+          desc='building / parsing pcap Record() and gsmtap() headers'),
+    Bench('ip.build', _ip_build, _ip_setup,
+          desc='building IPv4 / UDP (with checksum) / payload Block'),
+    Bench('ip.rewrite', _ip_rewrite, _ip_rewrite_setup,
+          desc='changing the TTL of an IPv4 / UDP / 1000 bytes payload '\
+               'Block mapped lazily, and building it again'),
+    Bench('ip.clone', _clone, _ip_setup,
+          desc='cloning IPv4 / UDP / payload Block'),
+    ] + [
+    Bench('shar.%s' % name, _shar, lambda name=name: _shar_setup(name),
+          rounds=20, desc='consuming a %i bytes buffer with the %s shar '\
+          'backend' % (10*len(testbuf), name)) \
+    for name in sorted(shar.BACKENDS)
+    ] + [
+    Bench('asn1.test', test_asn1, _asn1_setup, rounds=10, warmup=1, number=1,
+          desc='compiling / assigning / encoding / decoding ASN.1 PER '\
+               'structures (asn1 test)'),
+    Bench('asn1.compile', _asn1_compile,
+          lambda: _asn1_compile_setup('test.asn'),
+          desc='compiling asn1/asn/test.asn'),
+    Bench('asn1.compile_s1ap', _asn1_compile,
+          lambda: _asn1_compile_setup('s1ap_36413-c10.asn'),
+          rounds=5, warmup=1, number=1,
+          desc='compiling asn1/asn/s1ap_36413-c10.asn'),
+    Bench('rrc3g.decode', _decode, _rrc3g_decode_setup, rounds=20,
+          desc='decoding UMTS RRC PER unaligned messages'),
+    Bench('rrc3g.encode', _encode,
+          lambda: _encode_setup(_rrc3g_decode_setup), rounds=20,
+          desc='encoding UMTS RRC PER unaligned messages'),
+    Bench('rrc3g.decode_gen', _decode,
+          lambda: _codec_setup(_rrc3g_decode_setup, 'rrc3g'), rounds=20,
+          desc='decoding UMTS RRC PER unaligned messages, with the '\
+               'generated codec'),
+    Bench('rrc3g.encode_gen', _encode,
+          lambda: _codec_setup(lambda: _encode_setup(_rrc3g_decode_setup),
+                               'rrc3g'), rounds=20,
+          desc='encoding UMTS RRC PER unaligned messages, with the '\
+               'generated codec'),
+    Bench('s1ap.decode', _decode, _s1ap_decode_setup, rounds=20,
+          desc='decoding LTE S1AP PER aligned messages'),
+    Bench('s1ap.decode_msg', _decode_msg, _s1ap_decode_setup, rounds=20,
+          desc='decoding LTE S1AP PER aligned messages, with their '\
+               'structure'),
+    Bench('s1ap.encode', _encode,
+          lambda: _encode_setup(_s1ap_decode_setup), rounds=20,
+          desc='encoding LTE S1AP PER aligned messages'),
+    Bench('s1ap.decode_gen', _decode,
+          lambda: _codec_setup(_s1ap_decode_setup, 's1ap'), rounds=20,
+          desc='decoding LTE S1AP PER aligned messages, with the generated '\
+               'codec'),
+    Bench('s1ap.encode_gen', _encode,
+          lambda: _codec_setup(lambda: _encode_setup(_s1ap_decode_setup),
+                               's1ap'), rounds=20,
+          desc='encoding LTE S1AP PER aligned messages, with the generated '\
+               'codec'),
+    Bench('s1ap.export', _asn1_export,
+          lambda: _export_setup(_s1ap_decode_setup), rounds=20,
+          desc='exporting and packing the values of LTE S1AP messages '\
+               'decoded'),
+    Bench('s1ap.show', _show, lambda: _show_setup(_s1ap_decode_setup),
+          rounds=20, desc='rendering LTE S1AP messages decoded, with show() '\
+                          'and repr()'),
+    ]
+
+if __name__ == '__main__':
+    sys.exit(main())